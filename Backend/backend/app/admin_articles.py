@@ -0,0 +1,101 @@
+"""Admin article listing.
+
+Pages are keyset-paginated on ``(published_at, id)`` like the feed, over the
+``(source, published_at, id)`` index (``(author_id, published_at, id)`` when
+filtered by author), and load only the summary columns unless the full
+article is asked for. The total is counted exactly up to a bound; past it,
+PostgreSQL's planner estimate is reported instead, so a large table is
+never scanned just to number the pages.
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.feed import Cursor, next_cursor
+from app.models import Article
+from app.schemas import ADMIN_SUMMARY_FIELDS
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored naive in UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class AdminFilters:
+    author_id: Optional[str] = None
+    published_from: Optional[datetime] = None  # Inclusive
+    published_to: Optional[datetime] = None  # Exclusive
+    title_prefix: Optional[str] = None
+
+    def where(self) -> list:
+        clauses = [Article.source == "admin"]
+        if self.author_id is not None:
+            clauses.append(Article.author_id == self.author_id)
+        if self.published_from is not None:
+            clauses.append(Article.published_at >= naive_utc(self.published_from))
+        if self.published_to is not None:
+            clauses.append(Article.published_at < naive_utc(self.published_to))
+        if self.title_prefix:
+            clauses.append(Article.title.startswith(self.title_prefix, autoescape=True))
+        return clauses
+
+
+def admin_page(
+    db: Session,
+    filters: AdminFilters,
+    limit: int,
+    cursor: Optional[Cursor] = None,
+    full: bool = False,
+) -> Tuple[List[Row], Optional[str]]:
+    """Return one page of admin articles, newest first, as column rows, and the cursor for the next one"""
+    columns = Article.__table__.columns if full else [getattr(Article, name) for name in ADMIN_SUMMARY_FIELDS]
+    stmt = (
+        select(*columns)
+        .where(*filters.where())
+        .order_by(Article.published_at.desc(), Article.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Article.published_at, Article.id) < tuple_(cursor.published_at, cursor.article_id))
+    rows = list(db.execute(stmt))
+    return rows[:limit], next_cursor(rows[:limit], len(rows) > limit)
+
+
+def _planner_estimate(db: Session, stmt) -> Optional[int]:
+    """Rows PostgreSQL expects ``stmt`` to return, from EXPLAIN; None elsewhere or on failure"""
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    compiled = stmt.compile(dialect=dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup) if compiled.positional else compiled.params
+    try:
+        # In a savepoint, so that a failure does not abort the request's transaction
+        with db.begin_nested():
+            plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+    except SQLAlchemyError:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_admin_articles(db: Session, filters: AdminFilters, exact_limit: int) -> Tuple[int, bool]:
+    """Matching rows and whether that number is exact.
+
+    At most ``exact_limit + 1`` index entries are read; beyond that the total is the
+    planner's estimate (never less than the bound), or the bound itself where there is none.
+    """
+    matching = select(Article.id).where(*filters.where())
+    count = db.scalar(select(func.count()).select_from(matching.limit(exact_limit + 1).subquery()))
+    if count <= exact_limit:
+        return count, True
+    return max(_planner_estimate(db, matching) or 0, exact_limit), False
@@ -0,0 +1,135 @@
+"""Normalizing and upserting upstream articles"""
+import importlib
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.models import Article, FeedEntry
+
+# Dialect modules providing ``insert().on_conflict_do_*``, imported on first upsert
+_upsert_dialects = {
+    "postgresql": "sqlalchemy.dialects.postgresql",
+    "sqlite": "sqlalchemy.dialects.sqlite",
+}
+
+
+def _upsert_insert(db: Session):
+    """The dialect's ``insert`` construct, or None when it has no ON CONFLICT support"""
+    module = _upsert_dialects.get(db.get_bind().dialect.name)
+    return importlib.import_module(module).insert if module else None
+
+
+def normalize_article(data: dict) -> Optional[dict]:
+    """Map a NewsAPI article payload to Article column values, or None if it can't be stored"""
+    url = data.get("url")
+    if not url:
+        return None
+    try:
+        published_at_str = data.get("publishedAt") or ""
+        published_at = datetime.fromisoformat(published_at_str.replace("Z", "+00:00")) if published_at_str else datetime.utcnow()
+    except ValueError:
+        return None
+    return {
+        "title": data.get("title") or "",
+        "description": data.get("description"),
+        "content": data.get("content"),
+        "source": (data.get("source") or {}).get("name") or "newsapi",
+        "image_url": data.get("urlToImage"),
+        "url": url,
+        "published_at": published_at,
+    }
+
+
+def _insert_missing(db: Session, rows: List[dict]) -> List[Article]:
+    insert = _upsert_insert(db)
+    if insert is None:
+        # Generic path: no ON CONFLICT support, so a concurrent insert of the same URL
+        # surfaces as an IntegrityError on commit
+        articles = [Article(**row) for row in rows]
+        db.add_all(articles)
+        db.flush()
+        return articles
+
+    stmt = insert(Article).values(rows).on_conflict_do_nothing(index_elements=["url"]).returning(Article)
+    return list(db.scalars(stmt))
+
+
+def _add_feed_entries(db: Session, query: str, articles: List[Article]) -> None:
+    rows = [
+        {"query": query, "article_id": article.id, "published_at": article.published_at}
+        for article in articles
+    ]
+    insert = _upsert_insert(db)
+    if insert is None:
+        db.add_all(FeedEntry(**row) for row in rows)
+        db.flush()
+        return
+    db.execute(insert(FeedEntry).values(rows).on_conflict_do_nothing())
+
+
+def normalize_query(query: str) -> str:
+    return query.strip().lower()
+
+
+def upsert_articles(db: Session, payloads: Iterable[dict], query: Optional[str] = None) -> List[Article]:
+    """Store any articles not already present and return all of them in upstream order.
+
+    One ``IN (...)`` lookup resolves the known URLs and one ``INSERT ... ON CONFLICT (url)
+    DO NOTHING RETURNING`` adds the rest, so the cost does not grow with the page size.
+    When ``query`` is given the articles are also recorded as entries of that feed.
+    """
+    rows = {}
+    for payload in payloads:
+        row = normalize_article(payload)
+        if row and row["url"] not in rows:
+            rows[row["url"]] = row
+    if not rows:
+        return []
+
+    # Existing articles, plus whether each is already an entry of this feed, in one query
+    feed = normalize_query(query) if query is not None else None
+    lookup = db.query(Article, FeedEntry.article_id).outerjoin(
+        FeedEntry, and_(FeedEntry.article_id == Article.id, FeedEntry.query == feed)
+    ).filter(Article.url.in_(list(rows)))
+    by_url = {}
+    in_feed = set()
+    for article, entry_id in lookup:
+        by_url[article.url] = article
+        if entry_id is not None:
+            in_feed.add(article.id)
+
+    missing = [row for url, row in rows.items() if url not in by_url]
+    inserted = _insert_missing(db, missing) if missing else []
+    if missing:
+        for article in inserted:
+            by_url[article.url] = article
+
+        # URLs inserted by a concurrent request between our lookup and insert
+        lost = [row["url"] for row in missing if row["url"] not in by_url]
+        if lost:
+            for article in db.query(Article).filter(Article.url.in_(lost)).all():
+                by_url[article.url] = article
+
+    articles = [by_url[url] for url in rows if url in by_url]
+    new_entries = [article for article in articles if article.id not in in_feed] if feed is not None else []
+    if new_entries:
+        _add_feed_entries(db, feed, new_entries)
+
+    if missing or new_entries:
+        # The rows were just read back from the database, so keep them loaded after commit
+        # instead of paying one refresh query per article during serialization
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
+
+    if inserted:
+        # Imported here: app.stream depends on app.feed, which depends on this module
+        from app.stream import broker
+        broker.publish(inserted)
+
+    return articles
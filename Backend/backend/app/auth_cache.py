@@ -0,0 +1,82 @@
+"""In-process cache of authenticated principals keyed by bearer token"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as handlers see it; no ORM state attached"""
+    id: str
+    username: str
+    is_admin: bool
+
+
+class AuthCache:
+    """Bounded, TTL'd token -> Principal map with per-user invalidation"""
+
+    def __init__(self, ttl: float = 60, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            item = self._entries.get(token)
+            if item is not None:
+                principal, expires_at = item
+                if expires_at > self.clock():
+                    self._entries.move_to_end(token)
+                    self.counters["hits"] += 1
+                    return principal
+                self._remove(token)
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, token: str, principal: Principal, token_expires_at: Optional[float] = None) -> None:
+        """Cache ``principal`` until the TTL or the token's own expiry, whichever comes first"""
+        if self.ttl <= 0:
+            return
+        expires_at = self.clock() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters["evictions"] += 1
+
+    def _remove(self, token: str) -> None:
+        item = self._entries.pop(token, None)
+        if item is None:
+            return
+        tokens = self._tokens_by_user.get(item[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[item[0].id]
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token of a user, e.g. after the user is changed or deleted"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+            self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, size=len(self._entries))
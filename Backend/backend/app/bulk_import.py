@@ -0,0 +1,268 @@
+"""Bulk import of admin articles from a streamed NDJSON or JSON array body.
+
+Rows are parsed as the body arrives and validated one at a time. Valid rows
+are written ``IMPORT_BATCH_SIZE`` at a time: one ``IN (...)`` lookup finds the
+URLs already stored, then one executemany ``INSERT ... ON CONFLICT (url) DO
+NOTHING`` adds the rest, and each batch is committed on its own. Memory
+stays flat whatever the size of the file, and an import that fails part way
+keeps the batches it wrote.
+
+Invalid rows and rows whose ``url`` is already stored (or repeated in the
+file) are reported by row number and skipped; they do not stop the import.
+A body that is not well-formed stops it where the damage starts.
+"""
+import codecs
+import json
+import re
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.articles import _upsert_insert
+from app.models import Article
+from app.schemas import ArticleImport
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+JSON_TYPES = ("application/json",)
+
+_row_adapter = TypeAdapter(ArticleImport)
+_json_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+_number_tail = re.compile(r"[0-9.eE+-]*")
+
+Batch = List[Tuple[int, dict]]  # (row number, column values)
+
+
+class ImportAborted(Exception):
+    """The body cannot be parsed any further"""
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, object]] = []
+        self.aborted: Optional[str] = None
+
+    def skip(self, row: int, message: str, duplicate: bool = False) -> None:
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.invalid += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.duplicates + self.invalid > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+
+async def ndjson_values(chunks: AsyncIterator[bytes], max_row_bytes: int) -> AsyncIterator[Tuple[int, object]]:
+    """(line number, parsed value or the ValueError it raised) for every non-blank line"""
+    buffer, line_number = b"", 0
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        if len(buffer) > max_row_bytes:
+            raise ImportAborted(f"Line {line_number + len(lines) + 1} is longer than {max_row_bytes} bytes")
+        for line in lines:
+            line_number += 1
+            if len(line) > max_row_bytes:
+                raise ImportAborted(f"Line {line_number} is longer than {max_row_bytes} bytes")
+            if line.strip():
+                yield line_number, _loads(line)
+    if len(buffer) > max_row_bytes:
+        raise ImportAborted(f"Line {line_number + 1} is longer than {max_row_bytes} bytes")
+    if buffer.strip():
+        yield line_number + 1, _loads(buffer)
+
+
+def _loads(line: bytes) -> object:
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError as exc:
+        return exc
+
+
+def _too_long(buffer: str, start: int, end: int, max_bytes: int) -> bool:
+    # Characters are 1 to 4 bytes, so only encode when the length alone cannot tell
+    if end - start <= max_bytes // 4:
+        return False
+    return end - start > max_bytes or len(buffer[start:end].encode()) > max_bytes
+
+
+async def json_array_values(chunks: AsyncIterator[bytes], max_row_bytes: int) -> AsyncIterator[Tuple[int, object]]:
+    """(position, parsed value) for each element of a top-level JSON array, decoded as it arrives.
+
+    A malformed element cannot be skipped (where it ends is unknown), so it aborts the import.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    chunks = chunks.__aiter__()
+    buffer, pos, finished = "", 0, False
+    expect, row = "[", 0  # "[", then "value-or-]", "value", ",-or-]", and "end" after the closing bracket
+
+    while True:
+        pos = _whitespace.match(buffer, pos).end()
+        complete = None
+        if pos < len(buffer):
+            char = buffer[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ImportAborted("Expected a JSON array")
+                pos, expect = pos + 1, "value-or-]"
+                continue
+            if expect == "end":
+                raise ImportAborted("Unexpected data after the closing bracket")
+            if expect == ",-or-]" or (expect == "value-or-]" and char == "]"):
+                if char not in ",]":
+                    raise ImportAborted(f"Expected ',' or ']' after row {row}")
+                pos, expect = pos + 1, "value" if char == "," else "end"
+                continue
+            try:
+                value, end = _json_decoder.raw_decode(buffer, pos)
+                # A number is only known to be whole once something that cannot continue it follows:
+                # "-1." or "1.5e" at the end of the buffer may be "-1.25" or "1.5e3" in the next chunk
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    complete = _number_tail.match(buffer, end).end() < len(buffer) or finished
+                else:
+                    complete = end < len(buffer) or finished
+            except json.JSONDecodeError:
+                if finished:
+                    raise ImportAborted(f"Malformed JSON in row {row + 1}")
+                if _too_long(buffer, pos, len(buffer), max_row_bytes):
+                    raise ImportAborted(f"Row {row + 1} is longer than {max_row_bytes} bytes")
+            if complete and _too_long(buffer, pos, end, max_row_bytes):
+                raise ImportAborted(f"Row {row + 1} is longer than {max_row_bytes} bytes")
+            if complete:
+                row += 1
+                yield row, value
+                pos, expect = end, ",-or-]"
+                continue
+        elif finished:
+            if expect != "end":
+                raise ImportAborted("Unexpected end of body")
+            return
+
+        # Need more data: keep only the unparsed tail
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            chunk, finished = b"", True
+        buffer, pos = buffer[pos:] + decode(chunk, final=finished), 0
+
+
+async def _non_empty(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def to_columns(value: object, author_id: str, now: datetime) -> dict:
+    """Validate one parsed row into Article column values; raises ValueError with a readable message"""
+    if isinstance(value, Exception):
+        raise ValueError(f"Malformed JSON: {value}")
+    try:
+        article = _row_adapter.validate_python(value)
+    except ValidationError as exc:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+        ))
+    published_at = article.published_at or now
+    if published_at.tzinfo is not None:
+        # Stored naive in UTC, like every other timestamp
+        published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return {
+        "title": article.title,
+        "description": article.description,
+        "content": article.content,
+        "image_url": article.image_url,
+        "url": article.url,
+        "published_at": published_at,
+        "author_id": author_id,
+        "source": "admin",
+    }
+
+
+def write_batch(db: Session, batch: Batch) -> Tuple[int, List[int]]:
+    """Insert the rows whose URL is not stored yet and commit; returns (inserted, duplicate row numbers)"""
+    urls = [columns["url"] for _, columns in batch if columns["url"]]
+    stored = set(db.scalars(select(Article.url).where(Article.url.in_(urls)))) if urls else set()
+    duplicates = [row for row, columns in batch if columns["url"] in stored]
+    rows = [columns for _, columns in batch if columns["url"] not in stored]
+    if not rows:
+        return 0, duplicates
+
+    dialect_insert = _upsert_insert(db)
+    if dialect_insert is None:
+        db.execute(insert(Article), rows)
+        inserted = len(rows)
+    else:
+        # URLs a concurrent import stored after the lookup are skipped, not errors
+        stmt = dialect_insert(Article).on_conflict_do_nothing(index_elements=["url"]).returning(Article.url)
+        returned = set(db.scalars(stmt, rows))
+        lost = {columns["url"] for columns in rows if columns["url"] and columns["url"] not in returned}
+        duplicates.extend(row for row, columns in batch if columns["url"] in lost)
+        inserted = len(rows) - len(lost)
+    db.commit()
+    return inserted, duplicates
+
+
+async def import_stream(
+    chunks: AsyncIterator[bytes],
+    ndjson: bool,
+    author_id: str,
+    write: Callable[[Batch], Awaitable[Tuple[int, List[int]]]],
+    batch_size: int,
+    max_row_bytes: int,
+    max_errors: int,
+) -> ImportReport:
+    """Parse, validate and write ``chunks``; ``write`` runs write_batch wherever the session lives"""
+    report = ImportReport(max_errors)
+    now = datetime.utcnow()
+    batch: Batch = []
+    batch_urls = set()  # Duplicates within a batch would make its INSERT skip all but one silently
+
+    async def flush():
+        inserted, duplicates = await write(batch)
+        report.inserted += inserted
+        for row in duplicates:
+            report.skip(row, "Duplicate url", duplicate=True)
+        batch.clear()
+        batch_urls.clear()
+
+    values = (ndjson_values if ndjson else json_array_values)(_non_empty(chunks), max_row_bytes)
+    try:
+        async for row, value in values:
+            report.rows += 1
+            try:
+                columns = to_columns(value, author_id, now)
+            except ValueError as exc:
+                report.skip(row, str(exc))
+                continue
+            if columns["url"] in batch_urls:
+                report.skip(row, "Duplicate url", duplicate=True)
+                continue
+            if columns["url"]:
+                batch_urls.add(columns["url"])
+            batch.append((row, columns))
+            if len(batch) >= batch_size:
+                await flush()
+    except ImportAborted as exc:
+        report.aborted = str(exc)
+    if batch:
+        await flush()
+    return report
@@ -0,0 +1,351 @@
+"""Response cache for upstream NewsAPI results.
+
+Entries are served fresh for ``ttl`` seconds and then, for another
+``stale_ttl`` seconds, served stale while a single background refresh runs.
+Concurrent misses on the same key are coalesced into one upstream call.
+"""
+import asyncio
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    stored_at: float
+    ttl: float
+    stale_ttl: float
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+    def is_fresh(self, now: float) -> bool:
+        return self.age(now) < self.ttl
+
+    def is_servable(self, now: float) -> bool:
+        return self.age(now) < self.ttl + self.stale_ttl
+
+
+class CacheBackend(ABC):
+    """Storage interface used by ResponseCache"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU store bounded by entry count"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCache(CacheBackend):
+    """Store backed by a shared key/value server so several workers see the same entries.
+
+    ``client`` only needs redis-style ``get(key)``, ``set(key, value, ex=seconds)``
+    and ``delete(key)`` methods; values are stored as JSON.
+    """
+
+    def __init__(self, client, prefix: str = "buzznews:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return CacheEntry(**json.loads(raw))
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        raw = json.dumps({
+            "value": entry.value,
+            "stored_at": entry.stored_at,
+            "ttl": entry.ttl,
+            "stale_ttl": entry.stale_ttl,
+        })
+        self.client.set(self.prefix + key, raw, ex=max(1, int(entry.ttl + entry.stale_ttl)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        scan = getattr(self.client, "scan_iter", None)
+        if scan is None:
+            return
+        for key in scan(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class FakeSharedClient:
+    """Local stand-in for a redis client, used with SharedCache in tests and benchmarks"""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ex if ex else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value, expires_at = self._data.get(key, ("0", None))
+            if expires_at is not None and expires_at <= time.time():
+                value, expires_at = "0", None
+            value = str(int(value) + amount)
+            self._data[key] = (value, expires_at)
+            return int(value)
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        return self.incr(key, -amount)
+
+    def expire(self, key: str, seconds: int) -> None:
+        with self._lock:
+            if key in self._data:
+                self._data[key] = (self._data[key][0], time.time() + seconds)
+
+    def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+        return iter(keys)
+
+
+class ResponseCache:
+    """TTL cache with stale-while-revalidate and request coalescing"""
+
+    def __init__(self, backend: CacheBackend, stale_ttl: float = 0, max_refresh_workers: int = 4,
+                 clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._inflight: Dict[str, Future] = {}
+        self._async_inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_refresh_workers, thread_name_prefix="cache-refresh")
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: float) -> Any:
+        """Return the cached value for ``key``, calling ``fetch`` at most once per key at a time"""
+        if ttl <= 0:
+            return fetch()
+
+        now = self.clock()
+        entry = self.backend.get(key)
+        if entry is not None:
+            if entry.is_fresh(now):
+                self._count("hits")
+                return entry.value
+            if entry.is_servable(now):
+                self._count("stale_hits")
+                self._refresh_in_background(key, fetch, ttl)
+                return entry.value
+
+        self._count("misses")
+        return self._fetch_coalesced(key, fetch, ttl)
+
+    def _fetch_coalesced(self, key: str, fetch: Callable[[], Any], ttl: float) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.counters["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+            self.backend.set(key, CacheEntry(value=value, stored_at=self.clock(), ttl=ttl, stale_ttl=self.stale_ttl))
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any], ttl: float) -> None:
+        with self._lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            self._count("refreshes")
+            try:
+                self._fetch_coalesced(key, fetch, ttl)
+            except Exception:
+                self._count("refresh_errors")
+
+        self._executor.submit(refresh)
+
+    async def get_or_fetch_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """Async counterpart of get_or_fetch; ``fetch`` is a coroutine function"""
+        if ttl <= 0:
+            return await fetch()
+
+        now = self.clock()
+        entry = self.backend.get(key)
+        if entry is not None:
+            if entry.is_fresh(now):
+                self._count("hits")
+                return entry.value
+            if entry.is_servable(now):
+                self._count("stale_hits")
+                if key not in self._async_inflight:
+                    task = asyncio.get_running_loop().create_task(self._refresh_async(key, fetch, ttl))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                return entry.value
+
+        self._count("misses")
+        return await self._fetch_coalesced_async(key, fetch, ttl)
+
+    async def _fetch_coalesced_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        future = self._async_inflight.get(key)
+        if future is not None:
+            self._count("coalesced")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_inflight[key] = future
+        try:
+            value = await fetch()
+            self.backend.set(key, CacheEntry(value=value, stored_at=self.clock(), ttl=ttl, stale_ttl=self.stale_ttl))
+            future.set_result(value)
+            return value
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._async_inflight.pop(key, None)
+
+    async def _refresh_async(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        self._count("refreshes")
+        try:
+            await self._fetch_coalesced_async(key, fetch, ttl)
+        except Exception:
+            self._count("refresh_errors")
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self.backend.clear()
+        else:
+            self.backend.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+
+def parse_query_ttls(raw: str) -> Dict[str, int]:
+    """Parse ``"breaking=60,technology=600"`` into a per-query TTL map"""
+    ttls = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        query, seconds = item.split("=", 1)
+        ttls[query.strip().lower()] = int(seconds)
+    return ttls
+
+
+def build_backend() -> CacheBackend:
+    if settings.NEWSAPI_CACHE_BACKEND == "shared":
+        # Optional dependency: only needed when workers share one cache
+        import redis
+        return SharedCache(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+    return MemoryCache(max_entries=settings.NEWSAPI_CACHE_MAX_ENTRIES)
+
+
+_query_ttls = parse_query_ttls(settings.NEWSAPI_CACHE_QUERY_TTLS)
+
+
+def newsapi_ttl(query: str) -> int:
+    return _query_ttls.get(query.lower(), settings.NEWSAPI_CACHE_TTL)
+
+
+newsapi_cache = ResponseCache(build_backend(), stale_ttl=settings.NEWSAPI_CACHE_STALE_TTL)
@@ -1,11 +1,102 @@
+import threading
+from typing import Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import settings
+from app.config import Settings, settings
+from app.pool import InstrumentedQueuePool, pool_stats
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def engine_options(url: str, is_async: bool = False, config: Settings = settings) -> dict:
+    """Pool and session settings shared by the sync and async engines"""
+    parsed = make_url(url)
+    options = {}
+    if parsed.get_backend_name() == "sqlite" and (is_async or parsed.database in (None, "", ":memory:")):
+        # In-memory SQLite shares one connection and aiosqlite uses NullPool: neither has a sized pool
+        return options
+
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    if not is_async:
+        options["poolclass"] = InstrumentedQueuePool
+
+    if parsed.get_backend_name() == "postgresql" and config.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(config.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+class _LazySessionmaker(sessionmaker):
+    """A sessionmaker that creates the engines on its first session if startup has not"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            init_engines()
+        return super().__call__(**local_kw)
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
+_engines = None  # (primary, replica)
+_engines_urls = None  # The (primary, replica) URLs they were created from
+_engines_lock = threading.Lock()
+
+def init_engines(config: Optional[Settings] = None):
+    """Create the engines (and import their driver) once; the API calls this at startup, not at import.
+
+    Without ``config`` the existing engines are kept, or created from ``app.config.settings``.
+    With it, engines created from other URLs, e.g. lazily before startup, are replaced.
+    """
+    global _engines, _engines_urls
+    with _engines_lock:
+        if _engines is not None and (config is None or _engines_urls == (config.DATABASE_URL, config.DATABASE_REPLICA_URL)):
+            return _engines
+        config = config or settings
+        dispose_engines()
+        engine = create_engine(config.DATABASE_URL, **engine_options(config.DATABASE_URL, config=config))
+        # Reads that tolerate replication lag (feeds served from the database, saved lists) go to
+        # the replica when one is configured; everything else stays on the primary
+        if config.DATABASE_REPLICA_URL:
+            replica_engine = create_engine(config.DATABASE_REPLICA_URL, **engine_options(config.DATABASE_REPLICA_URL, config=config))
+        else:
+            replica_engine = engine
+        SessionLocal.configure(bind=engine)
+        ReadSessionLocal.configure(bind=replica_engine)
+        _engines = (engine, replica_engine)
+        _engines_urls = (config.DATABASE_URL, config.DATABASE_REPLICA_URL)
+    return _engines
+
+def dispose_engines():
+    """Close pooled connections at shutdown; the engines reconnect if used again"""
+    if _engines is not None:
+        engine, replica_engine = _engines
+        engine.dispose()
+        if replica_engine is not engine:
+            replica_engine.dispose()
+
+def __getattr__(name):
+    # ``from app.database import engine`` keeps working, creating the engines if needed
+    if name == "engine":
+        return init_engines()[0]
+    if name == "replica_engine":
+        return init_engines()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -13,3 +104,54 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def database_pool_stats() -> dict:
+    engine, replica_engine = init_engines()
+    stats = {"primary": pool_stats(engine.pool)}
+    if replica_engine is not engine:
+        stats["replica"] = pool_stats(replica_engine.pool)
+    if _async_sessionmaker is not None:
+        stats["async"] = pool_stats(_async_sessionmaker.kw["bind"].sync_engine.pool)
+    return stats
+
+
+def async_database_url(config: Settings = settings) -> str:
+    if config.ASYNC_DATABASE_URL:
+        return config.ASYNC_DATABASE_URL
+    scheme, _, rest = config.DATABASE_URL.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+_async_sessionmaker = None
+
+def get_async_sessionmaker(config: Settings = settings):
+    """Build the async engine on first use so the async driver is only needed in ASYNC_MODE"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        url = async_database_url(config)
+        async_engine = create_async_engine(url, **engine_options(url, is_async=True, config=config))
+        # Rows must stay loaded after commit: lazy refreshes cannot run outside the event loop
+        _async_sessionmaker = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+async def init_async_engine(config: Settings):
+    """Build the async engine from ``config`` at startup, replacing one built from another URL"""
+    if _async_sessionmaker is not None and _async_sessionmaker.kw["bind"].url != make_url(async_database_url(config)):
+        await dispose_async_engine()
+    return get_async_sessionmaker(config)
+
+async def dispose_async_engine():
+    global _async_sessionmaker
+    if _async_sessionmaker is not None:
+        await _async_sessionmaker.kw["bind"].dispose()
+        _async_sessionmaker = None
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,106 @@
+"""Feed query engine.
+
+A feed is the articles fetched for a query merged with every admin article,
+newest first. Pages are read with keyset pagination on ``(published_at, id)``
+so each page costs the same no matter how deep it is; ``offset`` paging is
+kept for older clients.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, tuple_, union
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.articles import normalize_query
+from app.models import Article, FeedEntry
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_token(data: dict) -> str:
+    """Opaque, URL-safe cursor token for a small JSON object"""
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if not isinstance(data, dict):
+        raise InvalidCursor("Invalid cursor")
+    return data
+
+
+@dataclass(frozen=True)
+class Cursor:
+    published_at: datetime
+    article_id: str
+    upstream_page: int = 1  # Next NewsAPI page to pull when the feed is backed by upstream
+
+    def encode(self) -> str:
+        return encode_token({"p": self.published_at.isoformat(), "i": self.article_id, "u": self.upstream_page})
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        data = decode_token(token)
+        try:
+            return cls(datetime.fromisoformat(data["p"]), str(data["i"]), int(data.get("u", 1)))
+        except (ValueError, KeyError, TypeError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+
+
+def _branch(id_column, published_column, where, cursor: Optional[Cursor], limit: int):
+    stmt = select(id_column.label("id"), published_column.label("published_at")).where(*where)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(published_column, id_column) < tuple_(cursor.published_at, cursor.article_id))
+    return stmt.order_by(published_column.desc(), id_column.desc()).limit(limit).subquery()
+
+
+def feed_page(
+    db: Session,
+    query: Optional[str],
+    limit: int,
+    cursor: Optional[Cursor] = None,
+    offset: int = 0,
+) -> Tuple[List[Row], bool]:
+    """Return one page of the feed, as rows of article columns, and whether another page follows.
+
+    With ``query=None`` the feed is every stored article.
+    """
+    # One extra row tells us whether there is a next page
+    window = offset + limit + 1
+
+    if query is None:
+        ids = _branch(Article.id, Article.published_at, [], cursor, window)
+    else:
+        entries = _branch(FeedEntry.article_id, FeedEntry.published_at,
+                          [FeedEntry.query == normalize_query(query)], cursor, window)
+        admin = _branch(Article.id, Article.published_at, [Article.source == "admin"], cursor, window)
+        # UNION rather than UNION ALL: an admin URL can also come back from upstream
+        ids = union(select(entries.c.id, entries.c.published_at), select(admin.c.id, admin.c.published_at)).subquery()
+
+    # Plain column rows rather than ORM instances: pages are only read and serialized
+    stmt = (
+        select(*Article.__table__.columns)
+        .join(ids, Article.id == ids.c.id)
+        .order_by(Article.published_at.desc(), Article.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    articles = list(db.execute(stmt))
+    return articles[:limit], len(articles) > limit
+
+
+def next_cursor(articles: List[Row], has_more: bool, upstream_page: int = 1) -> Optional[str]:
+    if not has_more or not articles:
+        return None
+    last = articles[-1]
+    return Cursor(last.published_at, last.id, upstream_page).encode()
@@ -0,0 +1,114 @@
+"""Password hashing on a dedicated process pool.
+
+bcrypt is CPU-bound, so running it in the request threadpool lets a login
+storm occupy every thread. Hashes run in worker processes instead, behind a
+bounded admission count: when it is full, callers are rejected immediately
+rather than queued behind the storm.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.pool import WaitHistogram
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_contexts = {}
+
+
+def _context(rounds: Optional[int] = None):
+    """passlib context for ``rounds`` (None: the default, for verifying); passlib is imported on first use"""
+    context = _contexts.get(rounds)
+    if context is None:
+        from passlib.context import CryptContext
+        options = {} if rounds is None else {"bcrypt__rounds": rounds}
+        context = _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", **options)
+    return context
+
+
+# These two run inside the worker processes
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return _context().verify(password, hashed)
+
+
+def bcrypt_rounds(hashed: str) -> Optional[int]:
+    """Cost factor of a ``$2b$<rounds>$...`` hash"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency = WaitHistogram(LATENCY_BUCKETS)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self.pending += 1
+        started = time.perf_counter()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify, password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return bcrypt_rounds(hashed) != self.rounds
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rounds": self.rounds,
+                "latency_seconds": self.latency.snapshot(),
+            }
@@ -0,0 +1,230 @@
+"""Materialized hot content: the featured article and the head of popular feeds.
+
+A background refresher rebuilds every snapshot each ``HOT_REFRESH_INTERVAL``
+seconds, or as soon as an admin publishes. It encodes each snapshot once,
+swaps the in-memory set in a single assignment, so requests never see a
+half-built refresh, then upserts the set into ``hot_snapshots`` so that new
+workers start warm. Feed snapshots keep each article's JSON separately, so
+any ``limit`` up to ``HOT_FEED_SIZE`` is served by joining bytes.
+
+Requests a snapshot cannot answer (other queries, larger limits) fall through
+to the live handlers. Invalidation is per process; other workers catch up on
+their next refresh.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, Response
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.articles import _upsert_insert, normalize_query
+from app.models import HotSnapshot
+from app.schemas import ArticleResponse, dump
+
+logger = logging.getLogger(__name__)
+
+FEATURED = "featured"
+
+
+def feed_key(query: str) -> str:
+    return f"feed:{normalize_query(query)}"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    items: Tuple[bytes, ...]  # One encoded article each
+    built_at: datetime
+
+
+class HotContent:
+    def __init__(self, queries: List[str], feed_size: int, interval: float, session_factory=SessionLocal):
+        self.queries = queries
+        self.feed_size = feed_size
+        self.interval = interval
+        self.session_factory = session_factory
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._generation = 0  # Bumped by invalidate(), so a refresh begun before it is not swapped in
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_refresh_seconds: Optional[float] = None
+        self.counters = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "persist_errors": 0,
+                         "invalidations": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _respond(self, snapshot: Snapshot, body: bytes) -> Response:
+        self._count("hits")
+        age = max(0, int((datetime.utcnow() - snapshot.built_at).total_seconds()))
+        return Response(body, media_type="application/json", headers={"Age": str(age)})
+
+    def featured(self) -> Optional[Response]:
+        """The featured article response, or None to build it live"""
+        snapshot = self._snapshots.get(FEATURED)
+        if snapshot is None:
+            self._count("misses")
+            return None
+        return self._respond(snapshot, snapshot.items[0])
+
+    def feed(self, query: str, limit: int) -> Optional[Response]:
+        """The first ``limit`` articles of ``query``'s feed, or None to build it live"""
+        snapshot = self._snapshots.get(feed_key(query))
+        # A short snapshot is the whole feed, so it answers any limit
+        if snapshot is None or (limit > len(snapshot.items) and len(snapshot.items) >= self.feed_size):
+            self._count("misses")
+            return None
+        return self._respond(snapshot, b"[" + b",".join(snapshot.items[:limit]) + b"]")
+
+    def build(self) -> Dict[str, Snapshot]:
+        """Build every snapshot.
+
+        While NewsAPI is down a snapshot keeps its previous version, or is left out so that
+        the live route answers with its X-News-Stale header.
+        """
+        # The news routes import this module, so import them here
+        from app.routes import news
+
+        previous = self._snapshots
+        snapshots = {}
+
+        def put(key: str, items: Tuple[bytes, ...], stale: Optional[str]) -> None:
+            if not stale:
+                snapshots[key] = Snapshot(items, datetime.utcnow())
+            elif key in previous:
+                snapshots[key] = previous[key]
+
+        db = self.session_factory()
+        try:
+            try:
+                featured, stale = news.featured_article(db)
+                put(FEATURED, (dump(ArticleResponse, featured),), stale)
+            except HTTPException:
+                pass  # Nothing to feature yet
+            for query in self.queries:
+                rows, _, stale = news.build_feed(db, query, self.feed_size)
+                put(feed_key(query), tuple(dump(ArticleResponse, row) for row in rows), stale)
+        finally:
+            db.close()
+        return snapshots
+
+    def refresh(self) -> None:
+        started = time.perf_counter()
+        generation = self._generation
+        snapshots = self.build()
+        with self._lock:
+            if generation != self._generation:
+                return  # Built from data that has since changed; the woken refresher builds again
+            self._snapshots = snapshots
+        self.last_refresh_seconds = time.perf_counter() - started
+        self._count("refreshes")
+        # Only for workers yet to start, so a failure keeps the swapped-in build
+        try:
+            self._persist(snapshots)
+        except SQLAlchemyError as exc:
+            self._count("persist_errors")
+            logger.warning("Could not persist hot content snapshots: %s", exc)
+
+    def _persist(self, snapshots: Dict[str, Snapshot]) -> None:
+        """Write each snapshot over its row; other workers may be persisting at the same time"""
+        rows = [
+            {"key": key, "body": b"[" + b",".join(snapshot.items) + b"]", "built_at": snapshot.built_at}
+            for key, snapshot in snapshots.items()
+        ]
+        db = self.session_factory()
+        try:
+            db.execute(delete(HotSnapshot).where(HotSnapshot.key.not_in(list(snapshots))))
+            dialect_insert = _upsert_insert(db)
+            if dialect_insert is None:
+                for row in rows:
+                    db.merge(HotSnapshot(**row))
+            elif rows:
+                stmt = dialect_insert(HotSnapshot).values(rows)
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={"body": stmt.excluded.body, "built_at": stmt.excluded.built_at},
+                    # A slower worker does not overwrite a newer build
+                    where=HotSnapshot.built_at <= stmt.excluded.built_at,
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def load(self) -> int:
+        """Start from the persisted snapshots; returns how many were loaded"""
+        db = self.session_factory()
+        try:
+            rows = db.execute(select(HotSnapshot.key, HotSnapshot.body, HotSnapshot.built_at)).all()
+        except SQLAlchemyError as exc:
+            # e.g. migration 0005 not applied yet: start cold
+            logger.warning("Could not load hot content snapshots: %s", exc)
+            return 0
+        finally:
+            db.close()
+        self._snapshots = {
+            key: Snapshot(tuple(orjson.dumps(item) for item in orjson.loads(body)), built_at)
+            for key, body, built_at in rows
+        }
+        return len(rows)
+
+    def invalidate(self) -> None:
+        """Stop serving snapshots and rebuild them now, e.g. after an article is published"""
+        with self._lock:
+            self._generation += 1
+            self._snapshots = {}
+        self._count("invalidations")
+        self._wake.set()
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as exc:
+                self._count("refresh_errors")
+                logger.warning("Hot content refresh failed: %s", exc)
+            self._wake.wait(self.interval)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="hot-content", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        served = counters["hits"] + counters["misses"]
+        now = datetime.utcnow()
+        return dict(
+            counters,
+            hit_rate=counters["hits"] / served if served else None,
+            last_refresh_seconds=self.last_refresh_seconds,
+            snapshots={
+                key: {"age_seconds": (now - snapshot.built_at).total_seconds(), "items": len(snapshot.items)}
+                for key, snapshot in self._snapshots.items()
+            },
+        )
+
+
+hot_content = HotContent(
+    [query.strip() for query in settings.HOT_FEED_QUERIES.split(",") if query.strip()],
+    feed_size=settings.HOT_FEED_SIZE,
+    interval=settings.HOT_REFRESH_INTERVAL,
+)
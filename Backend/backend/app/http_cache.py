@@ -0,0 +1,270 @@
+"""HTTP caching for read endpoints: ETags, conditional GET and rendered responses.
+
+Each cached route has a policy:
+
+- ``version``: a cheap query that identifies the current state of the data
+  behind the route (e.g. a user's saved-item count and newest timestamp). The
+  ETag is derived from it before the handler runs, so a matching
+  ``If-None-Match`` is answered with 304 without querying or serializing the
+  full response; only for a token whose user still exists, as the route's
+  auth would check.
+- ``shared``: the rendered bytes are kept for ``HTTP_RESPONSE_CACHE_TTL``
+  seconds and served to every caller; these routes also honour
+  ``If-Modified-Since``.
+- Otherwise the ETag is a hash of the response body, which still saves the
+  transfer when the client already has it.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.cache import CacheEntry, MemoryCache
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.models import Article, Favorite, WatchLater
+from app.security import _user_id_from_token, auth_cache, principal_for_token
+from app.upstream import STALE_HEADER
+
+VersionFn = Callable[[Session, str], str]
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    cache_control: str
+    version: Optional[VersionFn] = None  # Needs the caller's user id, so implies a private response
+    shared: bool = False
+
+
+@dataclass(frozen=True)
+class RenderedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    last_modified: str
+
+
+def _saved_version(model) -> VersionFn:
+    def version(db: Session, user_id: str) -> str:
+        # Served by the (user_id, created_at) index; adds move the max, removals the count. Any admin
+        # edit moves the latest updated_at (one index lookup), which may be an article on this list
+        edited = select(func.max(Article.updated_at)).scalar_subquery()
+        latest, count, edited = db.execute(
+            select(func.max(model.created_at), func.count(), edited).where(model.user_id == user_id)
+        ).one()
+        return f"{count}:{latest.isoformat() if latest else ''}:{edited.isoformat() if edited else ''}"
+    return version
+
+
+def _public() -> CachePolicy:
+    return CachePolicy(f"public, max-age={settings.HTTP_PUBLIC_MAX_AGE}", shared=True)
+
+
+def default_policies() -> Dict[str, CachePolicy]:
+    return {
+        "/api/news/": _public(),
+        "/api/news/featured": _public(),
+        "/api/news/search": _public(),
+        # Authenticated, so never stored by shared caches
+        "/api/news/combined": CachePolicy("private, no-cache"),
+        "/api/favorites/": CachePolicy("private, no-cache", version=_saved_version(Favorite)),
+        "/api/watchlater/": CachePolicy("private, no-cache", version=_saved_version(WatchLater)),
+    }
+
+
+def _etag(*parts: bytes) -> str:
+    digest = hashlib.blake2b(b"\0".join(parts), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: str) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def _bearer_token(headers: Headers) -> Optional[str]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+def _user_id(headers: Headers) -> Optional[str]:
+    """The bearer token's user id, or None to let the route's own auth answer; the user may no longer exist"""
+    token = _bearer_token(headers)
+    if token is None:
+        return None
+    principal = auth_cache.get(token)
+    if principal is not None:
+        return principal.id
+    try:
+        return _user_id_from_token(token)
+    except HTTPException:
+        return None
+
+
+class HTTPCache:
+    """Rendered-response store and counters shared by the middleware and admin stats"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.store = MemoryCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.counters = {"not_modified": 0, "rendered_hits": 0, "rendered_stores": 0, "full_responses": 0}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key: str) -> Optional[RenderedResponse]:
+        if self.ttl <= 0:
+            return None
+        entry = self.store.get(key)
+        if entry is None or not entry.is_fresh(time.time()):
+            return None
+        return entry.value
+
+    def put(self, key: str, rendered: RenderedResponse) -> None:
+        if self.ttl > 0:
+            self.store.set(key, CacheEntry(value=rendered, stored_at=time.time(), ttl=self.ttl, stale_ttl=0))
+            self.count("rendered_stores")
+
+    def invalidate(self) -> None:
+        """Drop every rendered response, e.g. after an article is published"""
+        self.store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, rendered_entries=len(self.store))
+
+
+http_cache = HTTPCache(ttl=settings.HTTP_RESPONSE_CACHE_TTL, max_entries=settings.HTTP_RESPONSE_CACHE_MAX_ENTRIES)
+
+
+class HTTPCacheMiddleware:
+    """ASGI middleware applying a CachePolicy to GET requests on the configured paths"""
+
+    def __init__(self, app, policies: Optional[Dict[str, CachePolicy]] = None, cache: HTTPCache = http_cache):
+        self.app = app
+        self.policies = default_policies() if policies is None else policies
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        policy = self.policies.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if_none_match = headers.get("if-none-match")
+        cache_key = scope["path"] + "?" + scope["query_string"].decode("latin-1")
+
+        if policy.shared:
+            rendered = self.cache.get(cache_key)
+            if rendered is not None:
+                if _matches(if_none_match, rendered.etag) or (
+                    if_none_match is None and _not_modified_since(headers.get("if-modified-since"), rendered.last_modified)
+                ):
+                    await self._not_modified(send, policy, rendered.etag, rendered.last_modified)
+                else:
+                    self.cache.count("rendered_hits")
+                    await self._send(send, rendered.status, rendered.headers, rendered.body)
+                return
+
+        etag = None
+        if policy.version is not None:
+            token = _bearer_token(headers)
+            versioned = await run_in_threadpool(self._read_version, policy.version, token) if token else None
+            if versioned is not None:
+                user_id, version = versioned
+                etag = _etag(cache_key.encode(), user_id.encode(), version.encode())
+                if _matches(if_none_match, etag):
+                    await self._not_modified(send, policy, etag)
+                    return
+
+        status, response_headers, body = await self._render(scope, receive)
+        if status != 200:
+            await self._send(send, status, response_headers, body)
+            return
+
+        if Headers(raw=response_headers).get(STALE_HEADER):
+            # Served from storage while NewsAPI is down: don't let anyone keep it
+            policy = replace(policy, cache_control="no-cache", shared=False)
+
+        etag = etag or _etag(body)
+        last_modified = format_datetime(datetime.now(timezone.utc), usegmt=True)
+        response_headers = self._with_cache_headers(response_headers, policy, etag, last_modified if policy.shared else None)
+        if policy.shared:
+            self.cache.put(cache_key, RenderedResponse(status, response_headers, body, etag, last_modified))
+        if _matches(if_none_match, etag):
+            await self._not_modified(send, policy, etag, last_modified if policy.shared else None)
+            return
+        self.cache.count("full_responses")
+        await self._send(send, status, response_headers, body)
+
+    @staticmethod
+    def _read_version(version: VersionFn, token: str) -> Optional[Tuple[str, str]]:
+        """``(user id, version)`` for a token verify_principal would accept, else None to let the route answer"""
+        db = ReadSessionLocal()
+        try:
+            try:
+                principal = principal_for_token(db, token)
+            except HTTPException:
+                return None
+            return principal.id, version(db, principal.id)
+        finally:
+            db.close()
+
+    async def _render(self, scope, receive) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        return start["status"], list(start.get("headers", [])), b"".join(chunks)
+
+    @staticmethod
+    def _with_cache_headers(raw_headers, policy: CachePolicy, etag: str, last_modified: Optional[str]):
+        headers = MutableHeaders(raw=list(raw_headers))
+        headers["ETag"] = etag
+        headers["Cache-Control"] = policy.cache_control
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        if not policy.shared:
+            headers.append("Vary", "Authorization")
+        return headers.raw
+
+    async def _not_modified(self, send, policy: CachePolicy, etag: str, last_modified: Optional[str] = None) -> None:
+        self.cache.count("not_modified")
+        headers = self._with_cache_headers([], policy, etag, last_modified)
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _send(send, status: int, headers, body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,165 @@
+"""Scheduled NewsAPI ingestion.
+
+Polls a configured set of queries on their own intervals and stores the results
+in the ``articles`` table, so the news endpoints can be served from the database
+instead of calling NewsAPI on the request path.
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from app import newsapi
+from app.articles import upsert_articles
+from app.config import Settings, settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestQuery:
+    query: str
+    interval: float
+    page_size: int = 50
+
+
+@dataclass
+class QueryState:
+    next_run: float = 0.0
+    last_run: Optional[float] = None
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+    runs: int = 0
+    articles_seen: int = 0
+    errors: int = 0
+
+
+def parse_ingest_queries(raw: str, default_interval: float, page_size: int = 50) -> List[IngestQuery]:
+    """Parse ``"technology:300,breaking:60,science"`` into IngestQuery entries"""
+    queries = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        query, _, interval = item.partition(":")
+        queries.append(IngestQuery(query=query.strip(), interval=float(interval) if interval else default_interval, page_size=page_size))
+    return queries
+
+
+class IngestWorker:
+    def __init__(
+        self,
+        queries: List[IngestQuery],
+        session_factory=SessionLocal,
+        http=requests,
+        base_url: str = settings.NEWSAPI_BASE_URL,
+        api_key: str = settings.NEWSAPI_KEY,
+        jitter: float = 0.1,
+        max_backoff: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.queries = queries
+        self.session_factory = session_factory
+        self.http = http
+        self.base_url = base_url
+        self.api_key = api_key
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.state: Dict[str, QueryState] = {q.query: QueryState() for q in queries}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _delay(self, item: IngestQuery, failures: int) -> float:
+        delay = item.interval * (2 ** failures) if failures else item.interval
+        delay = min(delay, max(self.max_backoff, item.interval))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def ingest(self, item: IngestQuery) -> int:
+        """Fetch one query and store its articles; returns the number of articles seen"""
+        params = newsapi.build_params(item.query, item.page_size, 1, self.api_key)
+        payloads = newsapi.request_articles(params, http=self.http, base_url=self.base_url)
+        db = self.session_factory()
+        try:
+            return len(upsert_articles(db, payloads, query=item.query))
+        finally:
+            db.close()
+
+    def run_once(self, force: bool = False) -> int:
+        """Run every query that is due (or all of them when ``force``); returns how many ran"""
+        ran = 0
+        for item in self.queries:
+            state = self.state[item.query]
+            now = self.clock()
+            if not force and now < state.next_run:
+                continue
+            ran += 1
+            state.last_run = now
+            state.runs += 1
+            try:
+                seen = self.ingest(item)
+            except Exception as exc:
+                state.errors += 1
+                state.consecutive_failures += 1
+                state.last_error = str(exc)
+                logger.warning("Ingest of %r failed (%d in a row): %s", item.query, state.consecutive_failures, exc)
+            else:
+                state.articles_seen += seen
+                state.consecutive_failures = 0
+                state.last_error = None
+                state.last_success = self.clock()
+                logger.info("Ingested %d articles for %r", seen, item.query)
+            state.next_run = now + self._delay(item, state.consecutive_failures)
+        return ran
+
+    def seconds_until_next_run(self) -> float:
+        if not self.queries:
+            return 60.0
+        return max(0.0, min(s.next_run for s in self.state.values()) - self.clock())
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(min(self.seconds_until_next_run(), 60.0))
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="news-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def metrics(self) -> Dict[str, dict]:
+        """Per-query last-run and lag figures; lag is seconds since the last successful run"""
+        now = self.clock()
+        return {
+            query: {
+                "last_run": state.last_run,
+                "last_success": state.last_success,
+                "lag_seconds": now - state.last_success if state.last_success else None,
+                "next_run_in": max(0.0, state.next_run - now),
+                "consecutive_failures": state.consecutive_failures,
+                "last_error": state.last_error,
+                "runs": state.runs,
+                "errors": state.errors,
+                "articles_seen": state.articles_seen,
+            }
+            for query, state in self.state.items()
+        }
+
+
+def build_worker(config: Settings = settings, **kwargs) -> IngestWorker:
+    queries = parse_ingest_queries(config.INGEST_QUERIES, config.INGEST_INTERVAL, config.INGEST_PAGE_SIZE)
+    kwargs.setdefault("base_url", config.NEWSAPI_BASE_URL)
+    kwargs.setdefault("api_key", config.NEWSAPI_KEY)
+    return IngestWorker(queries, jitter=config.INGEST_JITTER, max_backoff=config.INGEST_MAX_BACKOFF, **kwargs)
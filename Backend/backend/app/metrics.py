@@ -0,0 +1,348 @@
+"""Request-level performance instrumentation, exported at /metrics.
+
+With METRICS_ENABLED:
+
+- MetricsMiddleware records a latency histogram per route template, method and
+  status, cache hits answered by HTTPCacheMiddleware included;
+- SQLAlchemy cursor events count the queries and database time of the request
+  being served (the request's context variable reaches the threadpool and
+  ``run_sync``). A request that runs one statement
+  ``METRICS_N_PLUS_ONE_THRESHOLD`` times or more is counted as a likely N+1
+  and logged once per route and statement;
+- NewsAPI attempts and response serialization are timed.
+
+``/metrics`` renders these, and the pool, hashing, cache, upstream and hot
+content stats, in the Prometheus text format. ``METRICS_SERVER_TIMING`` adds a
+``Server-Timing`` header with the request's breakdown (debug only: it tells
+clients how long queries take).
+
+When disabled no middleware or event listener is installed, and the hooks left
+on the request path return after reading one context variable.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+
+from app.config import settings
+from app.pool import WaitHistogram
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestTimings:
+    """What one request spent, filled in by the hooks while it runs"""
+
+    __slots__ = ("db_queries", "db_seconds", "upstream_calls", "upstream_seconds", "serialize_seconds", "statements")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'upstream;dur={self.upstream_seconds * 1000:.1f};desc="{self.upstream_calls} calls"',
+            f"serialize;dur={self.serialize_seconds * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def observe_serialize(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.serialize_seconds += seconds
+
+
+class RequestMetrics:
+    def __init__(self, n_plus_one_threshold: int):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.installed = False
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str, str], WaitHistogram] = {}  # (method, route, status)
+        self.queries: Dict[str, WaitHistogram] = {}  # Queries per request, by route
+        self.db_seconds: Dict[str, float] = {}
+        self.n_plus_one: Dict[str, int] = {}
+        self.upstream: Dict[str, WaitHistogram] = {}  # By outcome
+        self.serialize = WaitHistogram(LATENCY_BUCKETS)
+        self._reported = set()
+
+    def families(self) -> tuple:
+        """Copies of the per-label families, safe to iterate while requests add labels"""
+        with self._lock:
+            return dict(self.latency), dict(self.queries), dict(self.db_seconds), dict(self.n_plus_one), dict(self.upstream)
+
+    def install(self) -> None:
+        """Start counting queries; the listeners apply to every engine, async ones included"""
+        with self._lock:
+            if not self.installed:
+                event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+                self.installed = True
+
+    def _histogram(self, family: dict, key, buckets=LATENCY_BUCKETS) -> WaitHistogram:
+        histogram = family.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = family.setdefault(key, WaitHistogram(buckets))
+        return histogram
+
+    def observe_upstream(self, seconds: float, ok: bool) -> None:
+        """One NewsAPI attempt, timed by UpstreamClient"""
+        timings = _current.get()
+        if timings is not None:
+            timings.upstream_calls += 1
+            timings.upstream_seconds += seconds
+        if self.installed:
+            self._histogram(self.upstream, "ok" if ok else "error").observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, timings: RequestTimings) -> None:
+        self._histogram(self.latency, (method, route, str(status))).observe(seconds)
+        self._histogram(self.queries, route, QUERY_COUNT_BUCKETS).observe(timings.db_queries)
+        if timings.serialize_seconds:
+            self.serialize.observe(timings.serialize_seconds)
+        repeated = timings.statements.most_common(1)
+        with self._lock:
+            self.db_seconds[route] = self.db_seconds.get(route, 0.0) + timings.db_seconds
+            if not repeated or repeated[0][1] < self.n_plus_one_threshold:
+                return
+            self.n_plus_one[route] = self.n_plus_one.get(route, 0) + 1
+            statement, count = repeated[0]
+            first_report = (route, statement) not in self._reported
+            self._reported.add((route, statement))
+        if first_report:
+            logger.warning("Possible N+1 on %s %s: statement ran %d times in one request: %s",
+                           method, route, count, " ".join(statement.split())[:300])
+
+
+request_metrics = RequestMetrics(settings.METRICS_N_PLUS_ONE_THRESHOLD)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the statement's context, which is dropped with it: after_cursor_execute does not run for a failed statement
+    if _current.get() is not None and context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    if timings is None:
+        return
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        timings.db_seconds += time.perf_counter() - started
+    timings.db_queries += 1
+    timings.statements[statement] += 1
+
+
+def route_name(scope) -> str:
+    """The matched route's path template, so that labels stay bounded"""
+    route = scope.get("route")
+    if route is None:
+        # Answered before routing (HTTP cache hits), or not found
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request and collecting its RequestTimings; add it outermost"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics, server_timing: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.metrics.observe_request(scope["method"], route_name(scope), status, time.perf_counter() - started, timings)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Exposition:
+    """Prometheus text format writer"""
+
+    def __init__(self, prefix: str = "buzznews_"):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> str:
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def sample(self, name: str, value, labels: Optional[Dict[str, str]] = None) -> None:
+        if value is None:
+            return
+        label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in (labels or {}).items())
+        self.lines.append(f"{name}{{{label_text}}} {float(value)!r}" if label_text else f"{name} {float(value)!r}")
+
+    def histogram(self, name: str, snapshot: dict, labels: Optional[Dict[str, str]] = None) -> None:
+        """One WaitHistogram.snapshot(), whose buckets are already cumulative"""
+        labels = labels or {}
+        for bound, count in snapshot["buckets"].items():
+            self.sample(f"{name}_bucket", count, dict(labels, le=bound))
+        self.sample(f"{name}_sum", snapshot["sum"], labels)
+        self.sample(f"{name}_count", snapshot["count"], labels)
+
+    def counters(self, name: str, help_text: str, counters: Dict[str, int], labels: Optional[Dict[str, str]] = None) -> None:
+        name = self.family(name, "counter", help_text)
+        for key, value in counters.items():
+            self.sample(name, value, dict(labels or {}, event=key))
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _request_families(out: Exposition, metrics: RequestMetrics) -> None:
+    latency, queries, db_seconds, n_plus_one, upstream = metrics.families()
+    name = out.family("http_request_duration_seconds", "histogram", "Request latency by route template")
+    for (method, route, status), histogram in sorted(latency.items()):
+        out.histogram(name, histogram.snapshot(), {"method": method, "route": route, "status": status})
+    name = out.family("db_queries_per_request", "histogram", "Database queries run by one request")
+    for route, histogram in sorted(queries.items()):
+        out.histogram(name, histogram.snapshot(), {"route": route})
+    name = out.family("db_seconds_total", "counter", "Time spent in database queries")
+    for route, seconds in sorted(db_seconds.items()):
+        out.sample(name, seconds, {"route": route})
+    name = out.family("n_plus_one_requests_total", "counter", "Requests that repeated one statement past the threshold")
+    for route, count in sorted(n_plus_one.items()):
+        out.sample(name, count, {"route": route})
+    name = out.family("upstream_request_duration_seconds", "histogram", "NewsAPI attempt latency")
+    for outcome, histogram in sorted(upstream.items()):
+        out.histogram(name, histogram.snapshot(), {"outcome": outcome})
+    name = out.family("serialize_seconds", "histogram", "Response serialization time per request")
+    out.histogram(name, metrics.serialize.snapshot())
+
+
+def _component_families(out: Exposition) -> None:
+    # Imported here: these import the routes' dependencies, which import this module
+    from app.cache import newsapi_cache
+    from app.database import database_pool_stats
+    from app.hot import hot_content
+    from app.http_cache import http_cache
+    from app.ratelimit import rate_limiter
+    from app.retention import archiver
+    from app.security import auth_cache, password_hasher
+    from app.stream import broker
+    from app.upstream import newsapi_client
+
+    pools = database_pool_stats()
+    for field, name, kind, help_text in (
+        ("checked_out", "db_pool_checked_out", "gauge", "Connections in use"),
+        ("overflow", "db_pool_overflow", "gauge", "Connections open beyond the pool size"),
+        ("size", "db_pool_size", "gauge", "Configured pool size"),
+        ("timeouts", "db_pool_timeouts_total", "counter", "Checkouts that timed out"),
+    ):
+        name = out.family(name, kind, help_text)
+        for pool, stats in pools.items():
+            out.sample(name, stats.get(field), {"pool": pool})
+    name = out.family("db_pool_wait_seconds", "histogram", "Connection checkout wait")
+    for pool, stats in pools.items():
+        if "wait_seconds" in stats:
+            out.histogram(name, stats["wait_seconds"], {"pool": pool})
+
+    hashing = password_hasher.stats()
+    out.sample(out.family("hashing_queue_depth", "gauge", "Password hashes in flight"), hashing["queue_depth"])
+    out.counters("hashing_total", "Password hashes completed and rejected",
+                 {"completed": hashing["completed"], "rejected": hashing["rejected"]})
+    out.histogram(out.family("hashing_duration_seconds", "histogram", "Password hash latency"), hashing["latency_seconds"])
+
+    http = http_cache.stats()
+    out.sample(out.family("http_cache_entries", "gauge", "Rendered responses held"), http.pop("rendered_entries"))
+    out.counters("http_cache_total", "Conditional GET and rendered cache outcomes", http)
+
+    auth = auth_cache.stats()
+    out.sample(out.family("auth_cache_entries", "gauge", "Cached principals"), auth.pop("size"))
+    out.counters("auth_cache_total", "Token lookups by outcome", auth)
+    out.counters("newsapi_cache_total", "NewsAPI response cache outcomes", newsapi_cache.stats())
+
+    upstream = newsapi_client.stats()
+    breaker = upstream.pop("breaker")
+    out.counters("upstream_total", "NewsAPI calls by outcome", upstream)
+    name = out.family("upstream_breaker_state", "gauge", "1 for the circuit breaker's current state")
+    for state in ("closed", "open", "half-open"):
+        out.sample(name, int(breaker["state"] == state), {"state": state})
+    out.counters("upstream_breaker_total", "Circuit breaker transitions and rejections",
+                 {key: breaker[key] for key in ("opened", "rejected", "probes")})
+
+    hot = hot_content.stats()
+    out.counters("hot_content_total", "Hot content hits, misses and refreshes",
+                 {key: value for key, value in hot.items() if isinstance(value, int)})
+    name = out.family("hot_content_age_seconds", "gauge", "Age of each hot content snapshot")
+    for key, snapshot in sorted(hot["snapshots"].items()):
+        out.sample(name, snapshot["age_seconds"], {"key": key})
+
+    limits = rate_limiter.stats()
+    name = out.family("rate_limit_requests_total", "counter", "Requests to rate limited routes by policy and outcome")
+    for path, counts in sorted(limits["policies"].items()):
+        for outcome, count in counts.items():
+            out.sample(name, count, {"policy": path, "outcome": outcome})
+    if "tracked_keys" in limits:
+        out.sample(out.family("rate_limit_tracked_keys", "gauge", "Clients with a bucket in this process"), limits["tracked_keys"])
+
+    stream = broker.stats()
+    for field, name, kind, help_text in (
+        ("subscribers", "stream_subscribers", "gauge", "Open article streams"),
+        ("queued_events", "stream_queued_events", "gauge", "Events waiting in stream buffers"),
+        ("published", "stream_published_total", "counter", "Article events fanned out"),
+        ("dropped", "stream_dropped_total", "counter", "Streams dropped for falling behind"),
+        ("rejected", "stream_rejected_total", "counter", "Streams refused at the subscriber limit"),
+    ):
+        out.sample(out.family(name, kind, help_text), stream[field])
+
+    retention = archiver.stats()
+    out.counters("retention_total", "Retention runs and batches, archived articles and rolled back batches",
+                 {key: retention[key] for key in ("runs", "errors", "batches", "archived", "conflicts", "expired")})
+    out.counters("retention_bytes_total", "Estimated bytes removed from articles and compressed bytes archived",
+                 {"reclaimed": retention["row_bytes"], "archived": retention["archive_bytes"]})
+
+
+def exposition(metrics: RequestMetrics = request_metrics) -> str:
+    out = Exposition()
+    _request_families(out, metrics)
+    _component_families(out)
+    return out.render()
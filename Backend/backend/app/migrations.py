@@ -0,0 +1,108 @@
+"""Schema migrations.
+
+Each migration runs once, in order, inside its own transaction and is recorded
+in ``schema_migrations``. Add new steps to the end of ``MIGRATIONS``; never
+edit or reorder ones that may already have run somewhere.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import Base
+from app.retention import create_archive_table
+from app.search import create_search_index
+# Register every model on Base.metadata
+from app import models  # noqa: F401
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _create_indexes(conn: Connection, table_name: str, *names: str) -> None:
+    indexes = {index.name: index for index in Base.metadata.tables[table_name].indexes}
+    for name in names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+
+def _dedupe(conn: Connection, table: Table) -> None:
+    """Keep one row per (user_id, article_id) so the unique index can be built"""
+    keep = select(func.min(table.c.id)).group_by(table.c.user_id, table.c.article_id)
+    conn.execute(delete(table).where(table.c.id.not_in(keep)))
+
+
+def _initial(conn: Connection) -> None:
+    # Fresh databases get every table and index here; existing ones only gain missing tables
+    Base.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _feed_indexes(conn: Connection) -> None:
+    _create_indexes(conn, "articles", "ix_articles_published_at_id", "ix_articles_source_published_at")
+    _create_indexes(conn, "feed_entries", "ix_feed_entries_query_published_at")
+
+
+def _saved_item_indexes(conn: Connection) -> None:
+    for table in ("favorites", "watch_later"):
+        _dedupe(conn, Base.metadata.tables[table])
+        _create_indexes(conn, table, f"uq_{table}_user_article", f"ix_{table}_user_created_at", f"ix_{table}_article_id")
+
+
+def _article_search(conn: Connection) -> None:
+    create_search_index(conn)
+
+
+def _hot_snapshots(conn: Connection) -> None:
+    Base.metadata.tables["hot_snapshots"].create(bind=conn, checkfirst=True)
+
+
+def _article_admin_columns(conn: Connection) -> None:
+    # Databases created by 0001 after this column was added to the model already have it
+    if "updated_at" not in {column["name"] for column in inspect(conn).get_columns("articles")}:
+        conn.execute(text(f"ALTER TABLE articles ADD COLUMN updated_at {DateTime().compile(dialect=conn.dialect)}"))
+    _create_indexes(conn, "articles", "ix_articles_author_published_at", "ix_articles_updated_at")
+
+
+def _article_stream_index(conn: Connection) -> None:
+    _create_indexes(conn, "articles", "ix_articles_created_at_id")
+
+
+def _article_archive(conn: Connection) -> None:
+    create_archive_table(conn)
+
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_initial", _initial),
+    ("0002_feed_indexes", _feed_indexes),
+    ("0003_saved_item_indexes", _saved_item_indexes),
+    ("0004_article_search", _article_search),
+    ("0005_hot_snapshots", _hot_snapshots),
+    ("0006_article_admin_columns", _article_admin_columns),
+    ("0007_article_stream_index", _article_stream_index),
+    ("0008_article_archive", _article_archive),
+]
+
+
+def applied_versions(engine: Engine) -> List[str]:
+    with engine.begin() as conn:
+        schema_migrations.create(bind=conn, checkfirst=True)
+        return list(conn.scalars(select(schema_migrations.c.version).order_by(schema_migrations.c.version)))
+
+
+def migrate(engine: Engine) -> List[str]:
+    """Apply every pending migration and return the versions that ran"""
+    done = set(applied_versions(engine))
+    ran = []
+    for version, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(version=version, applied_at=datetime.utcnow()))
+        ran.append(version)
+    return ran
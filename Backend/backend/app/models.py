@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -32,12 +32,36 @@ class Article(Base):
     url = Column(String, unique=True)
     published_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow)  # Set by admin edits only
 
     # Relationships
     author = relationship("User", back_populates="articles")
     favorites = relationship("Favorite", back_populates="article", cascade="all, delete-orphan")
     watch_later = relationship("WatchLater", back_populates="article", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination over the whole feed and over admin articles
+        Index("ix_articles_published_at_id", published_at.desc(), id.desc()),
+        Index("ix_articles_source_published_at", source, published_at.desc(), id.desc()),
+        # Admin listing filtered by author; the latest edit, which versions saved-list ETags
+        Index("ix_articles_author_published_at", author_id, published_at.desc(), id.desc()),
+        Index("ix_articles_updated_at", updated_at),
+        # Article stream: resuming after the last event a client received, and polling for new rows
+        Index("ix_articles_created_at_id", created_at, id),
+    )
+
+class FeedEntry(Base):
+    """Which upstream query an article was fetched for, so feeds can be paged in SQL"""
+    __tablename__ = "feed_entries"
+
+    query = Column(String, primary_key=True)
+    article_id = Column(String, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    published_at = Column(DateTime, nullable=False)  # Copied from the article for index ordering
+
+    __table_args__ = (
+        Index("ix_feed_entries_query_published_at", query, published_at.desc(), article_id.desc()),
+    )
+
 class Favorite(Base):
     __tablename__ = "favorites"
 
@@ -50,6 +74,14 @@ class Favorite(Base):
     user = relationship("User", back_populates="favorites")
     article = relationship("Article", back_populates="favorites")
 
+    __table_args__ = (
+        # One row per saved article; also serves lookups by user_id
+        Index("uq_favorites_user_article", user_id, article_id, unique=True),
+        Index("ix_favorites_user_created_at", user_id, created_at.desc()),
+        # Cascading deletes from articles look rows up by article_id
+        Index("ix_favorites_article_id", article_id),
+    )
+
 class WatchLater(Base):
     __tablename__ = "watch_later"
 
@@ -61,3 +93,19 @@ class WatchLater(Base):
     # Relationships
     user = relationship("User", back_populates="watch_later")
     article = relationship("Article", back_populates="watch_later")
+
+    __table_args__ = (
+        # One row per saved article; also serves lookups by user_id
+        Index("uq_watch_later_user_article", user_id, article_id, unique=True),
+        Index("ix_watch_later_user_created_at", user_id, created_at.desc()),
+        # Cascading deletes from articles look rows up by article_id
+        Index("ix_watch_later_article_id", article_id),
+    )
+
+class HotSnapshot(Base):
+    """Pre-serialized featured article and feed heads, persisted so new workers start warm"""
+    __tablename__ = "hot_snapshots"
+
+    key = Column(String, primary_key=True)
+    body = Column(LargeBinary, nullable=False)  # JSON
+    built_at = Column(DateTime, nullable=False)
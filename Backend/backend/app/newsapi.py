@@ -0,0 +1,107 @@
+"""Thin client for the NewsAPI `everything` endpoint"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+
+
+class NewsAPIError(Exception):
+    def __init__(self, message: str = "", status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        # Timeouts and connection errors have no status
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error(exc: Exception) -> NewsAPIError:
+    # The request URL carries the API key, so keep it out of the message
+    response = getattr(exc, "response", None)
+    if response is None:
+        return NewsAPIError(type(exc).__name__)
+    return NewsAPIError(
+        f"{type(exc).__name__} ({response.status_code})",
+        status_code=response.status_code,
+        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+    )
+
+
+def build_params(query: str, limit: int, page: int, api_key: str) -> dict:
+    return {
+        "q": query,
+        "sortBy": "publishedAt",
+        "language": "en",
+        "pageSize": limit,
+        "page": page,
+        "apiKey": api_key
+    }
+
+
+def request_articles(params: dict, http=None, base_url: str = NEWSAPI_URL, timeout: float = 10) -> List[dict]:
+    """Fetch one page of articles; ``http`` can be any object with a requests-style ``get`` (default: requests)"""
+    # Imported on first call: the async request path never needs it
+    import requests
+    http = http or requests
+    try:
+        response = http.get(base_url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("articles", [])
+    except requests.exceptions.RequestException as exc:
+        raise _error(exc) from exc
+
+
+_async_client = None
+
+
+def open_async_client(max_connections: int = 50, max_keepalive: int = 20):
+    """Create the shared keep-alive client used by the async request path"""
+    global _async_client
+    import httpx
+    _async_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        timeout=10,
+    )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def request_articles_async(params: dict, client=None, base_url: str = NEWSAPI_URL,
+                                 timeout: Optional[float] = None) -> List[dict]:
+    import httpx
+    client = client or _async_client
+    if client is None:
+        raise RuntimeError("Async NewsAPI client is not open")
+    try:
+        # Omitting timeout keeps the client's default; passing None would disable it
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        response = await client.get(base_url, params=params, **kwargs)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("articles", [])
+    except (httpx.HTTPError, ValueError) as exc:
+        raise _error(exc) from exc
@@ -0,0 +1,258 @@
+"""Per-client rate limiting of selected routes.
+
+Each policy in ``RATE_LIMIT_POLICIES`` gives a path (or a ``*``-terminated
+prefix) a budget of ``limit`` requests per ``window`` seconds, drawn by the
+bearer token's user (falling back to the client IP for anonymous calls) or by
+the client IP alone. ``RateLimitMiddleware`` answers over-budget requests with
+``429`` and ``Retry-After`` before routing, authentication or the database
+are involved, and adds the ``RateLimit-*`` headers to every limited route's
+responses.
+
+Budgets are kept per process as token buckets (GCRA: one timestamp per key)
+or, with ``RATE_LIMIT_BACKEND=shared``, on the cache server as a sliding
+window over two fixed-window counters, so every worker draws on the same budget.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.http_cache import _user_id
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    path: str  # Exact path, or a prefix ending in "*"
+    limit: int
+    window: int
+    key: str = "user"  # "user" (bearer token's user, else client IP) or "ip"
+
+    @property
+    def name(self) -> str:
+        return f"{self.limit};w={self.window}"
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # Seconds until the budget is whole again
+    retry_after: float = 0.0  # Seconds until the next request would be allowed, when refused
+
+
+def parse_policies(raw: str) -> List[RatePolicy]:
+    """``path=limit/window[/user|ip]`` items separated by commas"""
+    policies = []
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        path, spec = item.split("=", 1)
+        parts = spec.strip().split("/")
+        key = parts[2].strip().lower() if len(parts) > 2 else "user"
+        if key not in ("user", "ip"):
+            raise ValueError(f"Rate limit key must be 'user' or 'ip', got {key!r}")
+        policies.append(RatePolicy(path.strip(), int(parts[0]), int(parts[1]), key))
+    return policies
+
+
+class MemoryRateLimitStore:
+    """In-process token buckets, as GCRA "theoretical arrival times", least recently used evicted first"""
+
+    shared = False
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._arrivals: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limit: int, window: int) -> Decision:
+        interval = window / limit
+        with self._lock:
+            now = self.clock()
+            arrival = max(self._arrivals.get(key, now), now)
+            if arrival + interval - now > window:
+                # The bucket is empty; nothing is spent, so a refused request does not push the next one back
+                retry_after = arrival + interval - window - now
+                return Decision(False, limit, 0, arrival - now, retry_after)
+            arrival += interval
+            self._arrivals[key] = arrival
+            self._arrivals.move_to_end(key)
+            # Evicted keys are the longest idle, whose buckets have mostly refilled anyway
+            while len(self._arrivals) > self.max_keys:
+                self._arrivals.popitem(last=False)
+        return Decision(True, limit, int((window - (arrival - now)) // interval), arrival - now)
+
+    def __len__(self) -> int:
+        return len(self._arrivals)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arrivals.clear()
+
+
+class SharedRateLimitStore:
+    """Sliding-window counters on the cache server, shared by every worker.
+
+    The current window's count is added to the previous window's, weighted by
+    how much of it still overlaps the sliding window; a refused request takes
+    its count back. ``client`` needs redis-style ``incr(key)``, ``decr(key)``,
+    ``expire(key, seconds)`` and ``get(key)``.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "buzznews:ratelimit:", clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def acquire(self, key: str, limit: int, window: int) -> Decision:
+        now = self.clock()
+        current = int(now // window)
+        elapsed = now - current * window
+        counter = f"{self.prefix}{key}:{current}"
+        count = self.client.incr(counter)
+        if count == 1:
+            self.client.expire(counter, 2 * window)
+        previous = int(self.client.get(f"{self.prefix}{key}:{current - 1}") or 0)
+        used = previous * (1 - elapsed / window) + count
+        reset = 2 * window - elapsed  # This window's count has slid out entirely
+        if used <= limit:
+            return Decision(True, limit, int(limit - used), reset)
+        self.client.decr(counter)
+        count -= 1
+        # When one more request fits
+        if count >= limit:
+            # Not before this window's own count has partly slid out, during the next one
+            retry_after = window - elapsed + window * (1 - (limit - 1) / count)
+        else:
+            # Once enough of the previous window's count has slid out
+            retry_after = window * (1 - (limit - 1 - count) / previous) - elapsed
+        return Decision(False, limit, 0, reset, max(retry_after, 0.0))
+
+
+class RateLimiter:
+    """Matches requests to policies and spends their budgets; counters for admin stats and /metrics"""
+
+    def __init__(self, policies: List[RatePolicy], store, forwarded_hops: int = 0):
+        self.exact: Dict[str, RatePolicy] = {p.path: p for p in policies if not p.path.endswith("*")}
+        # Longest prefix first
+        self.prefixes: List[Tuple[str, RatePolicy]] = sorted(
+            ((p.path[:-1], p) for p in policies if p.path.endswith("*")), key=lambda item: -len(item[0])
+        )
+        self.store = store
+        self.forwarded_hops = forwarded_hops
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {p.path: {"allowed": 0, "limited": 0} for p in policies}
+
+    def policy(self, path: str) -> Optional[RatePolicy]:
+        policy = self.exact.get(path)
+        if policy is None:
+            for prefix, candidate in self.prefixes:
+                if path.startswith(prefix):
+                    return candidate
+        return policy
+
+    def client_ip(self, scope, headers: Headers) -> str:
+        """The peer address, or the address ``forwarded_hops`` proxies in front of us saw"""
+        if self.forwarded_hops:
+            forwarded = [part.strip() for part in headers.get("x-forwarded-for", "").split(",") if part.strip()]
+            if len(forwarded) >= self.forwarded_hops:
+                return forwarded[-self.forwarded_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def client_key(self, policy: RatePolicy, scope, headers: Headers) -> str:
+        if policy.key == "user":
+            user_id = _user_id(headers)
+            if user_id is not None:
+                return f"{policy.path}:user:{user_id}"
+        return f"{policy.path}:ip:{self.client_ip(scope, headers)}"
+
+    def check(self, policy: RatePolicy, key: str) -> Decision:
+        decision = self.store.acquire(key, policy.limit, policy.window)
+        with self._lock:
+            self.counters[policy.path]["allowed" if decision.allowed else "limited"] += 1
+        return decision
+
+    def stats(self) -> dict:
+        with self._lock:
+            policies = {path: dict(counts) for path, counts in self.counters.items()}
+        stats = {"backend": "shared" if self.store.shared else "memory", "policies": policies}
+        if not self.store.shared:
+            stats["tracked_keys"] = len(self.store)
+        return stats
+
+
+def rate_limit_headers(policy: RatePolicy, decision: Decision) -> List[Tuple[bytes, bytes]]:
+    headers = [
+        (b"ratelimit-limit", str(decision.limit).encode()),
+        (b"ratelimit-remaining", str(decision.remaining).encode()),
+        (b"ratelimit-reset", str(math.ceil(decision.reset)).encode()),
+        (b"ratelimit-policy", policy.name.encode()),
+    ]
+    if not decision.allowed:
+        headers.append((b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode()))
+    return headers
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying ``limiter``'s policies; add it outside HTTPCacheMiddleware so cached hits count"""
+
+    def __init__(self, app, limiter: "RateLimiter"):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        policy = self.limiter.policy(scope["path"]) if scope["type"] == "http" and scope["method"] != "OPTIONS" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.limiter.client_key(policy, scope, Headers(scope=scope))
+        if self.limiter.store.shared:
+            decision = await run_in_threadpool(self.limiter.check, policy, key)
+        else:
+            decision = self.limiter.check(policy, key)
+        headers = rate_limit_headers(policy, decision)
+
+        if not decision.allowed:
+            body = orjson.dumps({"detail": "Too many requests, slow down"})
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())] + headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def build_store():
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        # Optional dependency, as for the shared NewsAPI cache
+        import redis
+        return SharedRateLimitStore(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+    return MemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(
+    parse_policies(settings.RATE_LIMIT_POLICIES),
+    build_store(),
+    forwarded_hops=settings.RATE_LIMIT_FORWARDED_HOPS,
+)
@@ -0,0 +1,370 @@
+"""Retention: move old upstream articles out of the ``articles`` table.
+
+An upstream article becomes a candidate once it was published more than
+``RETENTION_MAX_AGE_DAYS`` ago, or once it is older than the newest
+``RETENTION_MAX_ARTICLES`` articles. Articles someone favorited or saved for
+later, and admin articles, are never removed, whatever their age.
+
+``archiver`` walks the candidates oldest first, ``RETENTION_BATCH_SIZE`` at a
+time, each batch in its own short transaction: the articles are deleted
+(re-checking that nobody saved them since they were picked, so a concurrent
+save wins), their feed entries with them, and the deleted rows are written to
+the archive. A batch that loses a race with a save on PostgreSQL fails its
+foreign key check and is rolled back whole; the next run picks it up again.
+Batches are separated by ``RETENTION_BATCH_PAUSE`` so request traffic is not
+locked out, and a run stops after ``RETENTION_MAX_BATCHES``.
+
+The archive is ``articles_archive`` (a few lookup columns and the whole row as
+compressed JSON) or, with ``RETENTION_ARCHIVE=file``, a gzipped JSONL file per
+day in ``RETENTION_ARCHIVE_DIR``, written before the batch commits, so a
+failed commit can leave a row in the file twice but never loses one.
+
+On PostgreSQL ``articles_archive`` is range-partitioned by month of
+``published_at``, so ``RETENTION_ARCHIVE_KEEP_MONTHS`` drops whole
+partitions. ``articles`` itself is not partitioned: its global unique ``url``
+(the key of every upsert) and the foreign keys from saved items and feed
+entries cannot be kept on a table partitioned by ``published_at``; retention
+keeps it bounded instead.
+
+Each run reports the rows archived and an estimate of the bytes reclaimed
+(each row's JSON size; indexes and the search index are not counted). Freed
+pages are reused by new rows; the database file only shrinks after a VACUUM
+(on SQLite, run ``rebuild_search_index()`` after it).
+"""
+import gzip
+import logging
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import Column, DateTime, Index, LargeBinary, MetaData, String, Table, delete, exists, insert, or_, select, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Article, Favorite, FeedEntry, WatchLater
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_MODES = ("table", "file", "none")
+
+_meta = MetaData()
+articles_archive = Table(
+    "articles_archive",
+    _meta,
+    # The partition key has to be part of the primary key
+    Column("id", String, primary_key=True),
+    Column("published_at", DateTime, primary_key=True),
+    Column("url", String),
+    Column("title", String, nullable=False),
+    Column("source", String),
+    Column("archived_at", DateTime, nullable=False),
+    Column("body", LargeBinary, nullable=False),  # zlib-compressed JSON of the whole articles row
+    Index("ix_articles_archive_url", "url"),
+    postgresql_partition_by="RANGE (published_at)",
+)
+
+_PARTITION_PREFIX = "articles_archive_p"
+
+
+def create_archive_table(conn: Connection) -> None:
+    articles_archive.create(bind=conn, checkfirst=True)
+
+
+def _month(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"{_PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def _unsaved():
+    """Conditions that keep saved and admin articles out of every candidate query and delete"""
+    return (
+        Article.source != "admin",
+        ~exists().where(Favorite.article_id == Article.id),
+        ~exists().where(WatchLater.article_id == Article.id),
+    )
+
+
+@dataclass
+class RetentionRun:
+    started_at: datetime
+    age_cutoff: Optional[datetime] = None  # Published before this
+    size_cutoff: Optional[datetime] = None  # Published no later than the oldest article over the size limit
+    batches: int = 0
+    archived: int = 0
+    conflicts: int = 0  # Batches rolled back because an article in them was saved meanwhile
+    row_bytes: int = 0  # Estimated bytes removed from articles
+    archive_bytes: int = 0  # Compressed bytes written to the archive
+    expired: int = 0  # Archive rows (or, on PostgreSQL, monthly partitions) dropped
+    complete: bool = False  # False when the run stopped at RETENTION_MAX_BATCHES
+    seconds: float = 0.0
+
+
+class Archiver:
+    def __init__(
+        self,
+        max_age_days: int = 0,
+        max_articles: int = 0,
+        archive: str = "table",
+        archive_dir: str = "archive",
+        keep_months: int = 0,
+        batch_size: int = 500,
+        batch_pause: float = 0.05,
+        max_batches: int = 200,
+        interval: float = 3600,
+        session_factory=SessionLocal,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        if archive not in ARCHIVE_MODES:
+            raise ValueError(f"RETENTION_ARCHIVE must be one of {', '.join(ARCHIVE_MODES)}, not {archive!r}")
+        self.max_age_days = max_age_days
+        self.max_articles = max_articles
+        self.archive = archive
+        self.archive_dir = archive_dir
+        self.keep_months = keep_months
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches = max_batches
+        self.interval = interval
+        self.session_factory = session_factory
+        self.clock = clock
+        self._partitions: Set[date] = set()  # PostgreSQL archive partitions known to exist
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[RetentionRun] = None
+        self.counters = {
+            "runs": 0, "errors": 0, "batches": 0, "archived": 0, "conflicts": 0,
+            "row_bytes": 0, "archive_bytes": 0, "expired": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_age_days or self.max_articles)
+
+    def _cutoffs(self, db: Session, run: RetentionRun) -> list:
+        conditions = []
+        if self.max_age_days:
+            run.age_cutoff = run.started_at - timedelta(days=self.max_age_days)
+            conditions.append(Article.published_at < run.age_cutoff)
+        if self.max_articles:
+            # The newest article beyond the limit; it and everything older goes
+            over = db.execute(
+                select(Article.published_at, Article.id)
+                .order_by(Article.published_at.desc(), Article.id.desc())
+                .offset(self.max_articles)
+                .limit(1)
+            ).first()
+            if over is not None:
+                run.size_cutoff = over.published_at
+                conditions.append(tuple_(Article.published_at, Article.id) <= tuple_(*over))
+        return conditions
+
+    def _candidates(self, db: Session, conditions: list, after: Optional[Tuple[datetime, str]]) -> List[Tuple[datetime, str]]:
+        query = select(Article.published_at, Article.id).where(or_(*conditions), *_unsaved())
+        if after is not None:
+            query = query.where(tuple_(Article.published_at, Article.id) > tuple_(*after))
+        return [tuple(row) for row in db.execute(
+            query.order_by(Article.published_at, Article.id).limit(self.batch_size)
+        )]
+
+    def _ensure_partitions(self, db: Session, months: Set[date]) -> None:
+        for month in sorted(months - self._partitions):
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF articles_archive "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+        self._partitions |= months
+
+    def _store(self, db: Session, rows: list, encoded: List[bytes], now: datetime) -> int:
+        """Write the deleted rows to the archive; returns the compressed bytes written"""
+        if self.archive == "file":
+            os.makedirs(self.archive_dir, exist_ok=True)
+            body = gzip.compress(b"".join(line + b"\n" for line in encoded))
+            # Appended as one more gzip member; readers see one continuous JSONL stream
+            with open(os.path.join(self.archive_dir, f"articles-{now:%Y-%m-%d}.jsonl.gz"), "ab") as out:
+                out.write(body)
+                out.flush()
+                os.fsync(out.fileno())
+            return len(body)
+        if self.archive == "table":
+            if db.get_bind().dialect.name == "postgresql":
+                self._ensure_partitions(db, {_month(row["published_at"]) for row in rows})
+            values = [
+                {
+                    "id": row["id"], "published_at": row["published_at"], "url": row["url"], "title": row["title"],
+                    "source": row["source"], "archived_at": now, "body": zlib.compress(line),
+                }
+                for row, line in zip(rows, encoded)
+            ]
+            db.execute(insert(articles_archive), values)
+            return sum(len(value["body"]) for value in values)
+        return 0
+
+    def archive_batch(self, ids: List[str], run: RetentionRun) -> int:
+        """Delete and archive the still-unsaved articles among ``ids`` in one transaction; returns how many"""
+        db = self.session_factory()
+        try:
+            table = Article.__table__
+            rows = db.execute(
+                delete(table).where(table.c.id.in_(ids), *_unsaved()).returning(*table.columns)
+            ).mappings().all()
+            if rows:
+                deleted = [row["id"] for row in rows]
+                # SQLite does not enforce ON DELETE CASCADE
+                db.execute(delete(FeedEntry).where(FeedEntry.article_id.in_(deleted)))
+                encoded = [orjson.dumps(dict(row)) for row in rows]
+                run.archive_bytes += self._store(db, rows, encoded, self.clock())
+                run.row_bytes += sum(len(line) for line in encoded)
+            db.commit()
+            return len(rows)
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def expire_archive(self) -> int:
+        """Drop archived articles published more than ``keep_months`` months ago; returns rows or partitions dropped"""
+        if not self.keep_months or self.archive != "table":
+            return 0
+        month = _month(self.clock())
+        for _ in range(self.keep_months):
+            month = date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                names = db.scalars(text(
+                    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                    "WHERE i.inhparent = 'articles_archive'::regclass"
+                ))
+                expired = [name for name in names if name.startswith(_PARTITION_PREFIX) and name[len(_PARTITION_PREFIX):] < f"{month:%Y%m}"]
+                for name in expired:
+                    db.execute(text(f"DROP TABLE {name}"))
+                    db.commit()
+                self._partitions.clear()
+                return len(expired)
+            before = datetime(month.year, month.month, 1)
+            dropped = 0
+            while not self._stop.is_set():
+                keys = [tuple(key) for key in db.execute(
+                    select(articles_archive.c.id, articles_archive.c.published_at)
+                    .where(articles_archive.c.published_at < before)
+                    .limit(self.batch_size)
+                )]
+                if not keys:
+                    break
+                db.execute(delete(articles_archive).where(tuple_(articles_archive.c.id, articles_archive.c.published_at).in_(keys)))
+                db.commit()
+                dropped += len(keys)
+                self._stop.wait(self.batch_pause)
+            return dropped
+        finally:
+            db.close()
+
+    def run_once(self) -> RetentionRun:
+        """Archive up to ``max_batches`` batches of candidates and expire the archive"""
+        started = time.perf_counter()
+        run = RetentionRun(started_at=self.clock())
+        db = self.session_factory()
+        try:
+            conditions = self._cutoffs(db, run) if self.enabled else []
+            after = None
+            while conditions and not self._stop.is_set():
+                if run.batches == self.max_batches:
+                    break
+                candidates = self._candidates(db, conditions, after)
+                # Ends the read transaction, so this session holds no snapshot while the batch runs
+                db.rollback()
+                if not candidates:
+                    run.complete = True
+                    break
+                after = candidates[-1]
+                run.batches += 1
+                try:
+                    run.archived += self.archive_batch([article_id for _, article_id in candidates], run)
+                except IntegrityError as exc:
+                    run.conflicts += 1
+                    logger.info("Retention batch rolled back, an article in it was saved meanwhile: %s", exc.orig)
+                self._stop.wait(self.batch_pause)
+        finally:
+            db.close()
+        run.expired = self.expire_archive()
+        run.seconds = time.perf_counter() - started
+        if run.archived:
+            # Cached feeds may still list the archived articles; other workers' caches expire on their own
+            from app.hot import hot_content
+            from app.http_cache import http_cache
+            http_cache.invalidate()
+            hot_content.invalidate()
+        with self._lock:
+            self.last_run = run
+            self.counters["runs"] += 1
+            for key in ("batches", "archived", "conflicts", "row_bytes", "archive_bytes", "expired"):
+                self.counters[key] += getattr(run, key)
+        logger.info(
+            "Retention archived %d articles (~%d bytes reclaimed, %d archived) in %d batches, %.1fs%s",
+            run.archived, run.row_bytes, run.archive_bytes, run.batches, run.seconds, "" if run.complete else ", more left",
+        )
+        return run
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                with self._lock:
+                    self.counters["errors"] += 1
+                logger.warning("Retention run failed: %s", exc)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            last_run = asdict(self.last_run) if self.last_run else None
+        return dict(
+            counters,
+            max_age_days=self.max_age_days,
+            max_articles=self.max_articles,
+            archive=self.archive,
+            running=self._thread is not None,
+            last_run=last_run,
+        )
+
+
+archiver = Archiver(
+    max_age_days=settings.RETENTION_MAX_AGE_DAYS,
+    max_articles=settings.RETENTION_MAX_ARTICLES,
+    archive=settings.RETENTION_ARCHIVE,
+    archive_dir=settings.RETENTION_ARCHIVE_DIR,
+    keep_months=settings.RETENTION_ARCHIVE_KEEP_MONTHS,
+    batch_size=settings.RETENTION_BATCH_SIZE,
+    batch_pause=settings.RETENTION_BATCH_PAUSE,
+    max_batches=settings.RETENTION_MAX_BATCHES,
+    interval=settings.RETENTION_INTERVAL,
+)
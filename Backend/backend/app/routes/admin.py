@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Article
-from app.schemas import ArticleCreate, ArticleResponse
-from app.security import verify_token
+from starlette.concurrency import run_in_threadpool
+from app import bulk_import
+from app.admin_articles import AdminFilters, admin_page, count_admin_articles, naive_utc
+from app.config import settings
+from app.database import get_db, database_pool_stats
+from app.feed import Cursor, InvalidCursor
+from app.http_cache import http_cache
+from app.hot import hot_content
+from app.models import Article, FeedEntry
+from app.ratelimit import rate_limiter
+from app.retention import archiver
+from app.schemas import AdminArticleResponse, AdminArticleSummary, ArticleCreate, ArticleResponse, ArticleUpdate, render
+from app.security import Principal, verify_principal, password_hasher
+from app.stream import broker
+from app.upstream import newsapi_client
 from datetime import datetime
+from typing import List, Literal, Optional, Union
 
 router = APIRouter()
 
 @router.post("/articles", response_model=ArticleResponse)
-def create_article(article_data: ArticleCreate, current_user: User = Depends(verify_token), db: Session = Depends(get_db)):
+def create_article(article_data: ArticleCreate, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
     """Create and publish a news article (Admin only)"""
     # Check if user is admin
     if not current_user.is_admin:
@@ -29,14 +44,202 @@ def create_article(article_data: ArticleCreate, current_user: User = Depends(ver
     db.add(new_article)
     db.commit()
     db.refresh(new_article)
+    # Admin articles appear in every public feed
+    http_cache.invalidate()
+    hot_content.invalidate()
+    broker.publish([new_article])
     
     return new_article
 
-@router.get("/articles", response_model=list)
-def get_admin_articles(current_user: User = Depends(verify_token), db: Session = Depends(get_db)):
-    """Get all admin-created articles"""
+@router.post("/articles/import")
+async def import_articles(request: Request, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+    """Import articles from an NDJSON or JSON array body, written in batches as it streams in (Admin only)"""
+    return await run_import(request, current_user, lambda batch: run_in_threadpool(bulk_import.write_batch, db, batch))
+
+async def run_import(request: Request, current_user: Principal, write):
+    """Shared by both routers; ``write`` runs bulk_import.write_batch against the request's session"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can create articles")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in bulk_import.NDJSON_TYPES + bulk_import.JSON_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/x-ndjson (one article per line) or application/json (an array of articles)",
+        )
+
+    report = await bulk_import.import_stream(
+        request.stream(),
+        ndjson=content_type in bulk_import.NDJSON_TYPES,
+        author_id=current_user.id,
+        write=write,
+        batch_size=settings.IMPORT_BATCH_SIZE,
+        max_row_bytes=settings.IMPORT_MAX_ROW_BYTES,
+        max_errors=settings.IMPORT_MAX_REPORTED_ERRORS,
+    )
+    if report.inserted:
+        http_cache.invalidate()
+        hot_content.invalidate()
+    # Batches written before a malformed body was detected stay imported; the report says how far it got
+    if report.aborted:
+        return JSONResponse(report.as_dict(), status_code=status.HTTP_400_BAD_REQUEST)
+    return report.as_dict()
+
+@router.get("/articles", response_model=Union[List[AdminArticleSummary], List[AdminArticleResponse]])
+def get_admin_articles(
+    current_user: Principal = Depends(verify_principal),
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Literal["summary", "full"] = Query("summary", description="full includes each article's content"),
+    author_id: Optional[str] = Query(None),
+    published_from: Optional[datetime] = Query(None, description="Inclusive"),
+    published_to: Optional[datetime] = Query(None, description="Exclusive"),
+    title_prefix: Optional[str] = Query(None, min_length=1),
+):
+    """Get admin-created articles, newest first; the first page carries the total in X-Total-Count"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    try:
+        position = Cursor.decode(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    filters = AdminFilters(author_id, published_from, published_to, title_prefix)
+    full = fields == "full"
+    articles, next_token = admin_page(db, filters, limit, cursor=position, full=full)
+    headers = {"X-Next-Cursor": next_token} if next_token else {}
+    # Counted once per listing rather than on every page
+    if position is None:
+        total, exact = count_admin_articles(db, filters, settings.ADMIN_COUNT_EXACT_LIMIT)
+        headers["X-Total-Count"] = str(total)
+        if not exact:
+            headers["X-Total-Count-Estimated"] = "true"
+    return render(List[AdminArticleResponse] if full else List[AdminArticleSummary], articles, headers=headers)
+
+def _admin_article(db: Session, article_id: str) -> Article:
+    article = db.get(Article, article_id)
+    if article is None or article.source != "admin":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+    return article
+
+@router.patch("/articles/{article_id}", response_model=AdminArticleResponse)
+def update_article(article_id: str, changes: ArticleUpdate, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+    """Edit an admin-created article; only the fields sent are changed (Admin only)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can edit articles")
+    values = changes.model_dump(exclude_unset=True)
+    for required in ("title", "published_at"):
+        if required in values and values[required] is None:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{required} cannot be null")
+    if "published_at" in values:
+        values["published_at"] = naive_utc(values["published_at"])
+
+    article = _admin_article(db, article_id)
+    for name, value in values.items():
+        setattr(article, name, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another article has this url")
+    db.refresh(article)
+    http_cache.invalidate()
+    hot_content.invalidate()
+    return article
+
+@router.delete("/articles/{article_id}")
+def delete_article(article_id: str, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+    """Delete an admin-created article, with its feed entries and saved copies (Admin only)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can delete articles")
+    article = _admin_article(db, article_id)
+    # Feed entries have no relationship to cascade through, and SQLite does not enforce ON DELETE
+    db.execute(delete(FeedEntry).where(FeedEntry.article_id == article.id))
+    db.delete(article)
+    db.commit()
+    http_cache.invalidate()
+    hot_content.invalidate()
+    return {"message": "Article deleted"}
+
+@router.get("/ingest")
+def get_ingest_status(request: Request, current_user: Principal = Depends(verify_principal)):
+    """Get last-run and lag metrics of the in-app ingestion worker"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    worker = getattr(request.app.state, "ingest_worker", None)
+    if worker is None:
+        return {"enabled": False, "queries": {}}
+    return {"enabled": True, "queries": worker.metrics()}
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(current_user: Principal = Depends(verify_principal)):
+    """Get connection pool saturation figures (checked out, overflow, checkout wait histogram)"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return database_pool_stats()
+
+
+@router.get("/hashing")
+def get_hashing_stats(current_user: Principal = Depends(verify_principal)):
+    """Get password hashing queue depth, rejections and latency"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return password_hasher.stats()
+
+
+@router.get("/http-cache")
+def get_http_cache_stats(current_user: Principal = Depends(verify_principal)):
+    """Get conditional GET and rendered-response cache counters"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return http_cache.stats()
+
+
+@router.get("/upstream")
+def get_upstream_stats(current_user: Principal = Depends(verify_principal)):
+    """Get NewsAPI circuit breaker state, retries and fast failures"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return newsapi_client.stats()
+
+
+@router.get("/hot-content")
+def get_hot_content_stats(current_user: Principal = Depends(verify_principal)):
+    """Get featured/feed snapshot ages, hit rate and refresh counters"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return hot_content.stats()
+
+
+@router.get("/rate-limits")
+def get_rate_limit_stats(current_user: Principal = Depends(verify_principal)):
+    """Get allowed and limited requests per rate limit policy"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return rate_limiter.stats()
+
+
+@router.get("/stream")
+def get_stream_stats(current_user: Principal = Depends(verify_principal)):
+    """Get open article streams, queued events, published and dropped counts"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
+    
+    return broker.stats()
+
+
+@router.get("/retention")
+def get_retention_stats(current_user: Principal = Depends(verify_principal)):
+    """Get retention policy, the last run's report and archived row and byte totals"""
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can view this")
     
-    articles = db.query(Article).filter(Article.source == "admin").all()
-    return articles
+    return archiver.stats()
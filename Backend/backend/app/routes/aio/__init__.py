@@ -0,0 +1,43 @@
+"""Async variants of the API routers, enabled with ASYNC_MODE.
+
+Upstream calls are awaited on the shared httpx client; database work reuses the
+sync handlers through ``AsyncSession.run_sync`` so both modes share one
+implementation. Results are serialized inside ``run_sync``, after the handler
+has loaded everything the response needs.
+
+Nothing may be loaded from the database while pydantic validates: the load
+would switch greenlets in the middle of pydantic-core, and another request
+entering pydantic-core on the same thread corrupts both (pyo3 releases the
+objects it borrowed in a per-thread stack, which interleaved calls unwind out
+of order). ``serialize`` turns such a load into an error instead.
+"""
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app import schemas
+
+_serializing: ContextVar[bool] = ContextVar("serializing", default=False)
+
+
+class LoadDuringSerialization(RuntimeError):
+    """An attribute was loaded lazily while a response was being validated"""
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _refuse_loads_while_serializing(state: ORMExecuteState) -> None:
+    if _serializing.get():
+        raise LoadDuringSerialization(
+            f"{state.statement} ran while serializing a response; load it in the handler before returning"
+        )
+
+
+def serialize(response_model, value: Any) -> Any:
+    """schemas.serialize for results returned from ``run_sync``, which must already be loaded"""
+    token = _serializing.set(True)
+    try:
+        return schemas.serialize(response_model, value)
+    finally:
+        _serializing.reset(token)
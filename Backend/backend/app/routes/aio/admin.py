@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas import AdminArticleResponse, AdminArticleSummary, ArticleCreate, ArticleResponse, ArticleUpdate
+from app.security import Principal, verify_principal_async
+from app import bulk_import
+from app.routes import admin
+from app.routes.aio import serialize
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+
+router = APIRouter()
+
+@router.post("/articles", response_model=ArticleResponse)
+async def create_article(article_data: ArticleCreate, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+    """Create and publish a news article (Admin only)"""
+    return await db.run_sync(lambda session: serialize(
+        ArticleResponse, admin.create_article(article_data, current_user=current_user, db=session)
+    ))
+
+@router.post("/articles/import")
+async def import_articles(request: Request, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+    """Import articles from an NDJSON or JSON array body, written in batches as it streams in (Admin only)"""
+    return await admin.run_import(request, current_user, lambda batch: db.run_sync(bulk_import.write_batch, batch))
+
+@router.get("/articles", response_model=Union[List[AdminArticleSummary], List[AdminArticleResponse]])
+async def get_admin_articles(
+    current_user: Principal = Depends(verify_principal_async),
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Literal["summary", "full"] = Query("summary", description="full includes each article's content"),
+    author_id: Optional[str] = Query(None),
+    published_from: Optional[datetime] = Query(None, description="Inclusive"),
+    published_to: Optional[datetime] = Query(None, description="Exclusive"),
+    title_prefix: Optional[str] = Query(None, min_length=1),
+):
+    """Get admin-created articles, newest first; the first page carries the total in X-Total-Count"""
+    return await db.run_sync(lambda session: admin.get_admin_articles(
+        current_user=current_user, db=session, limit=limit, cursor=cursor, fields=fields, author_id=author_id,
+        published_from=published_from, published_to=published_to, title_prefix=title_prefix,
+    ))
+
+@router.patch("/articles/{article_id}", response_model=AdminArticleResponse)
+async def update_article(article_id: str, changes: ArticleUpdate, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+    """Edit an admin-created article; only the fields sent are changed (Admin only)"""
+    return await db.run_sync(lambda session: serialize(
+        AdminArticleResponse, admin.update_article(article_id, changes, current_user=current_user, db=session)
+    ))
+
+@router.delete("/articles/{article_id}")
+async def delete_article(article_id: str, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+    """Delete an admin-created article, with its feed entries and saved copies (Admin only)"""
+    return await db.run_sync(lambda session: admin.delete_article(article_id, current_user=current_user, db=session))
+
+@router.get("/ingest")
+async def get_ingest_status(request: Request, current_user: Principal = Depends(verify_principal_async)):
+    """Get last-run and lag metrics of the in-app ingestion worker"""
+    return admin.get_ingest_status(request, current_user=current_user)
+
+@router.get("/db-pool")
+async def get_db_pool_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get connection pool saturation figures (checked out, overflow, checkout wait histogram)"""
+    return admin.get_db_pool_stats(current_user=current_user)
+
+@router.get("/hashing")
+async def get_hashing_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get password hashing queue depth, rejections and latency"""
+    return admin.get_hashing_stats(current_user=current_user)
+
+@router.get("/http-cache")
+async def get_http_cache_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get conditional GET and rendered-response cache counters"""
+    return admin.get_http_cache_stats(current_user=current_user)
+
+@router.get("/upstream")
+async def get_upstream_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get NewsAPI circuit breaker state, retries and fast failures"""
+    return admin.get_upstream_stats(current_user=current_user)
+
+@router.get("/hot-content")
+async def get_hot_content_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get featured/feed snapshot ages, hit rate and refresh counters"""
+    return admin.get_hot_content_stats(current_user=current_user)
+
+@router.get("/rate-limits")
+async def get_rate_limit_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get allowed and limited requests per rate limit policy"""
+    return admin.get_rate_limit_stats(current_user=current_user)
+
+@router.get("/stream")
+async def get_stream_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get open article streams, queued events, published and dropped counts"""
+    return admin.get_stream_stats(current_user=current_user)
+
+@router.get("/retention")
+async def get_retention_stats(current_user: Principal = Depends(verify_principal_async)):
+    """Get retention policy, the last run's report and archived row and byte totals"""
+    return admin.get_retention_stats(current_user=current_user)
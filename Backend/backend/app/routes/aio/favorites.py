@@ -0,0 +1,4 @@
+from app.routes.aio.saved import saved_router
+from app.routes.favorites import FAVORITES
+
+router = saved_router(FAVORITES)
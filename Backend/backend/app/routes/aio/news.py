@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas import ArticleResponse, ArticleSearchResult, FeedArticle, render
+from app.search import search_articles
+from app.hot import hot_content
+from app.config import settings
+from app.security import Principal, verify_principal_async
+from app.routes import news
+from typing import List, Optional, Tuple, Union
+
+router = APIRouter()
+
+async def _prefetch(query: str, limit: int, offset: int, cursor: Optional[str]) -> Tuple[Optional[List[dict]], Optional[str]]:
+    """Await the upstream page build_feed would otherwise fetch with a blocking call"""
+    if settings.NEWS_SOURCE == "database":
+        return None, None
+    page = news.upstream_page_for(news.parse_cursor(cursor), offset, limit)
+    return await news.fetch_or_degrade_async(query, limit, offset=(page - 1) * limit)
+
+async def _feed(db: AsyncSession, query: str, limit: int, offset: int = 0, cursor: Optional[str] = None,
+                saved_state_for: Optional[str] = None):
+    external_data, stale = await _prefetch(query, limit, offset, cursor)
+    
+    # Feed pages are plain column rows (or mappings), so they can be rendered after leaving run_sync
+    return await db.run_sync(lambda session: news.build_feed(
+        session, query, limit, offset=offset, cursor=cursor, external_data=external_data, stale=stale,
+        saved_state_for=saved_state_for,
+    ))
+
+@router.get("/combined", response_model=Union[List[ArticleResponse], List[FeedArticle]])
+async def get_combined_news_feed(
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: Principal = Depends(verify_principal_async),
+    query: str = Query("technology", description="News category query"),
+    limit: int = Query(15, ge=1, le=50),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    saved_state: bool = Query(False, description="Add is_favorite and in_watch_later for the caller")
+):
+    articles, next_token, stale = await _feed(
+        db, query, limit, offset=offset, cursor=cursor, saved_state_for=current_user.id if saved_state else None
+    )
+    return render(List[FeedArticle] if saved_state else List[ArticleResponse], articles, headers=news.feed_headers(next_token, stale))
+
+@router.get("/", response_model=List[ArticleResponse])
+async def get_news(
+    db: AsyncSession = Depends(get_async_db), 
+    query: str = Query("technology", description="News query"),
+    limit: int = Query(6, ge=1)
+):
+    snapshot = hot_content.feed(query, limit)
+    if snapshot is not None:
+        return snapshot
+    articles, _, stale = await _feed(db, query, limit)
+    return render(List[ArticleResponse], articles, headers=news.feed_headers(stale=stale))
+
+@router.get("/featured", response_model=ArticleResponse)
+async def get_featured_news(db: AsyncSession = Depends(get_async_db)):
+    snapshot = hot_content.featured()
+    if snapshot is not None:
+        return snapshot
+    articles_data_list, stale = None, None
+    if settings.NEWS_SOURCE != "database":
+        articles_data_list, stale = await news.fetch_or_degrade_async("breaking", limit=1)
+    
+    def build(session):
+        featured, stale_reason = news.featured_article(session, articles_data_list, stale=stale)
+        return render(ArticleResponse, featured, headers=news.feed_headers(stale=stale_reason))
+    
+    return await db.run_sync(build)
+
+@router.get("/search", response_model=List[ArticleSearchResult])
+async def search_news(
+    db: AsyncSession = Depends(get_async_db), 
+    q: str = Query("technology", description="Search keyword"), 
+    limit: int = Query(10, ge=1)
+):
+    """Search stored articles, asking NewsAPI only when there are too few local matches"""
+    hits = await db.run_sync(lambda session: search_articles(session, q, limit))
+    external_data, stale = None, None
+    if news.needs_upstream(hits, limit):
+        external_data, stale = await news.fetch_or_degrade_async(q, limit)
+    results = await db.run_sync(lambda session: news.search_results(session, q, limit, hits, external_data))
+    return render(List[ArticleSearchResult], results, headers=news.feed_headers(stale=stale))
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_news(
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource when it reconnects"),
+    after: Optional[str] = Query(None, description="Event id to resume after, for clients that cannot send Last-Event-ID"),
+):
+    """Server-sent ``article`` events for articles stored from now on, or missed since an event id"""
+    return await news.stream_news(last_event_id=last_event_id, after=after)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas import SavedBatch, SavedBatchResult
+from app.security import Principal, verify_principal_async
+from app.routes import saved as handlers
+from app.routes.aio import serialize
+from app.routes.saved import SavedList
+from typing import List, Literal, Optional, Union
+
+def saved_router(saved: SavedList) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/", response_model=saved.response, name=f"add_{saved.singular}",
+                 description=f"Add article to {saved.title}; adding it again returns the existing item")
+    async def add(data: saved.create, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: serialize(
+            saved.response, handlers.add_item(saved, data.article_id, current_user, session)
+        ))
+
+    @router.get("/", response_model=Union[List[saved.response], List[saved.summary]], name=f"get_{saved.plural}",
+                description=f"Get the articles in user's {saved.title}, newest first")
+    async def get(
+        current_user: Principal = Depends(verify_principal_async),
+        db: AsyncSession = Depends(get_async_db),
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+        fields: Literal["summary", "full"] = Query("summary", description="full includes each article's content")
+    ):
+        return await db.run_sync(lambda session: handlers.list_items(saved, current_user, session, limit, cursor, fields))
+
+    @router.delete("/{item_id}", name=f"remove_{saved.singular}",
+                   description=f"Remove article from {saved.title}")
+    async def remove(item_id: str, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: handlers.remove_item(saved, item_id, current_user, session))
+
+    @router.post("/batch", response_model=SavedBatchResult, name=f"batch_{saved.plural}",
+                 description=f"Add and remove articles in {saved.title} in one transaction")
+    async def batch(batch: SavedBatch, current_user: Principal = Depends(verify_principal_async), db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(lambda session: handlers.batch_items(saved, batch, current_user, session))
+
+    return router
@@ -0,0 +1,4 @@
+from app.routes.aio.saved import saved_router
+from app.routes.watchlater import WATCH_LATER
+
+router = saved_router(WATCH_LATER)
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User
 from app.schemas import UserSignup, UserLogin, TokenResponse
-from app.security import hash_password, verify_password, create_access_token
+from app.security import hash_password, verify_password, password_needs_rehash, create_access_token
 from datetime import timedelta
 
 router = APIRouter()
@@ -45,6 +45,15 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     if not user or not verify_password(credentials.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     
+    # Upgrade the stored hash when BCRYPT_ROUNDS has changed since it was made
+    if password_needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = hash_password(credentials.password)
+            db.commit()
+            db.refresh(user)
+        except HTTPException:
+            pass  # Hasher busy: keep the old hash and retry on a later login
+    
     # Create token
     access_token = create_access_token(data={"sub": user.id})
     
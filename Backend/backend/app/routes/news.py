@@ -1,142 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import requests
-from app.database import get_db
-from app.models import Article, User
-from app.schemas import ArticleResponse
+from app.database import get_db, get_read_db
+from app.models import Article, FeedEntry
+from app.schemas import ArticleResponse, ArticleSearchResult, FeedArticle, render
 from app.config import settings
-from datetime import datetime
-from typing import List, Optional
-from app.security import verify_token
+from app.cache import newsapi_cache, newsapi_ttl
+from app import newsapi
+from app.articles import upsert_articles
+from app.feed import Cursor, InvalidCursor, feed_page, next_cursor
+from app.saved import with_saved_state
+from app.search import SearchHit, search_articles
+from app.stream import StreamFull, broker, parse_event_id
+from app.hot import hot_content
+from app.upstream import STALE_HEADER, UpstreamUnavailable, newsapi_client
+from typing import List, Optional, Tuple, Union
+from app.security import Principal, verify_principal
 
 router = APIRouter()
 
+def get_feed_db():
+    """Feeds only write when they pull from NewsAPI, so in database mode they read from the replica"""
+    yield from (get_read_db() if settings.NEWS_SOURCE == "database" else get_db())
+
+def _newsapi_request(query: str, limit: int, offset: int):
+    page = (offset // limit) + 1 if limit > 0 else 1
+    params = newsapi.build_params(query, limit, page, settings.NEWSAPI_KEY)
+    # Identical (query, pageSize, page) requests share one cached upstream response
+    return f"newsapi:{query.lower()}:{limit}:{page}", params
+
 def fetch_from_newsapi(query: str = "technology", limit: int = 15, offset: int = 0) -> List[dict]:
-    url = "https://newsapi.org/v2/everything"
-    params = {
-        "q": query,
-        "sortBy": "publishedAt",
-        "language": "en",
-        "pageSize": limit,
-        "page": (offset // limit) + 1 if limit > 0 else 1,
-        "apiKey": settings.NEWSAPI_KEY
-    }
-    
+    """Raises UpstreamUnavailable when NewsAPI cannot be reached in time"""
+    cache_key, params = _newsapi_request(query, limit, offset)
+    return newsapi_cache.get_or_fetch(cache_key, lambda: newsapi_client.fetch(params), ttl=newsapi_ttl(query))
+
+async def fetch_from_newsapi_async(query: str = "technology", limit: int = 15, offset: int = 0) -> List[dict]:
+    cache_key, params = _newsapi_request(query, limit, offset)
+    return await newsapi_cache.get_or_fetch_async(cache_key, lambda: newsapi_client.fetch_async(params), ttl=newsapi_ttl(query))
+
+def fetch_or_degrade(query: str, limit: int, offset: int = 0) -> Tuple[Optional[List[dict]], Optional[str]]:
+    """Upstream articles and no stale reason, or None and the reason NewsAPI was unavailable"""
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("articles", [])
-    except requests.exceptions.RequestException:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch from NewsAPI")
-
-@router.get("/combined", response_model=List[ArticleResponse])
+        return fetch_from_newsapi(query=query, limit=limit, offset=offset), None
+    except UpstreamUnavailable as exc:
+        return None, exc.reason
+
+async def fetch_or_degrade_async(query: str, limit: int, offset: int = 0) -> Tuple[Optional[List[dict]], Optional[str]]:
+    try:
+        return await fetch_from_newsapi_async(query=query, limit=limit, offset=offset), None
+    except UpstreamUnavailable as exc:
+        return None, exc.reason
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    try:
+        return Cursor.decode(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def upstream_page_for(position: Optional[Cursor], offset: int, limit: int) -> int:
+    return position.upstream_page if position else (offset // limit) + 1
+
+def feed_headers(next_token: Optional[str] = None, stale: Optional[str] = None) -> Optional[dict]:
+    headers = {}
+    if next_token:
+        headers["X-Next-Cursor"] = next_token
+    if stale:
+        headers[STALE_HEADER] = stale
+    return headers or None
+
+def build_feed(db: Session, query: str, limit: int, offset: int = 0, cursor: Optional[str] = None,
+               external_data: Optional[List[dict]] = None, stale: Optional[str] = None,
+               saved_state_for: Optional[str] = None):
+    """Return one feed page, the cursor for the next one and why upstream was skipped, if it was.
+
+    ``external_data`` is the already-fetched upstream page, or ``stale`` the reason it could
+    not be fetched (async path); otherwise it is fetched here. Without it the page comes
+    from stored articles alone. With ``saved_state_for`` (a user id) the articles carry
+    that user's FeedArticle flags.
+    """
+    position = parse_cursor(cursor)
+    
+    upstream_page = 1
+    upstream_has_more = False
+    if settings.NEWS_SOURCE != "database":
+        # Pull the matching upstream page into the articles table, then page in SQL
+        page = upstream_page_for(position, offset, limit)
+        if external_data is None and stale is None:
+            external_data, stale = fetch_or_degrade(query, limit, offset=(page - 1) * limit)
+        if stale is None:
+            upsert_articles(db, external_data, query=query)
+            upstream_page = page + 1
+            upstream_has_more = len(external_data) >= limit
+        else:
+            # Ask for the same upstream page again when the next page is requested
+            upstream_page = page
+    
+    articles, has_more = feed_page(db, query, limit, cursor=position, offset=0 if position else offset)
+    token = next_cursor(articles, has_more or upstream_has_more, upstream_page)
+    if saved_state_for is not None:
+        articles = with_saved_state(db, saved_state_for, articles)
+    return articles, token, stale
+
+@router.get("/combined", response_model=Union[List[ArticleResponse], List[FeedArticle]])
 def get_combined_news_feed(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(verify_token),
+    db: Session = Depends(get_feed_db), 
+    current_user: Principal = Depends(verify_principal),
     query: str = Query("technology", description="News category query"),
     limit: int = Query(15, ge=1, le=50),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    saved_state: bool = Query(False, description="Add is_favorite and in_watch_later for the caller")
 ):
-    external_data = fetch_from_newsapi(query=query, limit=limit, offset=offset)
-    
-    articles_to_return = []
-    new_articles_to_add = []
-    
-    for article_data in external_data:
-        article_url = article_data.get("url")
-        if not article_url:
-            continue
-            
-        existing = db.query(Article).filter(Article.url == article_url).first()
-        
-        if existing:
-            articles_to_return.append(existing)
-        else:
-            try:
-                # FIX: Check if publishedAt is available before converting
-                published_at_str = article_data.get("publishedAt", "")
-                published_at = datetime.fromisoformat(published_at_str.replace("Z", "+00:00")) if published_at_str else datetime.utcnow()
-
-                new_article = Article(
-                    title=article_data.get("title", ""),
-                    description=article_data.get("description"),
-                    content=article_data.get("content"),
-                    source=article_data.get("source", {}).get("name") or "newsapi",
-                    image_url=article_data.get("urlToImage"),
-                    url=article_url,
-                    published_at=published_at
-                )
-                new_articles_to_add.append(new_article)
-                articles_to_return.append(new_article)
-            except Exception:
-                continue
-
-    if new_articles_to_add:
-        db.add_all(new_articles_to_add)
-        db.commit()
-    
-    admin_articles = db.query(Article).filter(Article.source == "admin").all()
-    
-    all_articles = articles_to_return + admin_articles
-    
-    all_articles.sort(key=lambda x: x.published_at, reverse=True)
-    
-    start = offset
-    end = offset + limit
-    
-    return all_articles[start:end]
+    articles, next_token, stale = build_feed(
+        db, query, limit, offset=offset, cursor=cursor, saved_state_for=current_user.id if saved_state else None
+    )
+    return render(List[FeedArticle] if saved_state else List[ArticleResponse], articles, headers=feed_headers(next_token, stale))
 
 @router.get("/", response_model=List[ArticleResponse])
 def get_news(
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_feed_db), 
     query: str = Query("technology", description="News query"),
     limit: int = Query(6, ge=1)
 ):
-    return get_combined_news_feed(db=db, query=query, limit=limit, offset=0)
+    snapshot = hot_content.feed(query, limit)
+    if snapshot is not None:
+        return snapshot
+    articles, _, stale = build_feed(db, query, limit)
+    return render(List[ArticleResponse], articles, headers=feed_headers(stale=stale))
 
 
-@router.get("/featured", response_model=ArticleResponse)
-def get_featured_news(db: Session = Depends(get_db)):
-    articles_data_list = fetch_from_newsapi("breaking", limit=1)
-    
-    if not articles_data_list:
+def stored_featured_article(db: Session) -> Article:
+    featured = db.query(Article).join(FeedEntry, FeedEntry.article_id == Article.id).filter(
+        FeedEntry.query == "breaking"
+    ).order_by(FeedEntry.published_at.desc()).first()
+    if featured is None:
+        featured = db.query(Article).filter(Article.source != "admin").order_by(Article.published_at.desc()).first()
+    if featured is None:
         raise HTTPException(status_code=404, detail="No featured article available")
+    return featured
+
+def featured_article(db: Session, articles_data_list: Optional[List[dict]] = None,
+                     stale: Optional[str] = None) -> Tuple[Article, Optional[str]]:
+    """The featured article and, when NewsAPI was unavailable, why it came from storage"""
+    if settings.NEWS_SOURCE == "database":
+        return stored_featured_article(db), None
     
-    articles_data = articles_data_list[0]
-    article_url = articles_data.get("url")
-    
-    existing = db.query(Article).filter(Article.url == article_url).first()
+    if articles_data_list is None and stale is None:
+        articles_data_list, stale = fetch_or_degrade("breaking", limit=1)
+    if stale is not None:
+        return stored_featured_article(db), stale
     
-    # FIX: Return existing article immediately if found
-    if existing:
-        return existing
+    if not articles_data_list:
+        raise HTTPException(status_code=404, detail="No featured article available")
     
-    try:
-        published_at_str = articles_data.get("publishedAt", "")
-        published_at = datetime.fromisoformat(published_at_str.replace("Z", "+00:00")) if published_at_str else datetime.utcnow()
-        
-        featured_article = Article(
-            title=articles_data.get("title", ""),
-            description=articles_data.get("description"),
-            content=articles_data.get("content"),
-            source=articles_data.get("source", {}).get("name") or "newsapi",
-            image_url=articles_data.get("urlToImage"),
-            url=article_url,
-            published_at=published_at
-        )
-        db.add(featured_article)
-        db.commit()
-        db.refresh(featured_article)
-        return featured_article
-        
-    except Exception:
+    featured = upsert_articles(db, articles_data_list[:1], query="breaking")
+    if not featured:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process or save featured article")
+    
+    return featured[0], None
+
+@router.get("/featured", response_model=ArticleResponse)
+def get_featured_news(db: Session = Depends(get_feed_db)):
+    snapshot = hot_content.featured()
+    if snapshot is not None:
+        return snapshot
+    featured, stale = featured_article(db)
+    return render(ArticleResponse, featured, headers=feed_headers(stale=stale))
+
+def needs_upstream(hits: List[SearchHit], limit: int) -> bool:
+    return len(hits) < limit and settings.NEWS_SOURCE != "database"
+
+def search_results(db: Session, q: str, limit: int, hits: List[SearchHit],
+                   external_data: Optional[List[dict]] = None) -> List[dict]:
+    """Local hits, topped up with upstream articles for ``q`` when there are fewer than ``limit``"""
+    if external_data:
+        found = {hit.article.id for hit in hits}
+        for article in upsert_articles(db, external_data, query=q):
+            if len(hits) >= limit:
+                break
+            if article.id not in found:
+                hits.append(SearchHit(article, 0.0))
+                found.add(article.id)
+    return [
+        dict(((name, getattr(hit.article, name)) for name in ArticleResponse.model_fields), rank=hit.rank, highlight=hit.highlight)
+        for hit in hits
+    ]
 
-@router.get("/search", response_model=List[ArticleResponse])
+@router.get("/search", response_model=List[ArticleSearchResult])
 def search_news(
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_feed_db), 
     q: str = Query("technology", description="Search keyword"), 
     limit: int = Query(10, ge=1)
 ):
-    return get_combined_news_feed(db=db, query=q, limit=limit, offset=0)
\ No newline at end of file
+    """Search stored articles, asking NewsAPI only when there are too few local matches"""
+    hits = search_articles(db, q, limit)
+    external_data, stale = fetch_or_degrade(q, limit) if needs_upstream(hits, limit) else (None, None)
+    return render(List[ArticleSearchResult], search_results(db, q, limit, hits, external_data), headers=feed_headers(stale=stale))
+
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # No proxy buffering of events
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_news(
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource when it reconnects"),
+    after: Optional[str] = Query(None, description="Event id to resume after, for clients that cannot send Last-Event-ID"),
+):
+    """Server-sent ``article`` events for articles stored from now on, or missed since an event id"""
+    position = last_event_id or after
+    try:
+        resume = parse_event_id(position) if position else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event id")
+    try:
+        broker.admit()
+    except StreamFull:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open streams",
+                            headers={"Retry-After": str(max(1, settings.STREAM_RETRY_MS // 1000))})
+    return StreamingResponse(broker.events(resume, settings.STREAM_RETRY_MS), media_type="text/event-stream", headers=STREAM_HEADERS)
@@ -0,0 +1,90 @@
+"""The favorites and watch-later routers, built from one set of handlers"""
+from dataclasses import dataclass
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from app.database import get_db, get_read_db
+from app.feed import InvalidCursor
+from app.saved import SavedCursor, SavedModel, apply_batch, save_item, saved_page
+from app.schemas import SavedBatch, SavedBatchResult, render
+from app.security import Principal, verify_principal
+from typing import List, Literal, Optional, Type, Union
+
+@dataclass(frozen=True)
+class SavedList:
+    """What one list of saved articles is made of; the handlers take it first"""
+    model: SavedModel
+    create: Type[BaseModel]
+    response: Type[BaseModel]
+    summary: Type[BaseModel]
+    title: str  # "favorites", in docs and messages
+    item: str  # "Favorite", in the 404 of a missing item
+    singular: str  # Route names: add_<singular>, get_<plural>, ...
+    plural: str
+
+def add_item(saved: SavedList, article_id: str, current_user: Principal, db: Session):
+    item = save_item(db, saved.model, current_user.id, article_id)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+    return item
+
+def list_items(saved: SavedList, current_user: Principal, db: Session, limit: int, cursor: Optional[str], fields: str):
+    try:
+        position = SavedCursor.decode(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    full = fields == "full"
+    items, next_token = saved_page(db, saved.model, current_user.id, limit, cursor=position, full=full)
+    # Render here: validating the ORM rows against the Union would lazy-load the skipped columns
+    headers = {"X-Next-Cursor": next_token} if next_token else None
+    return render(List[saved.response] if full else List[saved.summary], items, headers=headers)
+
+def remove_item(saved: SavedList, item_id: str, current_user: Principal, db: Session):
+    model = saved.model
+    item = db.query(model).filter((model.id == item_id) & (model.user_id == current_user.id)).first()
+
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{saved.item} not found")
+
+    db.delete(item)
+    db.commit()
+
+    return {"message": f"Removed from {saved.title}"}
+
+def batch_items(saved: SavedList, batch: SavedBatch, current_user: Principal, db: Session):
+    try:
+        return apply_batch(db, saved.model, current_user.id, batch.add, batch.remove)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+def saved_router(saved: SavedList) -> APIRouter:
+    router = APIRouter()
+
+    @router.post("/", response_model=saved.response, name=f"add_{saved.singular}",
+                 description=f"Add article to {saved.title}; adding it again returns the existing item")
+    def add(data: saved.create, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+        return add_item(saved, data.article_id, current_user, db)
+
+    @router.get("/", response_model=Union[List[saved.response], List[saved.summary]], name=f"get_{saved.plural}",
+                description=f"Get the articles in user's {saved.title}, newest first")
+    def get(
+        current_user: Principal = Depends(verify_principal),
+        db: Session = Depends(get_read_db),
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+        fields: Literal["summary", "full"] = Query("summary", description="full includes each article's content")
+    ):
+        return list_items(saved, current_user, db, limit, cursor, fields)
+
+    @router.delete("/{item_id}", name=f"remove_{saved.singular}",
+                   description=f"Remove article from {saved.title}")
+    def remove(item_id: str, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+        return remove_item(saved, item_id, current_user, db)
+
+    @router.post("/batch", response_model=SavedBatchResult, name=f"batch_{saved.plural}",
+                 description=f"Add and remove articles in {saved.title} in one transaction")
+    def batch(batch: SavedBatch, current_user: Principal = Depends(verify_principal), db: Session = Depends(get_db)):
+        return batch_items(saved, batch, current_user, db)
+
+    return router
@@ -0,0 +1,202 @@
+"""Favorites and watch-later items, which share one shape"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+from sqlalchemy import and_, delete, insert as sa_insert, literal, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager
+
+from app.articles import _upsert_insert
+from app.feed import InvalidCursor, decode_token, encode_token
+from app.models import Article, Favorite, WatchLater
+from app.schemas import ARTICLE_SUMMARY_FIELDS
+
+SavedModel = Type[Union[Favorite, WatchLater]]
+
+
+@dataclass(frozen=True)
+class SavedCursor:
+    created_at: datetime
+    item_id: str
+
+    def encode(self) -> str:
+        return encode_token({"c": self.created_at.isoformat(), "i": self.item_id})
+
+    @classmethod
+    def decode(cls, token: str) -> "SavedCursor":
+        data = decode_token(token)
+        try:
+            return cls(datetime.fromisoformat(data["c"]), str(data["i"]))
+        except (ValueError, KeyError, TypeError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+
+
+def saved_page(
+    db: Session,
+    model: SavedModel,
+    user_id: str,
+    limit: int,
+    cursor: Optional[SavedCursor] = None,
+    full: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Return one page of a user's saved items, newest first, and the cursor for the next one.
+
+    Unless ``full`` is set only the ArticleSummary columns of each article are
+    loaded, leaving the ``content`` and other unused columns in the database.
+    """
+    stmt = (
+        select(model)
+        .join(model.article)
+        .where(model.user_id == user_id)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    if full:
+        stmt = stmt.options(contains_eager(model.article))
+    else:
+        columns = [getattr(Article, name) for name in ARTICLE_SUMMARY_FIELDS]
+        stmt = stmt.options(contains_eager(model.article).load_only(*columns))
+    if cursor is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(cursor.created_at, cursor.item_id))
+
+    items = list(db.scalars(stmt))
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, SavedCursor(items[-1].created_at, items[-1].id).encode()
+
+
+def _find(db: Session, model: SavedModel, user_id: str, article_id: str):
+    return db.scalars(select(model).where(model.user_id == user_id, model.article_id == article_id)).first()
+
+
+def _with_article(db: Session, item):
+    """Load ``item.article`` before it is returned; the async routes cannot load it while serializing"""
+    if item is not None:
+        db.refresh(item, ["article"])
+    return item
+
+
+def save_item(db: Session, model: SavedModel, user_id: str, article_id: str):
+    """Save an article for a user and return the row; saving it again returns the existing row.
+
+    Returns None when the article does not exist. The happy path is a single
+    ``INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING``: the SELECT from
+    articles checks the article exists and the unique (user_id, article_id)
+    index makes concurrent saves safe.
+    """
+    insert = _upsert_insert(db)
+    if insert is None:
+        # Generic path: no ON CONFLICT support, so let the unique index reject duplicates
+        if db.get(Article, article_id) is None:
+            return None
+        item = model(user_id=user_id, article_id=article_id)
+        db.add(item)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return _with_article(db, _find(db, model, user_id, article_id))
+        db.refresh(item)
+        return _with_article(db, item)
+
+    source = select(
+        literal(str(uuid.uuid4())), literal(user_id), Article.id, literal(datetime.utcnow())
+    ).where(Article.id == article_id)
+    stmt = (
+        insert(model)
+        .from_select([model.id, model.user_id, model.article_id, model.created_at], source)
+        .on_conflict_do_nothing(index_elements=["user_id", "article_id"])
+        .returning(model)
+    )
+    item = db.scalars(stmt).first()
+    if item is None:
+        # Already saved, or the article does not exist
+        db.rollback()
+        return _with_article(db, _find(db, model, user_id, article_id))
+
+    # The row was just returned by the insert, so keep it loaded after commit
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+    return _with_article(db, item)
+
+
+def saved_article_ids(db: Session, user_id: str, article_ids: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+    """Which of ``article_ids`` the user has favorited and queued, in one query over both tables' unique indexes"""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return set(), set()
+    lookup = union_all(*(
+        select(literal(kind).label("kind"), model.article_id)
+        .where(model.user_id == user_id, model.article_id.in_(article_ids))
+        for kind, model in (("favorite", Favorite), ("watch_later", WatchLater))
+    ))
+    favorites, watch_later = set(), set()
+    for kind, article_id in db.execute(lookup):
+        (favorites if kind == "favorite" else watch_later).add(article_id)
+    return favorites, watch_later
+
+
+def with_saved_state(db: Session, user_id: str, articles: list) -> List[dict]:
+    """Feed rows as mappings carrying ``is_favorite`` and ``in_watch_later``"""
+    favorites, watch_later = saved_article_ids(db, user_id, (article.id for article in articles))
+    return [
+        dict(article._mapping, is_favorite=article.id in favorites, in_watch_later=article.id in watch_later)
+        for article in articles
+    ]
+
+
+def apply_batch(db: Session, model: SavedModel, user_id: str, add: List[str], remove: List[str]) -> Dict[str, List[str]]:
+    """Save ``add`` and unsave ``remove`` for a user in one transaction.
+
+    Returns the article ids newly saved, the ones removed and the ones in ``add``
+    that do not exist; ids already in the wanted state are in none of them.
+    Raises ValueError when an id is in both lists.
+    """
+    if set(add) & set(remove):
+        raise ValueError("An article cannot be both added and removed")
+    add, remove = list(dict.fromkeys(add)), list(dict.fromkeys(remove))
+    added: List[str] = []
+    missing: List[str] = []
+    if add:
+        # One query tells which articles exist and which of those are already saved
+        known = dict(db.execute(
+            select(Article.id, model.id)
+            .outerjoin(model, and_(model.article_id == Article.id, model.user_id == user_id))
+            .where(Article.id.in_(add))
+        ).all())
+        missing = [article_id for article_id in add if article_id not in known]
+        now = datetime.utcnow()
+        rows = [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "article_id": article_id, "created_at": now}
+            for article_id in add if article_id in known and known[article_id] is None
+        ]
+        if rows:
+            insert = _upsert_insert(db)
+            if insert is None:
+                db.execute(sa_insert(model), rows)
+                added = [row["article_id"] for row in rows]
+            else:
+                # A concurrent save of the same article is not an error, and not ours to report
+                stmt = insert(model).on_conflict_do_nothing(index_elements=["user_id", "article_id"]).returning(model.article_id)
+                inserted = set(db.scalars(stmt, rows))
+                added = [row["article_id"] for row in rows if row["article_id"] in inserted]
+
+    removed: List[str] = []
+    if remove:
+        stmt = delete(model).where(model.user_id == user_id, model.article_id.in_(remove))
+        if db.get_bind().dialect.delete_returning:
+            gone = set(db.scalars(stmt.returning(model.article_id)))
+        else:
+            gone = set(db.scalars(select(model.article_id).where(stmt.whereclause)))
+            db.execute(stmt)
+        removed = [article_id for article_id in remove if article_id in gone]
+
+    db.commit()
+    return {"added": added, "removed": removed, "missing": missing}
@@ -1,6 +1,11 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from fastapi import Response
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
+from functools import lru_cache
+from sqlalchemy.engine import Row
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from time import perf_counter
+from app.metrics import observe_serialize
 
 # Auth Schemas
 class UserSignup(BaseModel):
@@ -35,6 +40,14 @@ class ArticleCreate(BaseModel):
     image_url: Optional[str]
     url: Optional[str]
 
+class ArticleImport(BaseModel):
+    title: str
+    description: Optional[str] = None
+    content: Optional[str] = None
+    image_url: Optional[str] = None
+    url: Optional[str] = None
+    published_at: Optional[datetime] = None  # Import time when missing
+
 class ArticleResponse(BaseModel):
     id: str
     title: str
@@ -50,6 +63,50 @@ class ArticleResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ArticleSearchResult(ArticleResponse):
+    rank: float
+    highlight: Optional[str] = None  # HTML-escaped matching fragment with terms wrapped in <mark></mark>
+
+class FeedArticle(ArticleResponse):
+    """An article with the caller's saved state"""
+    is_favorite: bool
+    in_watch_later: bool
+
+class ArticleSummary(BaseModel):
+    """Article fields a list of cards needs; the full body is left out"""
+    id: str
+    title: str
+    description: Optional[str]
+    source: str
+    image_url: Optional[str]
+    url: Optional[str]
+    published_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Columns loaded for an ArticleSummary
+ARTICLE_SUMMARY_FIELDS = tuple(ArticleSummary.model_fields)
+
+class ArticleUpdate(BaseModel):
+    """Fields to change on an admin article; fields left out keep their value"""
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    image_url: Optional[str] = None
+    url: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class AdminArticleSummary(ArticleSummary):
+    author_id: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+class AdminArticleResponse(ArticleResponse):
+    updated_at: Optional[datetime]
+
+ADMIN_SUMMARY_FIELDS = tuple(AdminArticleSummary.model_fields)
+
 # Favorite Schemas
 class FavoriteCreate(BaseModel):
     article_id: str
@@ -63,6 +120,15 @@ class FavoriteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class FavoriteSummary(BaseModel):
+    id: str
+    article_id: str
+    created_at: datetime
+    article: ArticleSummary
+
+    class Config:
+        from_attributes = True
+
 # Watch Later Schemas
 class WatchLaterCreate(BaseModel):
     article_id: str
@@ -75,3 +141,57 @@ class WatchLaterResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class WatchLaterSummary(BaseModel):
+    id: str
+    article_id: str
+    created_at: datetime
+    article: ArticleSummary
+
+    class Config:
+        from_attributes = True
+
+# Batch save / unsave, shared by favorites and watch later
+class SavedBatch(BaseModel):
+    add: List[str] = Field(default_factory=list, max_length=200)
+    remove: List[str] = Field(default_factory=list, max_length=200)
+
+class SavedBatchResult(BaseModel):
+    added: List[str]  # Newly saved
+    removed: List[str]  # Were saved, no longer
+    missing: List[str]  # In add, but no such article
+
+@lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+def serialize(response_model, value: Any) -> Any:
+    """Validate ORM results into ``response_model`` while the session can still load them"""
+    started = perf_counter()
+    result = _adapter(response_model).validate_python(value, from_attributes=True)
+    observe_serialize(perf_counter() - started)
+    return result
+
+def _plain(value: Any) -> Any:
+    # Column rows validate much faster as mappings than through attribute access
+    if isinstance(value, Row):
+        return value._mapping
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+def dump(response_model, value: Any) -> bytes:
+    """Validate ``value`` as ``response_model`` and encode it to JSON in pydantic-core"""
+    started = perf_counter()
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(_plain(value), from_attributes=True))
+    observe_serialize(perf_counter() - started)
+    return body
+
+def render(response_model, value: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Return ``value`` encoded by dump() as a JSON response.
+
+    Returning the Response skips FastAPI's own response_model pass (validate,
+    jsonable_encoder, json.dumps); the route's response_model still documents the contract.
+    """
+    return Response(dump(response_model, value), media_type="application/json", headers=headers)
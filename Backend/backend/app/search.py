@@ -0,0 +1,197 @@
+"""Full-text search over stored articles.
+
+PostgreSQL keeps a weighted ``tsvector`` in a generated ``articles.search_vector``
+column with a GIN index; SQLite keeps an FTS5 table in sync with triggers. Both
+are created by migration 0004. Other databases fall back to a LIKE scan.
+
+Only the newest ``SEARCH_MAX_CANDIDATES`` matches are ranked: scoring every
+match of a very common term would cost a full pass over its posting list.
+"""
+import html
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, String, func, literal_column, or_, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Article
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# The databases delimit matches with these control characters; the fragment is
+# HTML-escaped before they are replaced with the tags above
+_START = "\x02"
+_END = "\x03"
+
+_PG_LANGUAGE = "english"
+_PG_HEADLINE_OPTIONS = f'StartSel="{_START}", StopSel="{_END}", MaxFragments=2, MaxWords=20, MinWords=8'
+
+_PG_DDL = [
+    f"""
+    ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{_PG_LANGUAGE}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{_PG_LANGUAGE}', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('{_PG_LANGUAGE}', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_articles_search_vector ON articles USING GIN (search_vector)",
+]
+
+# External-content FTS5 table keyed by the articles rowid. Articles has no INTEGER
+# PRIMARY KEY, so run rebuild_search_index() after a VACUUM, which may renumber rowids.
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        title, description, content, content='articles', content_rowid='rowid', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, title, description, content)
+        VALUES (new.rowid, new.title, new.description, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, description, content)
+        VALUES ('delete', old.rowid, old.title, old.description, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, description, content ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, title, description, content)
+        VALUES ('delete', old.rowid, old.title, old.description, old.content);
+        INSERT INTO articles_fts(rowid, title, description, content)
+        VALUES (new.rowid, new.title, new.description, new.content);
+    END
+    """,
+]
+
+# Column weights for bm25(): title, description, content
+_SQLITE_WEIGHTS = "10.0, 4.0, 1.0"
+
+
+@dataclass
+class SearchHit:
+    article: Article
+    rank: float
+    highlight: Optional[str] = None
+
+
+def create_search_index(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        for statement in _PG_DDL:
+            conn.exec_driver_sql(statement)
+    elif dialect == "sqlite":
+        for statement in _SQLITE_DDL:
+            conn.exec_driver_sql(statement)
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    """Re-index every article; only needed for SQLite"""
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+
+def _terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def _highlight(fragment: Optional[str]) -> Optional[str]:
+    """Escape ``fragment`` and turn its match delimiters into <mark> tags"""
+    if not fragment:
+        return None
+    return html.escape(fragment).replace(_START, HIGHLIGHT_START).replace(_END, HIGHLIGHT_END)
+
+
+def _mark_terms(value: str, terms: List[str]) -> str:
+    return re.sub("|".join(map(re.escape, terms)), lambda match: _START + match.group(0) + _END, value, flags=re.IGNORECASE)
+
+
+def _search_postgresql(db: Session, query: str, limit: int) -> List[SearchHit]:
+    tsquery = func.websearch_to_tsquery(_PG_LANGUAGE, query)
+    vector = literal_column("articles.search_vector")
+    candidates = (
+        select(Article.id, Article.published_at, vector.label("search_vector"))
+        .where(vector.op("@@")(tsquery))
+        .order_by(Article.published_at.desc())
+        .limit(settings.SEARCH_MAX_CANDIDATES)
+        .subquery()
+    )
+    rank = func.ts_rank_cd(candidates.c.search_vector, tsquery)
+    best = (
+        select(candidates.c.id, rank.label("rank"))
+        .order_by(rank.desc(), candidates.c.published_at.desc())
+        .limit(limit)
+        .subquery()
+    )
+    # Headlines are expensive, so build them only for the rows returned
+    headline = func.ts_headline(
+        _PG_LANGUAGE, func.concat_ws(" ", Article.description, Article.content), tsquery, _PG_HEADLINE_OPTIONS
+    )
+    stmt = (
+        select(Article, best.c.rank, headline)
+        .join(best, best.c.id == Article.id)
+        .order_by(best.c.rank.desc(), Article.published_at.desc())
+    )
+    return [SearchHit(article, float(score), _highlight(highlight)) for article, score, highlight in db.execute(stmt)]
+
+
+def _search_sqlite(db: Session, query: str, limit: int) -> List[SearchHit]:
+    terms = _terms(query)
+    if not terms:
+        return []
+    # Quote every term so user input can never be read as FTS5 query syntax
+    match = " ".join('"%s"' % term for term in terms)
+    # Newest candidates by rowid, the best of those by bm25, then snippets for just those
+    hits = text(f"""
+        WITH candidates AS (
+            SELECT rowid AS article_rowid, -bm25(articles_fts, {_SQLITE_WEIGHTS}) AS rank
+            FROM articles_fts WHERE articles_fts MATCH :match
+            ORDER BY rowid DESC LIMIT :candidates
+        ), best AS (
+            SELECT article_rowid, rank FROM candidates ORDER BY rank DESC LIMIT :limit
+        )
+        SELECT best.article_rowid, best.rank, snippet(articles_fts, -1, :start, :end, '…', 16) AS highlight
+        FROM articles_fts JOIN best ON articles_fts.rowid = best.article_rowid
+        WHERE articles_fts MATCH :match
+    """).bindparams(
+        match=match, limit=limit, candidates=settings.SEARCH_MAX_CANDIDATES, start=_START, end=_END
+    )
+    hits = hits.columns(article_rowid=Integer, rank=Float, highlight=String).subquery()
+    stmt = (
+        select(Article, hits.c.rank, hits.c.highlight)
+        .join(hits, literal_column("articles.rowid") == hits.c.article_rowid)
+        .order_by(hits.c.rank.desc(), Article.published_at.desc())
+    )
+    return [SearchHit(article, float(score), _highlight(highlight)) for article, score, highlight in db.execute(stmt)]
+
+
+def _search_like(db: Session, query: str, limit: int) -> List[SearchHit]:
+    terms = _terms(query)
+    if not terms:
+        return []
+    matches = [or_(Article.title.ilike(f"%{term}%"), Article.description.ilike(f"%{term}%")) for term in terms]
+    stmt = select(Article).where(*matches).order_by(Article.published_at.desc()).limit(limit)
+    return [
+        SearchHit(article, 0.0, _highlight(_mark_terms(article.description or article.title or "", terms)))
+        for article in db.scalars(stmt)
+    ]
+
+
+_searchers = {
+    "postgresql": _search_postgresql,
+    "sqlite": _search_sqlite,
+}
+
+
+def search_articles(db: Session, query: str, limit: int) -> List[SearchHit]:
+    """Stored articles matching ``query``, best match first"""
+    searcher = _searchers.get(db.get_bind().dialect.name, _search_like)
+    return searcher(db, query, limit)
@@ -1,23 +1,47 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials as HTTPAuthCredentials
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User
+from app.auth_cache import AuthCache, Principal
+from app.hashing import HasherBusy, PasswordHasher
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
+auth_cache = AuthCache(ttl=settings.AUTH_CACHE_TTL, max_entries=settings.AUTH_CACHE_MAX_ENTRIES)
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts in progress, try again shortly",
+        headers={"Retry-After": "1"},
+    )
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    try:
+        return password_hasher.hash(password)
+    except HasherBusy:
+        raise _hasher_busy()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(plain_password, hashed_password)
+    except HasherBusy:
+        raise _hasher_busy()
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different bcrypt cost than BCRYPT_ROUNDS"""
+    return password_hasher.needs_rehash(hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -27,21 +51,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
-    token = credentials.credentials
+def _decode_token(token: str) -> dict:
+    # jose (and its crypto backends) load on the first authenticated request, not at startup
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    return payload
+
+def _user_id_from_token(token: str) -> str:
+    return _decode_token(token)["sub"]
+
+_principal_columns = select(User.id, User.username, User.is_admin)
+
+def _cache_principal(token: str, payload: dict, row) -> Principal:
+    if row is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    principal = Principal(id=row.id, username=row.username, is_admin=bool(row.is_admin))
+    auth_cache.set(token, principal, payload.get("exp"))
+    return principal
+
+def principal_for_token(db: Session, token: str) -> Principal:
+    """The token's cached Principal, or its user looked up and cached; 401 if the token or user is not valid"""
+    principal = auth_cache.get(token)
+    if principal is not None:
+        return principal
     
-    return user
+    payload = _decode_token(token)
+    row = db.execute(_principal_columns.where(User.id == payload["sub"])).first()
+    return _cache_principal(token, payload, row)
+
+def verify_principal(credentials: HTTPAuthCredentials = Depends(security), db: Session = Depends(get_db)) -> Principal:
+    """The caller's Principal, cached so most requests skip the JWT decode and user lookup"""
+    return principal_for_token(db, credentials.credentials)
+
+async def verify_principal_async(credentials: HTTPAuthCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    token = credentials.credentials
+    principal = auth_cache.get(token)
+    if principal is not None:
+        return principal
+    
+    payload = _decode_token(token)
+    row = (await db.execute(_principal_columns.where(User.id == payload["sub"]))).first()
+    return _cache_principal(token, payload, row)
+
+# Any ORM change to a user (admin flag, username, deletion) drops their cached principals
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.id)
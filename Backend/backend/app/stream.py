@@ -0,0 +1,269 @@
+"""Server-sent events for newly stored articles.
+
+``broker`` fans each article stored by this process out to every open
+``/api/news/stream``. An event is encoded once, when it is published, and
+queued as bytes on each subscriber's bounded queue; a subscriber whose queue
+fills up (a client reading slower than articles arrive) is dropped instead of
+buffered without limit. Its client reconnects with ``Last-Event-ID`` and
+replays what it missed from the ``articles`` table, keyset-paginated on
+``(created_at, id)``.
+
+One heartbeat task keeps every idle connection alive, and the database is
+read only when a client (re)connects and, every ``STREAM_POLL_INTERVAL``
+seconds, by one poller per process that picks up articles stored elsewhere
+(``ingest.py``, other workers); never once per subscriber.
+
+Open streams hold uvicorn's graceful shutdown until they end, so run it with
+``--timeout-graceful-shutdown``: streams are then cut and their clients
+reconnect (to another worker) and resume.
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.engine import Row
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.feed import InvalidCursor, decode_token, encode_token
+from app.models import Article
+from app.schemas import ARTICLE_SUMMARY_FIELDS, ArticleSummary, dump
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[datetime, str]  # (created_at, id) of the last article a client received
+
+HEARTBEAT = b": keep-alive\n\n"
+_COLUMNS = [Article.created_at, *(getattr(Article, name) for name in ARTICLE_SUMMARY_FIELDS)]
+
+
+class StreamFull(Exception):
+    """The process already holds STREAM_MAX_SUBSCRIBERS streams"""
+
+
+def event_id(created_at: datetime, article_id: str) -> str:
+    return encode_token({"c": created_at.isoformat(), "i": article_id})
+
+
+def parse_event_id(value: str) -> Position:
+    data = decode_token(value)
+    try:
+        return datetime.fromisoformat(data["c"]), str(data["i"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor("Invalid event id") from exc
+
+
+def encode_event(article) -> Tuple[str, bytes]:
+    """``(id, event)`` for an Article or a row of the stream's columns"""
+    data = dump(ArticleSummary, article)
+    return article.id, b"id: %s\nevent: article\ndata: %s\n\n" % (event_id(article.created_at, article.id).encode(), data)
+
+
+def articles_after(position: Position, limit: int) -> List[Row]:
+    """Articles stored after ``position``, oldest first, from the primary (a replica may not have them yet)"""
+    db = SessionLocal()
+    try:
+        return list(db.execute(
+            select(*_COLUMNS)
+            .where(tuple_(Article.created_at, Article.id) > tuple_(*position))
+            .order_by(Article.created_at, Article.id)
+            .limit(limit)
+        ))
+    finally:
+        db.close()
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, size: int):
+        # (article id or None, bytes to send)
+        self.queue: "asyncio.Queue[Tuple[Optional[str], bytes]]" = asyncio.Queue(size)
+        self.dropped = False
+
+
+class StreamBroker:
+    """In-process fan-out of new articles to stream subscribers; lives on the event loop it is started on"""
+
+    def __init__(
+        self,
+        buffer: int = 256,
+        max_subscribers: int = 10_000,
+        heartbeat: float = 15,
+        poll_interval: float = 5,
+        poll_overlap: float = 30,
+        resume_limit: int = 500,
+        recent_ids: int = 10_000,
+    ):
+        self.buffer = buffer
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.poll_overlap = timedelta(seconds=poll_overlap)
+        self.resume_limit = resume_limit
+        self.subscribers = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        # Articles already published, so the poller does not send them twice; must cover the poll overlap
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._recent_max = recent_ids
+        self._lock = threading.Lock()
+        self._high_water: Optional[datetime] = None
+        self.counters = {"published": 0, "dropped": 0, "rejected": 0, "resumed": 0, "polls": 0}
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._heartbeat())]
+        if self.poll_interval > 0:
+            self._high_water = await run_in_threadpool(self._latest)
+            self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.loop = None
+
+    def _remember(self, article_id: str) -> bool:
+        """False if ``article_id`` was already published"""
+        with self._lock:
+            if article_id in self._recent:
+                return False
+            self._recent[article_id] = None
+            while len(self._recent) > self._recent_max:
+                self._recent.popitem(last=False)
+            return True
+
+    def publish(self, articles: Iterable) -> None:
+        """Send ``articles`` (just committed) to every subscriber; safe from any thread, cheap without subscribers"""
+        loop = self.loop
+        if loop is None:
+            return
+        new = [article for article in articles if self._remember(article.id)]
+        if not new or not self.subscribers:
+            return
+        events = [encode_event(article) for article in new]
+        try:
+            loop.call_soon_threadsafe(self._fan_out, events)
+        except RuntimeError:
+            # The loop closed under us at shutdown
+            pass
+
+    def _fan_out(self, events: List[Tuple[str, bytes]]) -> None:
+        self.counters["published"] += len(events)
+        for subscriber in list(self.subscribers):
+            for event in events:
+                if not self._offer(subscriber, event):
+                    break
+
+    def _offer(self, subscriber: Subscriber, item: Tuple[Optional[str], bytes]) -> bool:
+        if subscriber.dropped:
+            return False
+        try:
+            subscriber.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # The stream ends once the client reads what is queued; it resumes from its last event id
+            subscriber.dropped = True
+            self.counters["dropped"] += 1
+            return False
+        return True
+
+    def admit(self) -> None:
+        """Raise StreamFull when no more streams may be opened"""
+        if len(self.subscribers) >= self.max_subscribers:
+            self.counters["rejected"] += 1
+            raise StreamFull()
+
+    async def events(self, resume: Optional[Position] = None, retry_ms: int = 3000) -> AsyncIterator[bytes]:
+        """The stream body: a reconnect hint, missed articles after ``resume``, then live events"""
+        subscriber = Subscriber(self.buffer)
+        # Subscribed before reading the backlog, so nothing committed in between is missed
+        self.subscribers.add(subscriber)
+        try:
+            yield b"retry: %d\n\n" % retry_ms
+            sent = set()
+            if resume is not None:
+                self.counters["resumed"] += 1
+                backlog = await run_in_threadpool(articles_after, resume, self.resume_limit)
+                for row in backlog:
+                    article_id, event = encode_event(row)
+                    sent.add(article_id)
+                    yield event
+                if len(backlog) == self.resume_limit:
+                    # More to catch up on: the client reconnects from the last one sent
+                    return
+            # A dropped subscriber's queue is full, so this never waits on one
+            while not (subscriber.dropped and subscriber.queue.empty()):
+                article_id, chunk = await subscriber.queue.get()
+                if article_id is None or article_id not in sent:
+                    yield chunk
+        finally:
+            self.subscribers.discard(subscriber)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscriber in list(self.subscribers):
+                # A queue still full of heartbeats belongs to a connection that stopped reading
+                self._offer(subscriber, (None, HEARTBEAT))
+
+    @staticmethod
+    def _latest() -> Optional[datetime]:
+        db = SessionLocal()
+        try:
+            return db.scalar(select(func.max(Article.created_at)))
+        finally:
+            db.close()
+
+    def _poll_once(self) -> List[Tuple[str, bytes]]:
+        """Articles stored since the last poll by anyone, less those already published, as events"""
+        self.counters["polls"] += 1
+        # Rewind by the overlap, so rows committed late with an earlier created_at are still seen
+        start = (self._high_water or datetime.utcnow()) - self.poll_overlap
+        position: Position = (start, "")
+        events = []
+        while True:
+            rows = articles_after(position, self.resume_limit)
+            for row in rows:
+                if self._remember(row.id) and self.subscribers:
+                    events.append(encode_event(row))
+            if rows:
+                position = (rows[-1].created_at, rows[-1].id)
+                self._high_water = max(self._high_water or position[0], position[0])
+            if len(rows) < self.resume_limit:
+                return events
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                events = await run_in_threadpool(self._poll_once)
+            except Exception:
+                logger.exception("Article stream poll failed")
+                continue
+            if events:
+                self._fan_out(events)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+            "queued_events": sum(subscriber.queue.qsize() for subscriber in list(self.subscribers)),
+            **self.counters,
+        }
+
+
+broker = StreamBroker(
+    buffer=settings.STREAM_BUFFER,
+    max_subscribers=settings.STREAM_MAX_SUBSCRIBERS,
+    heartbeat=settings.STREAM_HEARTBEAT,
+    poll_interval=settings.STREAM_POLL_INTERVAL,
+    poll_overlap=settings.STREAM_POLL_OVERLAP,
+    resume_limit=settings.STREAM_RESUME_LIMIT,
+)
@@ -0,0 +1,289 @@
+"""Resilient NewsAPI calls for the request path.
+
+Every call made on behalf of a request goes through ``newsapi_client``:
+
+- a rate limiter keeps all workers together under ``NEWSAPI_RATE_LIMIT`` calls
+  per ``NEWSAPI_RATE_WINDOW`` seconds (counted on the cache server when
+  ``NEWSAPI_CACHE_BACKEND=shared``, otherwise per process);
+- a circuit breaker opens after ``NEWSAPI_BREAKER_THRESHOLD`` consecutive
+  failures and fails fast for ``NEWSAPI_BREAKER_RESET`` seconds, then lets one
+  probe through (half-open) to decide whether to close again;
+- the call as a whole has a ``NEWSAPI_DEADLINE``; timeouts, 429s and 5xx are
+  retried with jittered exponential backoff, never sooner than the upstream's
+  ``Retry-After``, while the deadline and the quota allow.
+
+A call that cannot be made or does not succeed raises UpstreamUnavailable, and
+the news routes fall back to the stored articles (degraded mode) with the
+reason in the ``X-News-Stale`` response header.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app import newsapi
+from app.config import settings
+from app.metrics import request_metrics
+
+STALE_HEADER = "X-News-Stale"
+
+
+class UpstreamUnavailable(newsapi.NewsAPIError):
+    """NewsAPI could not serve this call; ``reason`` is reported in STALE_HEADER"""
+
+    def __init__(self, reason: str, status_code: Optional[int] = None):
+        super().__init__(reason, status_code=status_code)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counters = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time is let through"""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    self.counters["rejected"] += 1
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.counters["rejected"] += 1
+                    return False
+                self._probing = True
+                self.counters["probes"] += 1
+            return True
+
+    def release(self) -> None:
+        """Give back an allowed call that was never made"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failure_threshold > 0 and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    self.counters["opened"] += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, state=self.state, consecutive_failures=self.failures)
+
+
+class RateLimiter:
+    """In-process token bucket refilling ``limit`` tokens per ``window`` seconds"""
+
+    def __init__(self, limit: int, window: float, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._tokens = float(limit)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        if self.limit <= 0:
+            return True
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.limit, self._tokens + (now - self._updated) * self.limit / self.window)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class SharedRateLimiter:
+    """Fixed-window call counter on the cache server, so every worker draws on the same quota.
+
+    ``client`` needs redis-style ``incr(key)`` and ``expire(key, seconds)``.
+    """
+
+    def __init__(self, client, limit: int, window: int, prefix: str = "buzznews:newsapi-calls:",
+                 clock: Callable[[], float] = time.time):
+        self.client = client
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self.clock = clock
+
+    def try_acquire(self) -> bool:
+        if self.limit <= 0:
+            return True
+        key = f"{self.prefix}{int(self.clock() // self.window)}"
+        count = self.client.incr(key)
+        if count == 1:
+            self.client.expire(key, self.window + 1)
+        return count <= self.limit
+
+
+class UpstreamClient:
+    """NewsAPI ``everything`` calls with a deadline, retries, a circuit breaker and a rate limit"""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        limiter,
+        base_url: str = settings.NEWSAPI_BASE_URL,
+        deadline: float = 3,
+        attempt_timeout: float = 2,
+        max_retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 1,
+        http=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.breaker = breaker
+        self.limiter = limiter
+        self.base_url = base_url
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http = http
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "circuit_open": 0, "rate_limited": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _admit(self) -> int:
+        """Let the call through or raise UpstreamUnavailable; returns the retries it may use"""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("circuit_open")
+            raise UpstreamUnavailable("circuit-open")
+        if not self.limiter.try_acquire():
+            self.breaker.release()
+            self._count("rate_limited")
+            raise UpstreamUnavailable("rate-limited")
+        # Every other call fails fast while a half-open probe is out, so probe with a single attempt
+        return 0 if self.breaker.state == CircuitBreaker.HALF_OPEN else self.max_retries
+
+    def _attempt_timeout(self, started: float) -> float:
+        return max(0.05, min(self.attempt_timeout, self.deadline - (self.clock() - started)))
+
+    def _retry_delay(self, attempt: int, retries: int, error: newsapi.NewsAPIError, started: float) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up"""
+        if not error.retryable or attempt >= retries:
+            return None
+        # Full jitter keeps workers that failed together from retrying together
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        if self.clock() - started + delay >= self.deadline or not self.limiter.try_acquire():
+            return None
+        self._count("retries")
+        return delay
+
+    def _failed(self, error: newsapi.NewsAPIError) -> UpstreamUnavailable:
+        self._count("failures")
+        if error.retryable:
+            self.breaker.record_failure()
+        else:
+            # A rejected request (bad key or query) says nothing about upstream health
+            self.breaker.release()
+        reason = "rate-limited" if error.status_code == 429 else "unavailable"
+        return UpstreamUnavailable(reason, status_code=error.status_code)
+
+    def fetch(self, params: dict) -> List[dict]:
+        retries = self._admit()
+        started = self.clock()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            attempt_started = time.perf_counter()
+            try:
+                articles = newsapi.request_articles(
+                    params, http=self.http, base_url=self.base_url, timeout=self._attempt_timeout(started)
+                )
+            except newsapi.NewsAPIError as exc:
+                request_metrics.observe_upstream(time.perf_counter() - attempt_started, ok=False)
+                delay = self._retry_delay(attempt, retries, exc, started)
+                if delay is None:
+                    raise self._failed(exc) from exc
+                time.sleep(delay)
+                attempt += 1
+                continue
+            request_metrics.observe_upstream(time.perf_counter() - attempt_started, ok=True)
+            self.breaker.record_success()
+            return articles
+
+    async def fetch_async(self, params: dict) -> List[dict]:
+        retries = self._admit()
+        started = self.clock()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            attempt_started = time.perf_counter()
+            try:
+                articles = await newsapi.request_articles_async(
+                    params, base_url=self.base_url, timeout=self._attempt_timeout(started)
+                )
+            except newsapi.NewsAPIError as exc:
+                request_metrics.observe_upstream(time.perf_counter() - attempt_started, ok=False)
+                delay = self._retry_delay(attempt, retries, exc, started)
+                if delay is None:
+                    raise self._failed(exc) from exc
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            request_metrics.observe_upstream(time.perf_counter() - attempt_started, ok=True)
+            self.breaker.record_success()
+            return articles
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(counters, breaker=self.breaker.stats())
+
+
+def build_limiter():
+    if settings.NEWSAPI_CACHE_BACKEND == "shared":
+        # Optional dependency, as for the shared response cache
+        import redis
+        client = redis.Redis.from_url(settings.CACHE_REDIS_URL)
+        return SharedRateLimiter(client, settings.NEWSAPI_RATE_LIMIT, settings.NEWSAPI_RATE_WINDOW)
+    return RateLimiter(settings.NEWSAPI_RATE_LIMIT, settings.NEWSAPI_RATE_WINDOW)
+
+
+newsapi_client = UpstreamClient(
+    CircuitBreaker(settings.NEWSAPI_BREAKER_THRESHOLD, settings.NEWSAPI_BREAKER_RESET),
+    build_limiter(),
+    deadline=settings.NEWSAPI_DEADLINE,
+    attempt_timeout=settings.NEWSAPI_ATTEMPT_TIMEOUT,
+    max_retries=settings.NEWSAPI_MAX_RETRIES,
+    backoff_base=settings.NEWSAPI_BACKOFF_BASE,
+    backoff_max=settings.NEWSAPI_BACKOFF_MAX,
+)
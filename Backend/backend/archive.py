@@ -0,0 +1,23 @@
+"""Run article retention outside the API process (e.g. from cron with --once)"""
+import argparse
+import json
+import logging
+from dataclasses import asdict
+
+from app.retention import archiver
+
+parser = argparse.ArgumentParser(description="Move old, unsaved articles out of the articles table")
+parser.add_argument("--once", action="store_true", help="Run once, print the report and exit")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+if not archiver.enabled:
+    parser.exit(1, "Set RETENTION_MAX_AGE_DAYS and/or RETENTION_MAX_ARTICLES to enable retention\n")
+if args.once:
+    print(json.dumps(asdict(archiver.run_once()), indent=2, default=str))
+else:
+    try:
+        archiver.run_forever()
+    except KeyboardInterrupt:
+        print("Retention stopped")
@@ -0,0 +1,3 @@
+# Benchmarks for the NewsBuzz API; run each module with `python -m benchmarks.<name>`.
+# `seed` fills a database at a chosen scale; `loadtest` runs the endpoint scenarios against it
+# and a FakeNewsAPI and writes a JSON report that later runs can be compared with.
@@ -0,0 +1,110 @@
+"""Latency and payload size of the admin article listing on a large table.
+
+    python -m benchmarks.bench_admin_list [--articles 100000] [--repeats 5]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with
+``--articles`` admin articles from a handful of authors, then compares the
+original listing (every admin article loaded as an ORM object and serialized
+in full) with the paginated one: a first summary page (which also counts the
+total), a later page, a filtered page and a full page, plus the unbounded
+``COUNT(*)`` the bounded count replaces.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import func, insert, select
+
+from app.auth_cache import Principal
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article, User
+from app.routes.admin import get_admin_articles
+from app.schemas import ArticleResponse, dump
+
+AUTHORS = 5
+
+
+def seed(articles: int) -> None:
+    migrate(engine)
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": f"admin-{a}", "email": f"admin{a}@example.com", "username": f"admin{a}", "hashed_password": "x", "is_admin": True}
+            for a in range(AUTHORS)
+        ])
+        for offset in range(0, articles, 10_000):
+            conn.execute(insert(Article), [{
+                "id": f"article-{i}",
+                "title": f"{'Breaking' if i % 10 == 0 else 'Article'} {i}",
+                "description": "description " * 15,
+                "content": "content " * 300,
+                "author_id": f"admin-{i % AUTHORS}",
+                "source": "admin",
+                "image_url": f"https://example.com/{i}.jpg",
+                "url": f"https://example.com/{i}",
+                "published_at": start + timedelta(minutes=i),
+                "created_at": start,
+            } for i in range(offset, min(offset + 10_000, articles))])
+
+
+def timed(fn, repeats: int):
+    samples, result = [], None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.articles)
+    admin = Principal(id="admin-0", username="admin0", is_admin=True)
+    db = SessionLocal()
+
+    def original():
+        db.expunge_all()
+        return dump(List[ArticleResponse], db.query(Article).filter(Article.source == "admin").all())
+
+    def page(**params):
+        defaults = dict(limit=50, cursor=None, fields="summary", author_id=None, published_from=None, published_to=None, title_prefix=None)
+        return lambda: get_admin_articles(current_user=admin, db=db, **{**defaults, **params})
+
+    later = page()().headers["x-next-cursor"]
+    cases = (
+        ("original (everything, full)", original),
+        ("first page, summary + count", page()),
+        ("later page, summary", page(cursor=later)),
+        ("author + title prefix", page(author_id="admin-0", title_prefix="Breaking")),
+        ("first page, full + count", page(fields="full")),
+    )
+    print(f"{'listing':>30} {'ms':>9} {'bytes':>12} {'total':>14}")
+    for name, fn in cases:
+        ms, response = timed(fn, args.repeats)
+        if isinstance(response, bytes):
+            size, total = len(response), ""
+        else:
+            size = len(response.body)
+            total = response.headers.get("x-total-count", "")
+            if "x-total-count-estimated" in response.headers:
+                total += " (estimate)"
+        print(f"{name:>30} {ms:>9.1f} {size:>12} {total:>14}")
+
+    ms, count = timed(lambda: db.scalar(select(func.count()).where(Article.source == "admin")), args.repeats)
+    print(f"{'unbounded COUNT(*)':>30} {ms:>9.1f} {'':>12} {count:>14}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
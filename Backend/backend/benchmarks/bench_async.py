@@ -0,0 +1,112 @@
+"""Load test: sync vs. ASYNC_MODE request path against a slow local NewsAPI stand-in.
+
+    python -m benchmarks.bench_async [--requests 400] [--concurrency 200] [--latency 0.2]
+
+Starts a mock upstream that sleeps ``--latency`` seconds per call, then runs
+the API twice under uvicorn (sync and async) on a throwaway SQLite database
+with the response cache disabled, so every request waits on the upstream.
+Async mode needs the ``aiosqlite`` driver for SQLite.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from benchmarks.common import start_api, stop_api
+
+QUERIES = 50
+
+
+def start_mock_upstream(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            query = self.path.split("q=", 1)[-1].split("&", 1)[0]
+            body = json.dumps({"articles": [
+                {"url": f"https://example.com/{query}/{i}", "title": f"{query} {i}",
+                 "publishedAt": "2024-05-01T12:00:00Z", "source": {"name": "Mock"}}
+                for i in range(6)
+            ]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def drive(port: int, total: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        # Store every query's articles first so the timed run measures the read path, not SQLite write locks
+        for i in range(QUERIES):
+            await client.get("/api/news/", params={"query": f"q{i}"})
+
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/api/news/", params={"query": f"q{i % QUERIES}"})
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    upstream = start_mock_upstream(args.latency)
+    port = upstream.server_address[1]
+    for name, async_mode, api_port in (("sync", False, 8761), ("async", True, 8762)):
+        proc = start_api(
+            api_port,
+            NEWSAPI_BASE_URL=f"http://127.0.0.1:{port}/v2/everything",
+            NEWSAPI_CACHE_TTL=0,
+            ASYNC_MODE="true" if async_mode else "false",
+        )
+        try:
+            result = asyncio.run(drive(api_port, args.requests, args.concurrency))
+        finally:
+            stop_api(proc)
+        print(f"{name:>5}: {result['rps']:7.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p95 {result['p95_ms']:7.1f} ms  errors {result['errors']}")
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
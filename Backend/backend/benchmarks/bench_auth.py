@@ -0,0 +1,69 @@
+"""Authenticated request throughput with and without the principal cache.
+
+    python -m benchmarks.bench_auth [--requests 2000]
+
+Calls GET /api/favorites/ in-process on a throwaway SQLite database and
+reports requests/second and SQL statements per request.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from fastapi.security.http import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import Base, SessionLocal, engine
+from app.models import User
+from app.security import auth_cache, create_access_token, verify_principal
+import main
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(id="bench-user", email="bench@example.com", username="bench", hashed_password="x"))
+    db.commit()
+    db.close()
+
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    token = create_access_token({"sub": "bench-user"})
+    headers = {"Authorization": "Bearer " + token}
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    ttl = auth_cache.ttl
+    with TestClient(main.app) as client:
+        for name, cache_ttl in (("no cache", 0), ("cache", ttl or 60)):
+            auth_cache.ttl = cache_ttl
+            auth_cache.clear()
+            client.get("/api/favorites/", headers=headers)
+
+            # The dependency on its own, then the full request
+            db = SessionLocal()
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                verify_principal(credentials, db)
+            per_call = (time.perf_counter() - started) / args.requests * 1e6
+            db.close()
+
+            statements[0] = 0
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.get("/api/favorites/", headers=headers)
+            elapsed = time.perf_counter() - started
+            print(f"{name:>8}: verify_principal {per_call:7.1f} us/call  "
+                  f"{args.requests / elapsed:8.1f} req/s  {statements[0] / args.requests:.1f} statements/request")
+    auth_cache.ttl = ttl
+    print("cache counters:", auth_cache.stats())
+
+
+if __name__ == "__main__":
+    main_()
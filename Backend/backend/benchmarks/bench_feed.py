@@ -0,0 +1,105 @@
+"""Per-page latency of the combined feed: keyset cursor vs. offset paging.
+
+    python -m benchmarks.bench_feed [--articles 100000] [--admin 5000]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set), then reads one
+page at increasing depths. Keyset pages should cost the same at any depth.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import insert
+
+from app.database import Base, SessionLocal, engine
+from app.feed import Cursor, feed_page
+from app.models import Article, FeedEntry
+
+QUERY = "technology"
+
+
+def seed(articles: int, admin: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        batch, entries = [], []
+        for i in range(articles + admin):
+            article_id = str(uuid.uuid4())
+            published_at = start + timedelta(minutes=i)
+            is_admin = i % max(1, (articles + admin) // max(1, admin)) == 0 and admin > 0
+            batch.append({
+                "id": article_id,
+                "title": f"Article {i}",
+                "description": "description " * 10,
+                "content": "content " * 200,
+                "source": "admin" if is_admin else "Bench",
+                "url": f"https://example.com/{i}",
+                "published_at": published_at,
+                "created_at": published_at,
+            })
+            if not is_admin:
+                entries.append({"query": QUERY, "article_id": article_id, "published_at": published_at})
+            if len(batch) >= 5000:
+                conn.execute(insert(Article), batch)
+                conn.execute(insert(FeedEntry), entries)
+                batch, entries = [], []
+        if batch:
+            conn.execute(insert(Article), batch)
+        if entries:
+            conn.execute(insert(FeedEntry), entries)
+
+
+def legacy_page(db, limit: int, offset: int):
+    """The original approach: load every admin article and sort/slice in Python"""
+    admin = db.query(Article).filter(Article.source == "admin").all()
+    admin.sort(key=lambda a: a.published_at, reverse=True)
+    return admin[offset:offset + limit]
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            fn(db)
+            samples.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--admin", type=int, default=5_000)
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.articles} ingested + {args.admin} admin articles...")
+    seed(args.articles, args.admin)
+
+    total = args.articles + args.admin
+    db = SessionLocal()
+    ordered = db.query(Article.id, Article.published_at).order_by(Article.published_at.desc(), Article.id.desc())
+    print(f"{'depth':>8} {'cursor ms':>10} {'offset ms':>10} {'legacy ms':>10}")
+    for depth in (0, 1_000, 10_000, total // 2, total - args.limit * 2):
+        row = ordered.offset(depth - 1).first() if depth else None
+        cursor = Cursor(row.published_at, row.id) if row else None
+        keyset = timed(lambda s: feed_page(s, QUERY, args.limit, cursor=cursor), args.repeat)
+        offset = timed(lambda s: feed_page(s, QUERY, args.limit, offset=depth), args.repeat)
+        legacy = timed(lambda s: legacy_page(s, args.limit, depth), args.repeat)
+        print(f"{depth:>8} {keyset:>10.2f} {offset:>10.2f} {legacy:>10.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Home page loads with and without the materialized featured article and feed.
+
+    python -m benchmarks.bench_hot [--visits 300] [--concurrency 20] [--latency 0.2]
+
+A home page load is ``/api/news/featured`` followed by ``/api/news/?limit=6``.
+The API runs under uvicorn against a FakeNewsAPI answering after
+``--latency`` seconds, with the NewsAPI response cache and the rendered HTTP
+cache disabled (as when their entries have just expired), once with
+HOT_CONTENT_ENABLED=false and once with it on.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import percentile, start_api, stop_api
+from benchmarks.fake_upstream import FakeNewsAPI
+
+
+async def drive(port: int, visits: int, concurrency: int) -> dict:
+    latencies, hits = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        async def visit():
+            nonlocal hits
+            async with semaphore:
+                started = time.perf_counter()
+                featured = await client.get("/api/news/featured")
+                feed = await client.get("/api/news/", params={"limit": 6})
+                latencies.append(time.perf_counter() - started)
+                hits += ("age" in featured.headers) + ("age" in feed.headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(visit() for _ in range(visits)))
+        elapsed = time.perf_counter() - started
+    return {
+        "visits_per_s": visits / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "hit_rate": hits / (2 * visits),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--visits", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8042)
+    args = parser.parse_args()
+
+    fake = FakeNewsAPI()
+    base_url = fake.start()
+    fake.configure(latency=args.latency)
+    print(f"{'hot content':>12} {'visits/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'hit rate':>9} {'upstream':>9}")
+    try:
+        for enabled in (False, True):
+            proc = start_api(
+                args.port,
+                NEWS_SOURCE="upstream",
+                NEWSAPI_BASE_URL=base_url,
+                NEWSAPI_CACHE_TTL=0,
+                NEWSAPI_CACHE_QUERY_TTLS="",
+                NEWSAPI_RATE_LIMIT=0,
+                HTTP_RESPONSE_CACHE_TTL=0,
+                HOT_CONTENT_ENABLED=str(enabled).lower(),
+            )
+            try:
+                time.sleep(1)  # First refresh
+                calls = fake.calls
+                result = asyncio.run(drive(args.port, args.visits, args.concurrency))
+                print(f"{'on' if enabled else 'off':>12} {result['visits_per_s']:>9.1f} {result['p50'] * 1000:>8.0f} "
+                      f"{result['p99'] * 1000:>8.0f} {result['hit_rate']:>9.0%} {fake.calls - calls:>9}")
+            finally:
+                stop_api(proc)
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
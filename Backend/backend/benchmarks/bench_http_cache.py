@@ -0,0 +1,136 @@
+"""Bytes and CPU saved by conditional GET under a replayed traffic trace.
+
+    python -m benchmarks.bench_http_cache [--requests 3000] [--users 20]
+
+Replays the same synthetic trace of frontend page loads (Home, Newsfeed,
+Favorites, Watch later, plus occasional saves and admin publishes) in-process
+against a seeded SQLite database, with and without HTTPCacheMiddleware.
+Clients remember the ETag of every URL and revalidate with If-None-Match, as
+a browser's HTTP cache does.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("NEWS_SOURCE", "database")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+
+from app.database import engine
+from app.http_cache import HTTPCacheMiddleware, http_cache
+from app.migrations import migrate
+from app.models import Article, Favorite, User
+from app.security import create_access_token
+import main
+
+ARTICLES = 2000
+
+
+def seed(users: int, saved: int) -> None:
+    migrate(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": f"user-{u}", "email": f"user{u}@example.com", "username": f"user{u}", "hashed_password": "x",
+             "is_admin": u == 0}
+            for u in range(users)
+        ])
+        conn.execute(insert(Article), [{
+            "id": f"article-{i}",
+            "title": f"Article {i}",
+            "description": "description " * 20,
+            "content": "content " * 300,
+            "source": "admin" if i % 10 == 0 else "Bench",
+            "url": f"https://example.com/{i}",
+            "published_at": start + timedelta(minutes=i),
+            "created_at": start,
+        } for i in range(ARTICLES)])
+        conn.execute(insert(Favorite), [
+            {"id": f"fav-{u}-{i}", "user_id": f"user-{u}", "article_id": f"article-{i}", "created_at": start + timedelta(seconds=i)}
+            for u in range(users) for i in range(saved)
+        ])
+
+
+def reset() -> None:
+    """Undo the trace's writes so both runs start from the same data"""
+    with engine.begin() as conn:
+        conn.execute(delete(Favorite).where(Favorite.id.not_like("fav-%")))
+        conn.execute(delete(Article).where(Article.url.like("%/new/%")))
+
+
+def trace(requests: int, users: int):
+    """(user, method, url, body) tuples in the proportions of the frontend's page loads"""
+    rng = random.Random(1)
+    pages = [
+        (30, lambda u: [("GET", "/api/news/featured", None), ("GET", "/api/news/?limit=6", None)]),
+        (25, lambda u: [("GET", f"/api/news/?limit=9&offset={rng.choice((0, 9, 18))}", None)]),
+        (25, lambda u: [("GET", "/api/favorites/", None)]),
+        (10, lambda u: [("GET", "/api/watchlater/", None)]),
+        (8, lambda u: [("POST", "/api/favorites/", {"article_id": f"article-{rng.randrange(ARTICLES)}"})]),
+        (2, lambda u: [("POST", "/api/admin/articles", {"title": "Breaking", "description": "d", "content": "c",
+                                                         "image_url": None, "url": f"https://example.com/new/{rng.random()}"})]),
+    ]
+    weights = [weight for weight, _ in pages]
+    out = []
+    while len(out) < requests:
+        user = rng.randrange(users)
+        _, make = rng.choices(pages, weights=weights)[0]
+        if make is pages[-1][1]:
+            user = 0
+        out.extend((user,) + step for step in make(user))
+    return out[:requests]
+
+
+def replay(client: TestClient, steps, tokens):
+    etags = {}
+    sent = not_modified = 0
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for user, method, url, body in steps:
+        headers = {"Authorization": "Bearer " + tokens[user]}
+        if method == "GET":
+            etag = etags.get((user, url))
+            if etag:
+                headers["If-None-Match"] = etag
+            response = client.get(url, headers=headers)
+            if response.status_code == 304:
+                not_modified += 1
+            elif "etag" in response.headers:
+                etags[(user, url)] = response.headers["etag"]
+        else:
+            response = client.post(url, json=body, headers=headers)
+        sent += len(response.content)
+    return sent, not_modified, time.process_time() - cpu, time.perf_counter() - wall
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--saved", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.users, args.saved)
+    tokens = [create_access_token({"sub": f"user-{u}"}, timedelta(hours=1)) for u in range(args.users)]
+    steps = trace(args.requests, args.users)
+    cached_middleware = list(main.app.user_middleware)
+
+    print(f"{'':>8} {'body MB':>9} {'304s':>6} {'cpu s':>7} {'wall s':>7}")
+    for name, enabled in (("off", False), ("on", True)):
+        main.app.user_middleware = [m for m in cached_middleware if enabled or m.cls is not HTTPCacheMiddleware]
+        main.app.middleware_stack = None
+        reset()
+        http_cache.invalidate()
+        with TestClient(main.app) as client:
+            sent, not_modified, cpu, wall = replay(client, steps, tokens)
+        print(f"{name:>8} {sent / 1e6:>9.2f} {not_modified:>6} {cpu:>7.2f} {wall:>7.2f}")
+    print("cache counters:", http_cache.stats())
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,114 @@
+"""Bulk article import throughput and server memory.
+
+    python -m benchmarks.bench_import [--rows 100000] [--single 500]
+
+Writes a ``--rows`` NDJSON file and a JSON array file of distinct articles,
+then streams each to ``POST /api/admin/articles/import`` on a uvicorn process,
+and re-sends the NDJSON file, whose rows are then all duplicates. For each
+import: rows/s and the server's peak resident memory (VmHWM) before and
+after, so growth shows what the import itself held. For comparison,
+``--single`` articles are created one request and one commit at a time
+through ``POST /api/admin/articles``.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import httpx
+import orjson
+
+from app.database import SessionLocal
+from app.models import User
+from app.security import create_access_token
+from benchmarks.common import start_api, stop_api
+
+CHUNK = 64 * 1024
+
+
+def write_files(directory: str, rows: int) -> dict:
+    def article(prefix: str, i: int) -> dict:
+        return {
+            "title": f"Backlog article {i}",
+            "description": "description " * 15,
+            "content": "content " * 60,
+            "image_url": f"https://example.com/{prefix}/{i}.jpg",
+            "url": f"https://example.com/{prefix}/{i}",
+            "published_at": "2024-05-01T12:00:00Z",
+        }
+
+    paths = {"ndjson": os.path.join(directory, "articles.ndjson"), "json": os.path.join(directory, "articles.json")}
+    with open(paths["ndjson"], "wb") as f:
+        for i in range(rows):
+            f.write(orjson.dumps(article("nd", i)) + b"\n")
+    with open(paths["json"], "wb") as f:
+        f.write(b"[")
+        for i in range(rows):
+            f.write((b"," if i else b"") + orjson.dumps(article("js", i)))
+        f.write(b"]")
+    return paths
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def stream(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--single", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8044)
+    args = parser.parse_args()
+
+    paths = write_files(tempfile.mkdtemp(), args.rows)
+    proc = start_api(args.port, NEWS_SOURCE="database", HOT_CONTENT_ENABLED="false")
+    try:
+        with SessionLocal() as db:
+            db.add(User(id="admin-0", email="admin@example.com", username="admin", hashed_password="x", is_admin=True))
+            db.commit()
+        token = create_access_token({"sub": "admin-0"}, timedelta(hours=1))
+        client = httpx.Client(base_url=f"http://127.0.0.1:{args.port}", headers={"Authorization": f"Bearer {token}"}, timeout=None)
+
+        print(f"{'import':>22} {'rows':>8} {'seconds':>8} {'rows/s':>8} {'inserted':>9} {'peak MB':>8} {'growth MB':>10}")
+        cases = (
+            ("ndjson", paths["ndjson"], "application/x-ndjson"),
+            ("json array", paths["json"], "application/json"),
+            ("ndjson, all duplicates", paths["ndjson"], "application/x-ndjson"),
+        )
+        for name, path, content_type in cases:
+            before = peak_rss_mb(proc.pid)
+            started = time.perf_counter()
+            response = client.post("/api/admin/articles/import", content=stream(path), headers={"Content-Type": content_type})
+            elapsed = time.perf_counter() - started
+            report = response.json()
+            after = peak_rss_mb(proc.pid)
+            print(f"{name:>22} {report['rows']:>8} {elapsed:>8.1f} {report['rows'] / elapsed:>8.0f} "
+                  f"{report['inserted']:>9} {after:>8.0f} {after - before:>10.1f}")
+
+        started = time.perf_counter()
+        for i in range(args.single):
+            client.post("/api/admin/articles", json={
+                "title": f"Single {i}", "description": None, "content": "content " * 60,
+                "image_url": None, "url": f"https://example.com/single/{i}",
+            }).raise_for_status()
+        elapsed = time.perf_counter() - started
+        print(f"{'one POST per article':>22} {args.single:>8} {elapsed:>8.1f} {args.single / elapsed:>8.0f}")
+    finally:
+        stop_api(proc)
+
+
+if __name__ == "__main__":
+    main()
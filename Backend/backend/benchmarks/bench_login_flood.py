@@ -0,0 +1,86 @@
+"""Feed latency during a concurrent login flood: inline bcrypt vs. the hashing process pool.
+
+    python -m benchmarks.bench_login_flood [--logins 120] [--concurrency 40]
+
+Runs the API under uvicorn twice, once with PASSWORD_HASH_WORKERS=0 (bcrypt
+in the request threadpool) and once with the process pool. Each run samples
+GET /api/news/ latency while logins are flooding the server.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import percentile, start_api, stop_api
+
+USER = {"email": "flood@example.com", "username": "flood", "password": "correct horse battery"}
+
+
+async def sample_feed(client: httpx.AsyncClient, stop: asyncio.Event, samples: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/news/", params={"limit": 6})
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.02)
+
+
+async def run(port: int, logins: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency + 10)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        await client.post("/api/auth/signup", json=USER)
+
+        idle = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_feed(client, stop, idle))
+        await asyncio.sleep(1)
+        stop.set()
+        await sampler
+
+        statuses = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/api/auth/login", json={"email": USER["email"], "password": USER["password"]})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        busy = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_feed(client, stop, busy))
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    return {
+        "idle_p50_ms": statistics.median(idle) * 1000,
+        "flood_p50_ms": statistics.median(busy) * 1000 if busy else 0.0,
+        "flood_p95_ms": percentile(busy, 0.95) * 1000,
+        "logins_per_s": logins / elapsed,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=120)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    for name, workers, port in (("inline", 0, 8771), ("pool", args.workers, 8772)):
+        proc = start_api(port, NEWS_SOURCE="database", PASSWORD_HASH_WORKERS=workers, RATE_LIMIT_ENABLED="false")
+        try:
+            result = asyncio.run(run(port, args.logins, args.concurrency))
+        finally:
+            stop_api(proc)
+        print(f"{name:>6}: feed p50 idle {result['idle_p50_ms']:6.1f} ms, during flood p50 {result['flood_p50_ms']:7.1f} ms "
+              f"p95 {result['flood_p95_ms']:7.1f} ms | {result['logins_per_s']:5.1f} logins/s {result['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Overhead of the request instrumentation (METRICS_ENABLED) on list endpoints.
+
+    python -m benchmarks.bench_metrics [--rounds 100] [--repeats 15]
+
+Serves the same seeded SQLite rows in-process from apps built by
+``main.create_app`` with metrics off, on, and on with ``Server-Timing``, with
+the HTTP cache middleware removed so that every request runs the handler.
+The modes take turns within each repeat so that machine noise spreads evenly.
+Turning metrics on installs engine-wide listeners for the life of the process,
+so "off" here also pays their (no-op) dispatch and slightly overstates what a
+disabled deployment costs.
+
+Also times the hooks that stay on the request path when metrics are off
+(serialization and NewsAPI attempts), per call.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("NEWS_SOURCE", "database")
+os.environ.setdefault("HOT_CONTENT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import engine
+from app.http_cache import HTTPCacheMiddleware
+from app.metrics import observe_serialize, request_metrics
+from app.migrations import migrate
+from app.models import Article, Favorite, User
+from app.security import create_access_token
+import main
+
+ARTICLES = 500
+URLS = ("/api/news/?limit=20", "/api/favorites/?limit=50")
+
+
+def seed() -> None:
+    migrate(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": "user-0", "email": "user0@example.com", "username": "user0", "hashed_password": "x"}])
+        conn.execute(insert(Article), [{
+            "id": f"article-{i}",
+            "title": f"Article {i}",
+            "description": "description " * 20,
+            "source": "admin",
+            "image_url": f"https://example.com/{i}.jpg",
+            "url": f"https://example.com/{i}",
+            "published_at": start + timedelta(minutes=i),
+            "created_at": start,
+        } for i in range(ARTICLES)])
+        conn.execute(insert(Favorite), [
+            {"id": f"fav-{i}", "user_id": "user-0", "article_id": f"article-{i}", "created_at": start + timedelta(seconds=i)}
+            for i in range(100)
+        ])
+
+
+def build(**overrides):
+    app = main.create_app(settings.model_copy(update=overrides))
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not HTTPCacheMiddleware]
+    return app
+
+
+def throughput(apps: dict, headers: dict, rounds: int, repeats: int) -> dict:
+    """Median req/s by mode and URL"""
+    samples = {(name, url): [] for name in apps for url in URLS}
+    clients = {name: TestClient(app) for name, app in apps.items()}
+    for client in clients.values():
+        client.__enter__()
+    try:
+        for url in URLS:
+            for client in clients.values():
+                client.get(url, headers=headers).raise_for_status()
+            for _ in range(repeats):
+                for name, client in clients.items():
+                    started = time.perf_counter()
+                    for _ in range(rounds):
+                        client.get(url, headers=headers)
+                    samples[name, url].append(rounds / (time.perf_counter() - started))
+    finally:
+        for client in clients.values():
+            client.__exit__(None, None, None)
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def hook_cost(calls: int = 200_000) -> dict:
+    """Nanoseconds per call of the hooks with no request being instrumented"""
+    costs = {}
+    for name, hook in (
+        ("observe_serialize", lambda: observe_serialize(0.001)),
+        ("observe_upstream", lambda: request_metrics.observe_upstream(0.001, ok=True)),
+    ):
+        started = time.perf_counter()
+        for _ in range(calls):
+            hook()
+        costs[name] = (time.perf_counter() - started) / calls * 1e9
+    return costs
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=15)
+    args = parser.parse_args()
+
+    seed()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "user-0"}, timedelta(hours=1))}
+    for name, ns in hook_cost().items():
+        print(f"metrics off: {name} {ns:.0f} ns/call")
+
+    apps = {
+        "off": build(METRICS_ENABLED=False),
+        "on": build(METRICS_ENABLED=True),
+        "on + Server-Timing": build(METRICS_ENABLED=True, METRICS_SERVER_TIMING=True),
+    }
+    results = throughput(apps, headers, args.rounds, args.repeats)
+    print(f"{'metrics':>20}" + "".join(f"{url:>26}" for url in URLS) + "   (req/s, median)")
+    for name in apps:
+        print(f"{name:>20}" + "".join(
+            f"{results[name, url]:>17.0f} ({results[name, url] / results['off', url] - 1:+.1%})" for url in URLS
+        ))
+
+if __name__ == "__main__":
+    main_()
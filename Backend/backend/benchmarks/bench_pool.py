@@ -0,0 +1,67 @@
+"""Exercise connection pool saturation and print the pool stats surface.
+
+    python -m benchmarks.bench_pool [--workers 12] [--hold 0.2]
+
+Uses a throwaway SQLite file with a deliberately small pool (2 + 2 overflow,
+0.5 s timeout) so that holding connections from many threads causes waits and
+timeouts, which show up in the checkout wait histogram.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("DB_POOL_SIZE", "2")
+os.environ.setdefault("DB_MAX_OVERFLOW", "2")
+os.environ.setdefault("DB_POOL_TIMEOUT", "0.5")
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import SessionLocal, database_pool_stats
+
+
+def worker(hold: float, rounds: int, results: dict, lock: threading.Lock) -> None:
+    for _ in range(rounds):
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            time.sleep(hold)
+            outcome = "ok"
+        except PoolTimeoutError:
+            outcome = "timeout"
+        finally:
+            db.close()
+        with lock:
+            results[outcome] = results.get(outcome, 0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--hold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=worker, args=(args.hold, args.rounds, results, lock)) for _ in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Sample the pool while it is saturated
+    time.sleep(args.hold / 2)
+    busy = database_pool_stats()["primary"]
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.workers} workers x {args.rounds} rounds in {time.perf_counter() - started:.2f}s: {results}")
+    print("while saturated:", json.dumps({k: busy[k] for k in ("checked_out", "overflow", "size")}))
+    print(json.dumps(database_pool_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
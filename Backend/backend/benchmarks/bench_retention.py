@@ -0,0 +1,139 @@
+"""Article retention: archive throughput, space reclaimed and effect on requests.
+
+    python -m benchmarks.bench_retention [--articles 100000] [--users 200] [--clients 8]
+        [--seconds 10] [--batch-size 500] [--batch-pause 0.05] [--archive table]
+
+Seeds a throwaway SQLite database (``benchmarks.seed``), whose articles span
+a year, and runs the API on it. ``--clients`` clients page the combined feed
+and favorite random articles, first for ``--seconds`` with no archiver, then
+while one retention run, in this process as ``archive.py`` would run it,
+archives everything published more than 180 days before the last article.
+Reports request latency in both windows, articles archived per second, bytes
+reclaimed (estimated, and the pages SQLite freed for reuse), archive bytes,
+batches rolled back by concurrent saves, and checks that no saved article and
+no admin article was removed.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+DATABASE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + DATABASE
+
+import httpx
+
+from app.retention import Archiver
+from app.security import create_access_token
+from benchmarks.common import percentile, start_api, stop_api
+from benchmarks.seed import FEED_QUERIES, START, seed
+
+PORT = 8780
+BASE = f"http://127.0.0.1:{PORT}"
+
+
+async def client_loop(client: httpx.AsyncClient, token: str, articles: int, rng: random.Random, latencies: list,
+                      statuses: Counter, done: asyncio.Event) -> None:
+    headers = {"Authorization": "Bearer " + token}
+    while not done.is_set():
+        started = time.perf_counter()
+        if rng.random() < 0.2:
+            response = await client.post("/api/favorites/", json={"article_id": f"article-{rng.randrange(articles)}"}, headers=headers)
+        else:
+            response = await client.get("/api/news/combined", params={"query": rng.choice(FEED_QUERIES), "limit": 15}, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] += 1
+
+
+async def load(name: str, args, tokens, work=None) -> dict:
+    """Drive the clients for ``--seconds``, or until ``work`` (run in a thread) returns"""
+    latencies, statuses, done = [], Counter(), asyncio.Event()
+    async with httpx.AsyncClient(base_url=BASE, timeout=30) as client:
+        clients = [
+            asyncio.create_task(client_loop(client, tokens[i % len(tokens)], args.articles, random.Random(f"{name}-{i}"), latencies, statuses, done))
+            for i in range(args.clients)
+        ]
+        started = time.perf_counter()
+        result = None
+        if work is None:
+            await asyncio.sleep(args.seconds)
+        else:
+            result = await asyncio.to_thread(work)
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*clients)
+    return {"latencies": latencies, "statuses": statuses, "seconds": elapsed, "result": result}
+
+
+def freed_bytes() -> int:
+    with sqlite3.connect(DATABASE) as conn:
+        return conn.execute("PRAGMA freelist_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+
+def missing_kept_articles() -> int:
+    with sqlite3.connect(DATABASE) as conn:
+        return conn.execute(
+            "SELECT (SELECT count(*) FROM favorites f WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = f.article_id))"
+            " + (SELECT count(*) FROM watch_later w WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = w.article_id))"
+        ).fetchone()[0]
+
+
+def count(sql: str) -> int:
+    with sqlite3.connect(DATABASE) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def report(name: str, window: dict) -> None:
+    latencies = window["latencies"]
+    print(f"{name:>16} {len(latencies) / window['seconds']:>8.0f} req/s  p50 {percentile(latencies, 0.5) * 1000:>6.1f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1000:>7.1f} ms  max {max(latencies) * 1000:>7.1f} ms  {dict(window['statuses'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--saved-per-user", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--batch-pause", type=float, default=0.05)
+    parser.add_argument("--archive", choices=("table", "file", "none"), default="table")
+    args = parser.parse_args()
+
+    seed(args.users, args.articles, args.saved_per_user)
+    admin_articles = count("SELECT count(*) FROM articles WHERE source = 'admin'")
+    archiver = Archiver(
+        max_age_days=180, archive=args.archive, archive_dir=os.path.dirname(DATABASE), batch_size=args.batch_size,
+        batch_pause=args.batch_pause, max_batches=10 ** 9, clock=lambda: START + timedelta(days=365),
+    )
+    tokens = [create_access_token({"sub": f"user-{i}"}, timedelta(hours=1)) for i in range(args.users)]
+    proc = start_api(PORT, DATABASE_URL=os.environ["DATABASE_URL"], NEWS_SOURCE="database", HOT_CONTENT_ENABLED="false",
+                     RATE_LIMIT_ENABLED="false", STREAM_POLL_INTERVAL="0")
+    try:
+        before = count("SELECT count(*) FROM articles")
+        idle = asyncio.run(load("idle", args, tokens))
+        busy = asyncio.run(load("busy", args, tokens, archiver.run_once))
+    finally:
+        stop_api(proc)
+
+    run = busy["result"]
+    print(f"{'':>16} articles {before} -> {count('SELECT count(*) FROM articles')}, batch size {args.batch_size}, "
+          f"pause {args.batch_pause * 1000:g} ms, archive: {args.archive}")
+    report("no retention", idle)
+    report("during retention", busy)
+    print(f"archived {run.archived} articles in {run.batches} batches, {run.seconds:.1f} s ({run.archived / run.seconds:.0f}/s), "
+          f"{run.conflicts} batches rolled back by saves")
+    print(f"reclaimed ~{run.row_bytes / 2 ** 20:.1f} MiB of rows ({freed_bytes() / 2 ** 20:.1f} MiB of pages freed for reuse), "
+          f"{run.archive_bytes / 2 ** 20:.1f} MiB archived")
+    kept_admin = count("SELECT count(*) FROM articles WHERE source = 'admin'")
+    print(f"saved articles missing: {missing_kept_articles()}, admin articles kept: {kept_admin}/{admin_articles}")
+
+
+if __name__ == "__main__":
+    main()
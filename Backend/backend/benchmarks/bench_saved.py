@@ -0,0 +1,172 @@
+"""List and add latency, payload size and memory of saved items for users with large lists.
+
+    python -m benchmarks.bench_saved [--users 10] [--items 10000]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) where every
+user has ``--items`` favorites, then:
+
+- times listing one user's favorites and adding a new one, first without the
+  saved-item indexes and with the original check-then-insert add, then with
+  the indexes from migration 0003 and the single-statement idempotent insert;
+- compares the original unpaginated list with one summary page and one full
+  page: JSON payload size and peak Python memory while building it (latency in
+  this table is inflated by tracemalloc).
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, insert
+from sqlalchemy.orm import joinedload
+
+from app.auth_cache import Principal
+from app.database import Base, SessionLocal, engine
+from app.models import Article, Favorite, User
+from app.routes.favorites import FAVORITES
+from app.routes.saved import list_items
+from app.saved import save_item
+from app.schemas import FavoriteResponse, serialize
+
+SAVED_INDEXES = list(Favorite.__table__.indexes)
+
+
+def seed(users: int, items: int, spare: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": f"user-{u}", "email": f"user{u}@example.com", "username": f"user{u}", "hashed_password": "x"}
+            for u in range(users)
+        ])
+        articles = [{
+            "id": f"article-{i}",
+            "title": f"Article {i}",
+            "description": "description " * 10,
+            "content": "content " * 200,
+            "source": "Bench",
+            "url": f"https://example.com/{i}",
+            "published_at": start + timedelta(minutes=i),
+            "created_at": start,
+        } for i in range(items + spare)]
+        for offset in range(0, len(articles), 5000):
+            conn.execute(insert(Article), articles[offset:offset + 5000])
+        for u in range(users):
+            conn.execute(insert(Favorite), [{
+                "id": str(uuid.uuid4()),
+                "user_id": f"user-{u}",
+                "article_id": f"article-{i}",
+                "created_at": start + timedelta(seconds=i),
+            } for i in range(items)])
+
+
+def legacy_add(db, user_id: str, article_id: str):
+    """The original add: look up the article, look for a duplicate, insert, refresh"""
+    if db.query(Article).filter(Article.id == article_id).first() is None:
+        return None
+    if db.query(Favorite).filter((Favorite.user_id == user_id) & (Favorite.article_id == article_id)).first():
+        return None
+    favorite = Favorite(user_id=user_id, article_id=article_id)
+    db.add(favorite)
+    db.commit()
+    db.refresh(favorite)
+    return favorite
+
+
+def legacy_list(db, user_id: str):
+    """The original list: every favorite with its full article"""
+    favorites = db.query(Favorite).options(joinedload(Favorite.article)).filter(Favorite.user_id == user_id).all()
+    return serialize(List[FavoriteResponse], favorites)
+
+
+def measure_payload(fn):
+    """Milliseconds, JSON bytes and peak traced memory (MB) of building one response"""
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        body = json.dumps(jsonable_encoder(fn(db))).encode()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        db.close()
+    return elapsed * 1000, len(body), peak / 1e6
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for i in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            fn(db, i)
+            samples.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.users} users x {args.items} favorites...")
+    seed(args.users, args.items, spare=args.repeat * 2)
+
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+    user = Principal(id="user-0", username="user0", is_admin=False)
+    spare = iter(range(args.items, args.items + args.repeat * 2))
+
+    print(f"{'':>10} {'list ms':>10} {'add ms':>10} {'add stmts':>10}")
+    def list_page(db, fields: str = "summary"):
+        return list_items(FAVORITES, user, db, limit=50, cursor=None, fields=fields)
+
+    for name, indexed, add in (("before", False, legacy_add), ("after", True, None)):
+        for index in SAVED_INDEXES:
+            if indexed:
+                index.create(bind=engine, checkfirst=True)
+            else:
+                index.drop(bind=engine, checkfirst=True)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        listed = timed(lambda db, i: legacy_list(db, user.id) if add else list_page(db), max(1, args.repeat // 4))
+
+        def add_one(db, i):
+            article_id = f"article-{next(spare)}"
+            if add is None:
+                save_item(db, Favorite, user.id, article_id)
+            else:
+                add(db, user.id, article_id)
+
+        statements[0] = 0
+        added = timed(add_one, args.repeat)
+        print(f"{name:>10} {listed:>10.2f} {added:>10.2f} {statements[0] / args.repeat:>10.1f}")
+
+    print(f"\n{'list':>14} {'ms':>10} {'bytes':>12} {'peak MB':>10}")
+    for name, fn in (
+        ("all, full", lambda db: legacy_list(db, user.id)),
+        ("page, summary", lambda db: list_page(db)),
+        ("page, full", lambda db: list_page(db, "full")),
+    ):
+        elapsed, size, peak = measure_payload(fn)
+        print(f"{name:>14} {elapsed:>10.2f} {size:>12,} {peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Queries and latency to show saved state on a feed page, and to apply many toggles.
+
+    python -m benchmarks.bench_saved_state [--saved 1000] [--toggles 20] [--rounds 50]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with a
+"technology" feed and one user with ``--saved`` favorites and as many
+watch-later items, then serves it in-process with the HTTP cache and the rate
+limiter left out so that every request runs its handler. Compares:
+
+- a 50-article feed page joined client-side against the full favorites and
+  watch-later lists (paged 200 at a time), with the same page fetched with
+  ``saved_state=true``;
+- ``--toggles`` favorites added one POST at a time, with one batch request.
+
+Queries are counted per request cycle with a cursor-execute listener.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("NEWS_SOURCE", "database")
+os.environ.setdefault("HOT_CONTENT_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, insert
+
+from app.database import engine
+from app.http_cache import HTTPCacheMiddleware
+from app.migrations import migrate
+from app.models import Article, Favorite, FeedEntry, User, WatchLater
+from app.security import create_access_token
+import main
+
+ARTICLES = 5000
+PAGE = 50
+
+
+def seed(saved: int) -> None:
+    migrate(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": "user-0", "email": "user0@example.com", "username": "user0", "hashed_password": "x"}])
+        conn.execute(insert(Article), [{
+            "id": f"article-{i}",
+            "title": f"Article {i}",
+            "description": "description " * 20,
+            "source": "Bench",
+            "url": f"https://example.com/{i}",
+            "published_at": start + timedelta(minutes=i),
+            "created_at": start,
+        } for i in range(ARTICLES)])
+        conn.execute(insert(FeedEntry), [
+            {"query": "technology", "article_id": f"article-{i}", "published_at": start + timedelta(minutes=i)}
+            for i in range(ARTICLES)
+        ])
+        for model, prefix, step in ((Favorite, "fav", 3), (WatchLater, "later", 5)):
+            conn.execute(insert(model), [{
+                "id": f"{prefix}-{i}", "user_id": "user-0",
+                "article_id": f"article-{ARTICLES - 1 - i * step}", "created_at": start + timedelta(seconds=i),
+            } for i in range(min(saved, ARTICLES // step))])
+
+
+class Counter:
+    """Requests sent and queries executed"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        event.listen(engine, "before_cursor_execute", self._query)
+
+    def _query(self, *args):
+        self.queries += 1
+
+
+def measure(fn, rounds: int, counter: Counter, reset=None):
+    """(median ms, requests and queries per call)"""
+    samples, requests, queries = [], 0, 0
+    for _ in range(rounds):
+        if reset is not None:
+            reset()
+        before = counter.requests, counter.queries
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+        requests, queries = counter.requests - before[0], counter.queries - before[1]
+    return statistics.median(samples), requests, queries
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--saved", type=int, default=1000)
+    parser.add_argument("--toggles", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.saved)
+    app = main.create_app()
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not HTTPCacheMiddleware]
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "user-0"}, timedelta(hours=1))}
+    counter = Counter()
+
+    with TestClient(app) as client:
+        def get(url):
+            counter.requests += 1
+            response = client.get(url, headers=headers)
+            response.raise_for_status()
+            return response
+
+        def post(url, body):
+            counter.requests += 1
+            client.post(url, json=body, headers=headers).raise_for_status()
+
+        def all_pages(path):
+            ids, cursor = set(), None
+            while True:
+                response = get(path + "?limit=200" + (f"&cursor={cursor}" if cursor else ""))
+                ids.update(item["article_id"] for item in response.json())
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor:
+                    return ids
+
+        def client_side_join():
+            page = get(f"/api/news/combined?limit={PAGE}").json()
+            favorites, watch_later = all_pages("/api/favorites/"), all_pages("/api/watchlater/")
+            return [dict(a, is_favorite=a["id"] in favorites, in_watch_later=a["id"] in watch_later) for a in page]
+
+        def saved_state():
+            return get(f"/api/news/combined?limit={PAGE}&saved_state=true").json()
+
+        assert client_side_join() == saved_state()
+        toggled = [f"article-{i}" for i in range(args.toggles)]
+
+        def unsave():
+            with engine.begin() as conn:
+                conn.execute(delete(Favorite).where(Favorite.article_id.in_(toggled)))
+
+        def one_by_one():
+            for article_id in toggled:
+                post("/api/favorites/", {"article_id": article_id})
+
+        def batch():
+            post("/api/favorites/batch", {"add": toggled})
+
+        print(f"{'':>40} {'requests':>9} {'queries':>8} {'ms':>8}")
+        for name, fn, reset in (
+            (f"{PAGE}-article page + client-side join", client_side_join, None),
+            (f"{PAGE}-article page, saved_state=true", saved_state, None),
+            (f"{args.toggles} favorites, one POST each", one_by_one, unsave),
+            (f"{args.toggles} favorites, one batch", batch, unsave),
+        ):
+            ms, requests, queries = measure(fn, args.rounds, counter, reset)
+            print(f"{name:>40} {requests:>9} {queries:>8} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,104 @@
+"""Latency percentiles of local full-text search vs. a LIKE scan.
+
+    python -m benchmarks.bench_search [--articles 1000000] [--queries 200]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with synthetic
+articles drawn from a Zipf-like vocabulary, applies the migrations (which
+build the FTS5 index, or the tsvector column and GIN index on PostgreSQL), and
+times ``search_articles`` for common, rare and multi-term queries.
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article
+from app.search import _search_like, rebuild_search_index, search_articles
+from benchmarks.common import percentile
+
+VOCABULARY = [f"word{i}" for i in range(20_000)]
+# Zipf-like: word i is drawn with weight 1 / (i + 1)
+CUM_WEIGHTS = list(itertools.accumulate(1 / (i + 1) for i in range(len(VOCABULARY))))
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=count))
+
+
+def seed(articles: int) -> None:
+    migrate(engine)
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        batch = []
+        for i in range(articles):
+            batch.append({
+                "id": f"article-{i}",
+                "title": words(rng, 8),
+                "description": words(rng, 25),
+                "content": words(rng, 60),
+                "source": "Bench",
+                "url": f"https://example.com/{i}",
+                "published_at": start + timedelta(seconds=i),
+                "created_at": start,
+            })
+            if len(batch) >= 10_000:
+                conn.execute(insert(Article), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Article), batch)
+        rebuild_search_index(conn)
+
+
+def run(search, queries, limit: int):
+    samples = []
+    db = SessionLocal()
+    try:
+        for query in queries:
+            started = time.perf_counter()
+            search(db, query, limit)
+            samples.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--like-queries", type=int, default=10, help="LIKE scans are slow; run fewer")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.articles} articles...")
+    started = time.perf_counter()
+    seed(args.articles)
+    print(f"  {time.perf_counter() - started:.0f} s")
+
+    rng = random.Random(7)
+    kinds = {
+        "common": lambda: rng.choice(VOCABULARY[:20]),
+        "rare": lambda: rng.choice(VOCABULARY[5_000:]),
+        "two terms": lambda: f"{rng.choice(VOCABULARY[:200])} {rng.choice(VOCABULARY[:2_000])}",
+    }
+    print(f"{'query':>10} {'engine':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for kind, make in kinds.items():
+        queries = [make() for _ in range(args.queries)]
+        for name, search, count in (("fts", search_articles, args.queries), ("like", _search_like, args.like_queries)):
+            samples = run(search, queries[:count], args.limit)
+            print(f"{kind:>10} {name:>8} {percentile(samples, 0.5) * 1000:>9.2f} "
+                  f"{percentile(samples, 0.95) * 1000:>9.2f} {percentile(samples, 0.99) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cost of turning a feed or saved-list page into JSON bytes.
+
+    python -m benchmarks.bench_serialize [--limit 50] [--rounds 200]
+
+Compares, on the same seeded SQLite rows:
+
+- ``response_model``: ORM instances validated against the response model, run
+  through ``jsonable_encoder`` and ``json.dumps`` (what FastAPI does when a
+  handler returns objects and lets ``response_model`` encode them);
+- ``render``: column rows validated and dumped straight to bytes by
+  pydantic-core (``app.schemas.render``).
+
+Then reports requests per second for the list endpoints in-process, with the
+HTTP cache middleware removed so that every request is rendered.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("NEWS_SOURCE", "database")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.orm import contains_eager
+
+from app.database import SessionLocal, engine
+from app.feed import feed_page
+from app.http_cache import HTTPCacheMiddleware
+from app.migrations import migrate
+from app.models import Article, Favorite, User
+from app.saved import saved_page
+from app.schemas import ArticleResponse, FavoriteResponse, render
+from app.security import create_access_token
+import main
+
+ARTICLES = 2000
+
+
+def seed(saved: int) -> None:
+    migrate(engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": "user-0", "email": "user0@example.com", "username": "user0", "hashed_password": "x"}])
+        conn.execute(insert(Article), [{
+            "id": f"article-{i}",
+            "title": f"Article {i} " + "headline " * 8,
+            "description": "description " * 25,
+            "content": "content " * 500,
+            "source": "admin",
+            "image_url": f"https://example.com/{i}.jpg",
+            "url": f"https://example.com/{i}",
+            "published_at": start + timedelta(minutes=i),
+            "created_at": start,
+        } for i in range(ARTICLES)])
+        conn.execute(insert(Favorite), [
+            {"id": f"fav-{i}", "user_id": "user-0", "article_id": f"article-{i}", "created_at": start + timedelta(seconds=i)}
+            for i in range(saved)
+        ])
+
+
+def timed(fn, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def response_model_bytes(response_model, objects) -> bytes:
+    adapter = TypeAdapter(response_model)
+    return json.dumps(jsonable_encoder(adapter.validate_python(objects, from_attributes=True))).encode()
+
+
+def feed_orm(db, limit: int):
+    db.expunge_all()
+    stmt = select(Article).where(Article.source == "admin").order_by(Article.published_at.desc(), Article.id.desc())
+    return list(db.scalars(stmt.limit(limit)))
+
+
+def favorites_orm(db, limit: int):
+    db.expunge_all()
+    stmt = (
+        select(Favorite).join(Favorite.article).options(contains_eager(Favorite.article))
+        .where(Favorite.user_id == "user-0").order_by(Favorite.created_at.desc(), Favorite.id.desc())
+    )
+    return list(db.scalars(stmt.limit(limit)))
+
+
+def encoders(db, limit: int, rounds: int) -> None:
+    cases = {
+        "feed": (
+            lambda: response_model_bytes(List[ArticleResponse], feed_orm(db, limit)),
+            lambda: render(List[ArticleResponse], feed_page(db, "technology", limit)[0]).body,
+        ),
+        "favorites": (
+            lambda: response_model_bytes(List[FavoriteResponse], favorites_orm(db, limit)),
+            lambda: (db.expunge_all(), render(List[FavoriteResponse], saved_page(db, Favorite, "user-0", limit, full=True)[0]).body)[1],
+        ),
+    }
+    print(f"{'page':>10} {'response_model ms':>18} {'render ms':>10} {'speedup':>8}")
+    for name, (before, after) in cases.items():
+        assert json.loads(before()) == json.loads(after()), name
+        slow, fast = timed(before, rounds), timed(after, rounds)
+        print(f"{name:>10} {slow * 1000:>18.2f} {fast * 1000:>10.2f} {slow / fast:>7.1f}x")
+
+
+def endpoints(limit: int, rounds: int) -> None:
+    main.app.user_middleware = [m for m in main.app.user_middleware if m.cls is not HTTPCacheMiddleware]
+    main.app.middleware_stack = None
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "user-0"}, timedelta(hours=1))}
+    urls = [
+        f"/api/news/combined?limit={min(limit, 50)}",
+        f"/api/favorites/?limit={limit}",
+        f"/api/favorites/?limit={limit}&fields=full",
+    ]
+    print(f"{'endpoint':>40} {'req/s':>8}")
+    with TestClient(main.app) as client:
+        for url in urls:
+            client.get(url, headers=headers).raise_for_status()
+            print(f"{url:>40} {1 / timed(lambda: client.get(url, headers=headers), rounds):>8.0f}")
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--saved", type=int, default=500)
+    args = parser.parse_args()
+
+    seed(args.saved)
+    db = SessionLocal()
+    try:
+        encoders(db, args.limit, args.rounds)
+    finally:
+        db.close()
+    endpoints(args.limit, args.rounds)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,101 @@
+"""Cold-start cost of the API process: import time breakdown and time to first 200.
+
+    python -m benchmarks.bench_startup [--runs 5] [--top 15]
+
+Each run is a fresh interpreter, as on a container start or worker recycle:
+
+- ``python -X importtime -c "import main"``: total import time and the
+  top-level packages (and ``app.*`` modules) that contribute most, by
+  cumulative time at their first import;
+- ``uvicorn main:app``: wall time from spawning the process until ``GET /``
+  returns 200, lifespan startup included.
+
+Medians over ``--runs`` are printed; compare against the previous commit to
+catch regressions.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+    # No background work that would compete with startup
+    env.setdefault("NEWS_SOURCE", "database")
+    return env
+
+
+def import_profile(env: dict) -> dict:
+    """Cumulative microseconds per top-level package and ``app`` module, from one ``-X importtime`` run.
+
+    Each package is charged at its first import, wherever in the tree that happens, so
+    nested entries overlap: the list is a breakdown, not a partition of "main".
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name or name.startswith("app."):
+            totals[name] = int(cumulative)
+    return totals
+
+
+def first_200(env: dict, port: int) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("API exited during startup")
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8043)
+    args = parser.parse_args()
+
+    env = _env()
+    subprocess.run([sys.executable, "init_db.py"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    import_profile(env)  # Warm the bytecode cache
+
+    profiles = [import_profile(env) for _ in range(args.runs)]
+    medians = {name: statistics.median(p.get(name, 0) for p in profiles) for name in profiles[0]}
+    print(f"import main: {medians.pop('main') / 1000:.0f} ms (median of {args.runs})")
+    for name, micros in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<32} {micros / 1000:>7.1f} ms")
+
+    samples = [first_200(env, args.port) for _ in range(args.runs)]
+    print(f"time to first 200: {statistics.median(samples) * 1000:.0f} ms (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Idle cost and fan-out latency of the article stream.
+
+    python -m benchmarks.bench_stream [--subscribers 5000] [--idle 10] [--articles 20]
+
+Runs the API under uvicorn and opens ``--subscribers`` idle
+``/api/news/stream`` connections (raw sockets, so the client side stays
+cheap), then reports, against the server process: resident memory per
+open stream, CPU time and stream polls over ``--idle`` seconds with every
+stream open and with none (the database is polled once per interval however
+many streams there are), and how long each of ``--articles`` admin-created
+articles takes to reach every subscriber. The open file limit must allow
+``--subscribers`` connections on both sides.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sqlite3
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import cpu_seconds, percentile, rss_kb, start_api, stop_api
+
+PORT = 8770
+BASE = f"http://127.0.0.1:{PORT}"
+REQUEST = b"GET /api/news/stream HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n"
+
+
+class Subscriber:
+    """One idle stream; records when each article event arrives"""
+
+    def __init__(self):
+        self.received = {}  # Article number (in arrival order) -> perf_counter
+        self.events = 0
+        self.ready = asyncio.Event()
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+        writer.write(REQUEST)
+        buffered = b""
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                buffered += chunk
+                *complete, buffered = buffered.split(b"\n\n")
+                now = time.perf_counter()
+                for event in complete:
+                    # Bodies arrive in chunked transfer encoding; events are still whole within a chunk
+                    if b"retry:" in event:
+                        self.ready.set()
+                    elif b"event: article" in event:
+                        self.events += 1
+                        self.received[self.events] = now
+        finally:
+            writer.close()
+
+
+def admin_headers(database: str) -> dict:
+    with httpx.Client(base_url=BASE) as client:
+        client.post("/api/auth/signup", json={"email": "admin@example.com", "username": "admin", "password": "bench-password"}).raise_for_status()
+        with sqlite3.connect(database) as conn:
+            conn.execute("UPDATE users SET is_admin = 1")
+        token = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "bench-password"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def idle_window(pid: int, headers: dict, seconds: float):
+    """(CPU seconds, stream polls) over ``seconds``"""
+    async with httpx.AsyncClient(base_url=BASE) as client:
+        polls = (await client.get("/api/admin/stream", headers=headers)).json()["polls"]
+        cpu = cpu_seconds(pid)
+        await asyncio.sleep(seconds)
+        polls = (await client.get("/api/admin/stream", headers=headers)).json()["polls"] - polls
+    return cpu_seconds(pid) - cpu, polls
+
+
+async def run(pid: int, headers: dict, args):
+    baseline_rss = rss_kb(pid)
+    idle_cpu, idle_polls = await idle_window(pid, headers, args.idle)
+
+    subscribers = [Subscriber() for _ in range(args.subscribers)]
+    tasks = []
+    for start in range(0, len(subscribers), 500):
+        batch = subscribers[start:start + 500]
+        tasks += [asyncio.create_task(subscriber.run()) for subscriber in batch]
+        await asyncio.gather(*(subscriber.ready.wait() for subscriber in batch))
+    await asyncio.sleep(1)
+    per_stream = (rss_kb(pid) - baseline_rss) * 1024 / len(subscribers)
+    open_cpu, open_polls = await idle_window(pid, headers, args.idle)
+
+    latencies = []
+    async with httpx.AsyncClient(base_url=BASE, timeout=30) as client:
+        for i in range(1, args.articles + 1):
+            sent = time.perf_counter()
+            response = await client.post("/api/admin/articles", headers=headers, json={
+                "title": f"Article {i}", "description": "description", "content": "content",
+                "image_url": None, "url": f"https://example.com/stream/{i}",
+            })
+            response.raise_for_status()
+            while not all(i in subscriber.received for subscriber in subscribers):
+                await asyncio.sleep(0.005)
+            latencies.append(max(subscriber.received[i] for subscriber in subscribers) - sent)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"{'streams':>8} {'RSS MiB':>9} {'CPU s':>7} {'polls':>6}   (over {args.idle:g}s idle)")
+    print(f"{0:>8} {baseline_rss / 1024:>9.1f} {idle_cpu:>7.2f} {idle_polls:>6}")
+    print(f"{args.subscribers:>8} {(baseline_rss + per_stream * args.subscribers / 1024) / 1024:>9.1f} {open_cpu:>7.2f} {open_polls:>6}")
+    print(f"memory per open stream: {per_stream / 1024:.1f} KiB")
+    print(f"article reaches all {args.subscribers} streams (create request included): "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--idle", type=float, default=10)
+    parser.add_argument("--articles", type=int, default=20)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers + 1000)), hard))
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    proc = start_api(
+        PORT, DATABASE_URL="sqlite:///" + database, NEWS_SOURCE="database", HOT_CONTENT_ENABLED="false",
+        RATE_LIMIT_ENABLED="false", STREAM_POLL_INTERVAL="1", STREAM_HEARTBEAT="5",
+        STREAM_MAX_SUBSCRIBERS=str(args.subscribers + 100),
+    )
+    try:
+        asyncio.run(run(proc.pid, admin_headers(database), args))
+    finally:
+        stop_api(proc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Round trips per combined-feed page: per-URL lookups vs. the batched upsert service.
+
+    python -m benchmarks.bench_upsert [--articles 50] [--pages 20]
+
+Runs against a throwaway SQLite database unless DATABASE_URL points elsewhere.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import event
+
+from app.articles import normalize_article, upsert_articles
+from app.database import Base, SessionLocal, engine
+from app.models import Article
+
+
+class QueryCounter:
+    def __init__(self, bind):
+        self.count = 0
+        event.listen(bind, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def legacy_ingest(db, payloads):
+    """The original get_combined_news_feed loop: one SELECT per upstream article"""
+    articles, new_articles = [], []
+    for payload in payloads:
+        row = normalize_article(payload)
+        if not row:
+            continue
+        existing = db.query(Article).filter(Article.url == row["url"]).first()
+        if existing:
+            articles.append(existing)
+        else:
+            article = Article(**row)
+            new_articles.append(article)
+            articles.append(article)
+    if new_articles:
+        db.add_all(new_articles)
+        db.commit()
+    # Serialization touches every article, reloading the expired ones
+    for article in articles:
+        article.title
+    return articles
+
+
+def batched_ingest(db, payloads):
+    articles = upsert_articles(db, payloads)
+    for article in articles:
+        article.title
+    return articles
+
+
+def make_page(page: int, size: int, overlap: float) -> list:
+    # A fraction of each page repeats URLs from the previous page, like a live feed
+    start = int(page * size * (1 - overlap))
+    return [
+        {
+            "url": f"https://example.com/{i}",
+            "title": f"Article {i}",
+            "description": "desc",
+            "content": "content " * 50,
+            "publishedAt": "2024-05-01T12:00:00Z",
+            "source": {"name": "Bench"},
+        }
+        for i in range(start, start + size)
+    ]
+
+
+def run(name, ingest, args, counter):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    counter.count = 0
+    started = time.perf_counter()
+    for page in range(args.pages):
+        db = SessionLocal()
+        try:
+            ingest(db, make_page(page, args.articles, args.overlap))
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+    print(f"{name:>8}: {counter.count / args.pages:6.1f} round trips/page  {elapsed / args.pages * 1000:7.2f} ms/page")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    args = parser.parse_args()
+
+    counter = QueryCounter(engine)
+    run("before", legacy_ingest, args, counter)
+    run("after", batched_ingest, args, counter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Feed latency and availability while NewsAPI is slow, throttling or failing.
+
+    python -m benchmarks.bench_upstream [--requests 60] [--concurrency 10]
+
+Runs the API under uvicorn against a FakeNewsAPI, with the response caches
+disabled so that every request needs the upstream, and moves the fake through
+phases: healthy, slow (latency beyond the deadline), throttled (429 with
+Retry-After), flaky (30% 503s), then healthy again. Each phase is run twice:
+with the resilient client's defaults, and with it reduced to the old
+behaviour (one attempt, 10 s timeout, no circuit breaker). In both, requests
+that NewsAPI could not serve are answered from stored articles and carry
+``X-News-Stale``; before degraded mode they were 500s.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import percentile, start_api, stop_api
+from benchmarks.fake_upstream import FakeNewsAPI
+
+QUERIES = 5
+BREAKER_RESET = 2
+
+PHASES = [
+    ("healthy", dict(latency=0.05)),
+    ("slow", dict(latency=4.0)),
+    ("throttled", dict(latency=0.01, status=429, retry_after=1)),
+    ("flaky", dict(latency=0.05, status=503, failure_rate=0.3)),
+    ("recovered", dict(latency=0.05)),
+]
+
+CONFIGS = {
+    "resilient": dict(NEWSAPI_BREAKER_RESET=BREAKER_RESET),
+    "old": dict(NEWSAPI_BREAKER_THRESHOLD=0, NEWSAPI_MAX_RETRIES=0, NEWSAPI_DEADLINE=10, NEWSAPI_ATTEMPT_TIMEOUT=10),
+}
+
+
+async def drive(port: int, total: int, concurrency: int) -> dict:
+    latencies, statuses, stale = [], {}, 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        async def one(i):
+            nonlocal stale
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/api/news/", params={"query": f"q{i % QUERIES}"})
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                stale += "x-news-stale" in response.headers
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+    return {
+        "ok": statuses.get(200, 0) / total,
+        "stale": stale / total,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def run(name: str, env: dict, fake: FakeNewsAPI, base_url: str, args) -> None:
+    proc = start_api(
+        args.port,
+        NEWS_SOURCE="upstream",
+        NEWSAPI_BASE_URL=base_url,
+        NEWSAPI_CACHE_TTL=0,
+        HTTP_RESPONSE_CACHE_TTL=0,
+        NEWSAPI_RATE_LIMIT=0,
+        **env,
+    )
+    try:
+        for phase, settings in PHASES:
+            if phase != "healthy":
+                # Let a breaker opened by the previous phase reach half-open
+                time.sleep(BREAKER_RESET + 0.5)
+            fake.configure(**settings)
+            calls = fake.calls
+            result = asyncio.run(drive(args.port, args.requests, args.concurrency))
+            print(f"{name:>10} {phase:>10} {result['ok']:>6.0%} {result['stale']:>6.0%} "
+                  f"{result['p50'] * 1000:>9.0f} {result['p99'] * 1000:>9.0f} {fake.calls - calls:>9}")
+    finally:
+        stop_api(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8041)
+    args = parser.parse_args()
+
+    fake = FakeNewsAPI()
+    base_url = fake.start()
+    print(f"{'client':>10} {'phase':>10} {'200s':>6} {'stale':>6} {'p50 ms':>9} {'p99 ms':>9} {'upstream':>9}")
+    try:
+        for name, env in CONFIGS.items():
+            run(name, env, fake, base_url, args)
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
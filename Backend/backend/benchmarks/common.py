@@ -0,0 +1,66 @@
+"""Helpers shared by the benchmarks that run the API under uvicorn"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_api(port: int, **env_overrides) -> subprocess.Popen:
+    """Run ``main:app`` on ``port`` against a fresh SQLite database unless DATABASE_URL is given"""
+    env = dict(os.environ, **{key: str(value) for key, value in env_overrides.items()})
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+    subprocess.run([sys.executable, "init_db.py"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("API did not start")
+
+
+def stop_api(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    proc.wait()
+
+
+def _proc_status_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def rss_kb(pid: int) -> int:
+    """Resident memory of ``pid`` now (Linux)"""
+    return _proc_status_kb(pid, "VmRSS")
+
+
+def peak_rss_kb(pid: int) -> int:
+    """Highest resident memory of ``pid`` so far (Linux)"""
+    return _proc_status_kb(pid, "VmHWM")
+
+
+def cpu_seconds(pid: int) -> float:
+    """User plus system CPU time ``pid`` has used (Linux)"""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
@@ -0,0 +1,121 @@
+"""Local NewsAPI stand-in whose latency and failures can be changed while it runs.
+
+Imported by the benchmarks, or run on its own for a server started by hand:
+
+    python -m benchmarks.fake_upstream [--port 8900] [--latency 0.05] [--error-rate 0.01]
+        [--error-status 503] [--articles 20] [--payload-bytes 2000]
+
+and point the API at it with ``NEWSAPI_BASE_URL=http://127.0.0.1:8900/v2/everything``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeNewsAPI:
+    """Serves ``/v2/everything`` pages; set ``latency``, ``status``/``failure_rate`` and ``retry_after`` at any time.
+
+    ``payload_bytes`` pads each article's description and content to roughly that many bytes.
+    """
+
+    def __init__(self, articles_per_page: int = 6, seed: int = 1, payload_bytes: int = 0):
+        self.latency = 0.0
+        self.status = 200
+        self.failure_rate = 0.0
+        self.retry_after: Optional[float] = None
+        self.articles_per_page = articles_per_page
+        self.payload_bytes = payload_bytes
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def configure(self, latency: float = 0.0, status: int = 200, failure_rate: float = 1.0,
+                  retry_after: Optional[float] = None) -> None:
+        self.latency, self.status, self.failure_rate, self.retry_after = latency, status, failure_rate, retry_after
+
+    def _count(self) -> bool:
+        """Count the call and decide whether it fails"""
+        with self._lock:
+            self.calls += 1
+            return self.status != 200 and self._rng.random() < self.failure_rate
+
+    def _article(self, query: str, page: str, i: int) -> dict:
+        article = {"url": f"https://example.com/{query}/{page}/{i}", "title": f"{query} {page}.{i}",
+                   "publishedAt": "2024-05-01T12:00:00Z", "source": {"name": "Fake"}}
+        if self.payload_bytes:
+            filler = f"{query} news " * (self.payload_bytes // len(f"{query} news ") + 1)
+            article["description"] = filler[:self.payload_bytes // 4]
+            article["content"] = filler[:self.payload_bytes * 3 // 4]
+        return article
+
+    def start(self, port: int = 0) -> str:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fails = fake._count()
+                time.sleep(fake.latency)
+                if fails:
+                    body = json.dumps({"status": "error", "code": "rateLimited" if fake.status == 429 else "unexpectedError"}).encode()
+                    self.send_response(fake.status)
+                    if fake.retry_after is not None:
+                        self.send_header("Retry-After", str(fake.retry_after))
+                else:
+                    params = parse_qs(urlparse(self.path).query)
+                    query, page = params.get("q", ["news"])[0], params.get("page", ["1"])[0]
+                    body = json.dumps({"articles": [
+                        fake._article(query, page, i) for i in range(fake.articles_per_page)
+                    ]}).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up at its deadline
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v2/everything"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--articles", type=int, default=20, help="Articles per page")
+    parser.add_argument("--payload-bytes", type=int, default=0, help="Description and content bytes per article")
+    args = parser.parse_args()
+
+    fake = FakeNewsAPI(articles_per_page=args.articles, payload_bytes=args.payload_bytes)
+    fake.configure(latency=args.latency, status=args.error_status if args.error_rate else 200, failure_rate=args.error_rate)
+    print(f"NEWSAPI_BASE_URL={fake.start(args.port)}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
+        print(f"{fake.calls} calls served")
+
+
+if __name__ == "__main__":
+    main()
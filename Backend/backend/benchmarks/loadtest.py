@@ -0,0 +1,308 @@
+"""Scripted load on the key endpoints, reported as JSON so that runs can be compared.
+
+    python -m benchmarks.loadtest [--scale small] [--scenarios home,paging,search,favorites,login]
+        [--concurrency 20] [--duration 15] [--upstream-latency 0.05] [--upstream-error-rate 0]
+        [--payload-bytes 1000] [--output results.json] [--compare baseline.json]
+
+Seeds a throwaway SQLite database with ``benchmarks.seed`` at ``--scale``
+(or, when DATABASE_URL is set, uses that database as ``benchmarks.seed``
+left it), starts a FakeNewsAPI, and runs the API under uvicorn against both
+with /metrics on and the rate limiter off (``--rate-limit`` keeps it). Any
+other setting is passed through the environment, e.g. ``ASYNC_MODE=true`` or
+``NEWS_SOURCE=database``.
+
+Each scenario runs ``--concurrency`` virtual users, each signed in as a
+different seeded user, for ``--duration`` seconds:
+
+- ``home``: the featured article, then the first page of the combined feed.
+- ``paging``: ``PAGES`` pages of the combined feed, following X-Next-Cursor.
+- ``search``: one search for a word the seeded titles use.
+- ``favorites``: add a random article to favorites, then remove it.
+- ``login``: one password login (a bcrypt verify).
+
+For each scenario the report gives:
+- requests per second and latency percentiles, overall and per request;
+- non-2xx statuses;
+- database queries per request, read from the server's /metrics;
+- the server's CPU time, and its RSS at the end of the scenario and at peak.
+
+``--compare`` prints each figure next to the same figure from an earlier report.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+_fresh_database = "DATABASE_URL" not in os.environ
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import httpx
+from sqlalchemy import func, select
+
+from app.config import Settings
+from app.database import engine
+from app.migrations import migrate
+from app.models import Article, User
+from app.security import create_access_token
+from benchmarks.common import BACKEND_DIR, cpu_seconds, peak_rss_kb, percentile, rss_kb, start_api, stop_api
+from benchmarks.fake_upstream import FakeNewsAPI
+from benchmarks.seed import FEED_QUERIES, PASSWORD, SCALES, VOCABULARY, seed
+
+PAGES = 5
+PAGE_SIZE = 15
+
+
+class Recorder:
+    """Latency samples and statuses, per request name"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Counter = Counter()
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.statuses[type(exc).__name__] += 1
+            return None
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+        self.statuses[str(response.status_code)] += 1
+        return response
+
+
+class VirtualUser:
+    """One simulated client, signed in as seeded user ``index``"""
+
+    def __init__(self, number: int, index: int, articles: int):
+        self.email = f"user{index}@example.com"
+        self.articles = articles
+        self.rng = random.Random(number)
+        self.headers = {"Authorization": "Bearer " + create_access_token({"sub": f"user-{index}"}, timedelta(hours=12))}
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, VirtualUser], Awaitable[None]]
+
+
+async def home(client, recorder, user):
+    await recorder.request(client, "featured", "GET", "/api/news/featured")
+    query = user.rng.choice(FEED_QUERIES)
+    await recorder.request(client, "combined", "GET", "/api/news/combined",
+                           params={"query": query, "limit": PAGE_SIZE}, headers=user.headers)
+
+
+async def paging(client, recorder, user):
+    params = {"query": user.rng.choice(FEED_QUERIES), "limit": PAGE_SIZE}
+    for page in range(PAGES):
+        response = await recorder.request(client, "combined page", "GET", "/api/news/combined", params=params, headers=user.headers)
+        cursor = response.headers.get("x-next-cursor") if response is not None else None
+        if not cursor:
+            return
+        params["cursor"] = cursor
+
+
+async def search(client, recorder, user):
+    await recorder.request(client, "search", "GET", "/api/news/search", params={"q": user.rng.choice(VOCABULARY), "limit": 10})
+
+
+async def favorites(client, recorder, user):
+    article_id = f"article-{user.rng.randrange(user.articles)}"
+    response = await recorder.request(client, "add favorite", "POST", "/api/favorites/", json={"article_id": article_id}, headers=user.headers)
+    if response is not None and response.status_code == 200:
+        await recorder.request(client, "remove favorite", "DELETE", f"/api/favorites/{response.json()['id']}", headers=user.headers)
+
+
+async def login(client, recorder, user):
+    await recorder.request(client, "login", "POST", "/api/auth/login",
+                           json={"email": user.email, "password": PASSWORD})
+
+
+SCENARIOS: Dict[str, Scenario] = {"home": home, "paging": paging, "search": search, "favorites": favorites, "login": login}
+
+
+def query_counts(client: httpx.Client) -> Dict[str, List[float]]:
+    """route -> [queries, requests] so far, from /metrics"""
+    counts: Dict[str, List[float]] = {}
+    for line in client.get("/metrics").text.splitlines():
+        for suffix, slot in (("_sum", 0), ("_count", 1)):
+            prefix = f"buzznews_db_queries_per_request{suffix}{{route=\""
+            if line.startswith(prefix):
+                route, value = line[len(prefix):].split("\"} ")
+                if route != "/metrics":
+                    counts.setdefault(route, [0.0, 0.0])[slot] = float(value)
+    return counts
+
+
+def summarize(samples: List[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p90_ms": percentile(samples, 0.9) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+async def drive(port: int, scenario: Scenario, users: List[VirtualUser], duration: float) -> Recorder:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=len(users) + 10)
+    deadline = time.perf_counter() + duration
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        async def loop(user):
+            while time.perf_counter() < deadline:
+                await scenario(client, recorder, user)
+
+        await asyncio.gather(*(loop(user) for user in users))
+    return recorder
+
+
+def run_scenario(name: str, port: int, pid: int, users: List[VirtualUser], duration: float) -> dict:
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}") as metrics:
+        before, cpu = query_counts(metrics), cpu_seconds(pid)
+        started = time.perf_counter()
+        recorder = asyncio.run(drive(port, SCENARIOS[name], users, duration))
+        elapsed = time.perf_counter() - started
+        after, cpu = query_counts(metrics), cpu_seconds(pid) - cpu
+
+    queries, all_queries, all_requests = {}, 0.0, 0.0
+    for route, (total, requests) in after.items():
+        total -= before.get(route, [0.0, 0.0])[0]
+        requests -= before.get(route, [0.0, 0.0])[1]
+        if requests:
+            queries[route] = total / requests
+            all_queries, all_requests = all_queries + total, all_requests + requests
+    samples = [sample for latencies in recorder.latencies.values() for sample in latencies]
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed,
+        "latency": summarize(samples),
+        "requests_by_name": {request: summarize(latencies) for request, latencies in recorder.latencies.items()},
+        "statuses": dict(recorder.statuses),
+        "errors": sum(count for status, count in recorder.statuses.items() if not status.startswith("2")),
+        "queries_per_request": all_queries / all_requests if all_requests else 0.0,
+        "queries_per_request_by_route": queries,
+        "server_cpu_seconds": cpu,
+        "server_rss_mb": rss_kb(pid) / 1024,
+        "server_peak_rss_mb": peak_rss_kb(pid) / 1024,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def recorded_settings(env: Dict[str, str]) -> Dict[str, str]:
+    """Settings the environment overrides for the run, secrets and connection strings left out"""
+    names = set(Settings.model_fields)
+    secret = ("KEY", "TOKEN", "SECRET", "PASSWORD", "URL")
+    overrides = {name: value for name, value in {**os.environ, **env}.items() if name in names}
+    return {name: value for name, value in sorted(overrides.items()) if not any(part in name for part in secret)}
+
+
+def print_report(report: dict, baseline: Optional[dict]) -> None:
+    def versus(value: float, old: Optional[float], fmt: str) -> str:
+        text = format(value, fmt)
+        if old:
+            text += f" ({(value - old) / old:+.0%})"
+        return text
+
+    print(f"{'scenario':>10} {'req/s':>16} {'p50 ms':>16} {'p99 ms':>16} {'errors':>7} {'queries/req':>12} {'peak RSS MB':>12}")
+    for name, result in report["scenarios"].items():
+        old = (baseline or {}).get("scenarios", {}).get(name, {})
+        print(
+            f"{name:>10} {versus(result['throughput_rps'], old.get('throughput_rps'), '.1f'):>16} "
+            f"{versus(result['latency']['p50_ms'], old.get('latency', {}).get('p50_ms'), '.1f'):>16} "
+            f"{versus(result['latency']['p99_ms'], old.get('latency', {}).get('p99_ms'), '.1f'):>16} "
+            f"{result['errors']:>7} {result['queries_per_request']:>12.1f} {result['server_peak_rss_mb']:>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Rows to seed into the throwaway database")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per scenario")
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=1000, help="Description and content bytes per upstream article")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the rate limiter on")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--output", help="Write the report here as JSON")
+    parser.add_argument("--compare", help="An earlier JSON report to compare with")
+    args = parser.parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if _fresh_database:
+        seed(*SCALES[args.scale])
+    else:
+        migrate(engine)
+    with engine.connect() as conn:
+        user_count = conn.scalar(select(func.count()).select_from(User).where(User.id.startswith("user-")))
+        # Seeded articles only; earlier runs may have stored upstream ones too
+        article_count = conn.scalar(select(func.count()).select_from(Article).where(Article.id.startswith("article-")))
+    engine.dispose()
+    if not user_count or not article_count:
+        sys.exit("The database has no users or articles: run benchmarks.seed first")
+    users = [VirtualUser(n, n % user_count, article_count) for n in range(args.concurrency)]
+
+    fake = FakeNewsAPI(articles_per_page=PAGE_SIZE, payload_bytes=args.payload_bytes)
+    fake.configure(latency=args.upstream_latency, status=503 if args.upstream_error_rate else 200,
+                   failure_rate=args.upstream_error_rate)
+    env = dict(
+        DATABASE_URL=os.environ["DATABASE_URL"],
+        NEWSAPI_BASE_URL=fake.start(),
+        METRICS_ENABLED="true",
+        METRICS_TOKEN="",
+        RATE_LIMIT_ENABLED="true" if args.rate_limit else "false",
+    )
+    report = {
+        "meta": {
+            "started": datetime.utcnow().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "users": user_count,
+            "articles": article_count,
+            "args": vars(args),
+            "settings": recorded_settings(env),
+        },
+        "scenarios": {},
+    }
+    proc = start_api(args.port, **env)
+    try:
+        for name in names:
+            report["scenarios"][name] = run_scenario(name, args.port, proc.pid, users, args.duration)
+        report["meta"]["upstream_calls"] = fake.calls
+    finally:
+        stop_api(proc)
+        fake.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as source:
+            baseline = json.load(source)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as target:
+            json.dump(report, target, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Fill a database with users, articles and saved lists at a chosen scale.
+
+    DATABASE_URL=... python -m benchmarks.seed [--scale medium] [--users N] [--articles N]
+        [--saved-per-user N] [--reset]
+
+Seeds the database DATABASE_URL points to (a throwaway SQLite file when it is
+unset). Every run with the same arguments writes the same rows:
+
+- ``users``: ``user{i}@example.com`` / ``PASSWORD``; ``user0`` is an admin.
+- ``articles``: published over one year, a tenth of them admin articles. Titles are drawn from ``VOCABULARY``, so searches for its words
+  match.
+- ``feed_entries``: every upstream article in one of ``FEED_QUERIES``.
+- ``favorites`` and ``watch_later``: ``--saved-per-user`` rows each per user.
+
+``--reset`` empties every table first (the schema is kept); otherwise the
+target must not already hold seeded rows. Rows are inserted ``BATCH`` at a
+time with executemany.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import insert
+
+from app.database import Base, engine
+from app.migrations import migrate
+from app.models import Article, Favorite, FeedEntry, User, WatchLater
+from app.security import hash_password, password_hasher
+
+PASSWORD = "bench-password"
+FEED_QUERIES = ("technology", "business", "science", "sports", "health")
+VOCABULARY = (
+    "market", "election", "climate", "energy", "football", "vaccine", "startup", "chip", "rocket", "bank",
+    "inflation", "storm", "court", "museum", "festival", "battery", "satellite", "drought", "merger", "strike",
+    "budget", "harbor", "glacier", "robot", "virus", "telescope", "tariff", "summit", "pipeline", "reactor",
+)
+BATCH = 10_000
+START = datetime(2024, 1, 1)
+
+# (users, articles, saved items per user) for --scale
+SCALES: Dict[str, tuple] = {
+    "small": (100, 1_000, 10),
+    "medium": (1_000, 100_000, 20),
+    "large": (10_000, 1_000_000, 50),
+}
+
+
+def _batches(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _users(count: int, hashed_password: str) -> Iterator[dict]:
+    for i in range(count):
+        yield {
+            "id": f"user-{i}", "email": f"user{i}@example.com", "username": f"user{i}",
+            "hashed_password": hashed_password, "is_admin": i == 0, "created_at": START,
+        }
+
+
+def _articles(count: int, rng: random.Random) -> Iterator[dict]:
+    spacing = timedelta(days=365) / max(count, 1)
+    for i in range(count):
+        admin = i % 10 == 0
+        words = " ".join(rng.sample(VOCABULARY, 3))
+        published_at = START + spacing * i
+        yield {
+            "id": f"article-{i}",
+            "title": f"{words.capitalize()} report {i}",
+            "description": f"What the {words} story means. " * 4,
+            "content": f"Full coverage of {words}. " * 40,
+            "author_id": "user-0" if admin else None,
+            "source": "admin" if admin else rng.choice(("Reuters", "AP", "BBC", "Wired")),
+            "image_url": f"https://example.com/images/{i}.jpg",
+            "url": f"https://example.com/articles/{i}",
+            "published_at": published_at,
+            "created_at": published_at,
+        }
+
+
+def _feed_entries(count: int) -> Iterator[dict]:
+    spacing = timedelta(days=365) / max(count, 1)
+    for i in range(count):
+        if i % 10:
+            yield {"query": FEED_QUERIES[i % len(FEED_QUERIES)], "article_id": f"article-{i}", "published_at": START + spacing * i}
+
+
+def _saved(prefix: str, users: int, articles: int, per_user: int, rng: random.Random) -> Iterator[dict]:
+    per_user = min(per_user, articles)
+    for user in range(users):
+        for n, article in enumerate(rng.sample(range(articles), per_user)):
+            yield {
+                "id": f"{prefix}-{user}-{n}", "user_id": f"user-{user}", "article_id": f"article-{article}",
+                "created_at": START + timedelta(minutes=n),
+            }
+
+
+def seed(users: int, articles: int, saved_per_user: int, reset: bool = False, rng_seed: int = 1) -> Dict[str, int]:
+    """Insert the rows; returns the count written per table"""
+    migrate(engine)
+    if reset:
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+    # One bcrypt hash shared by every user: logins still pay for a verify each
+    hashed_password = hash_password(PASSWORD)
+    password_hasher.shutdown()
+    rng = random.Random(rng_seed)
+
+    tables = (
+        (User, _users(users, hashed_password)),
+        (Article, _articles(articles, rng)),
+        (FeedEntry, _feed_entries(articles)),
+        (Favorite, _saved("fav", users, articles, saved_per_user, rng)),
+        (WatchLater, _saved("later", users, articles, saved_per_user, rng)),
+    )
+    written = {}
+    for model, rows in tables:
+        started = time.perf_counter()
+        count = 0
+        for batch in _batches(rows):
+            with engine.begin() as conn:
+                conn.execute(insert(model), batch)
+            count += len(batch)
+        written[model.__tablename__] = count
+        print(f"{model.__tablename__:>14} {count:>10} rows {time.perf_counter() - started:>8.1f} s")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=SCALES, default="medium")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--articles", type=int)
+    parser.add_argument("--saved-per-user", type=int)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="Empty every table first")
+    args = parser.parse_args()
+
+    users, articles, saved = SCALES[args.scale]
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)}")
+    seed(
+        args.users if args.users is not None else users,
+        args.articles if args.articles is not None else articles,
+        args.saved_per_user if args.saved_per_user is not None else saved,
+        reset=args.reset,
+        rng_seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Run the NewsAPI ingestion worker outside the API process"""
+import argparse
+import json
+import logging
+
+from app.ingest import build_worker
+
+parser = argparse.ArgumentParser(description="Poll NewsAPI and store articles in the database")
+parser.add_argument("--once", action="store_true", help="Run every configured query once and exit")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+worker = build_worker()
+if args.once:
+    worker.run_once(force=True)
+    print(json.dumps(worker.metrics(), indent=2))
+else:
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        print("Ingestion stopped")
@@ -1,9 +1,8 @@
-"""Initialize database with tables"""
-from app.database import engine, Base
-# Import all models to ensure SQLAlchemy knows about them before creating tables
-from app.models import User, Article, Favorite, WatchLater 
+"""Initialize the database by applying any pending schema migrations"""
+from app.database import engine
+from app.migrations import migrate
 
-# Create all tables safely
-# checkfirst=True ensures SQLAlchemy only issues CREATE TABLE commands if the table doesn't already exist.
-Base.metadata.create_all(bind=engine, checkfirst=True)
-print("Database tables checked and initialized successfully!")
\ No newline at end of file
+applied = migrate(engine)
+if applied:
+    print("Applied migrations: " + ", ".join(applied))
+print("Database tables checked and initialized successfully!")
@@ -1,42 +1,148 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Import routers
-from app.routes import auth, news, favorites, watchlater, admin
-
-# Create FastAPI app
-app = FastAPI(title="NewsBuzz API", version="1.0.0")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:5173",
-        "http://127.0.0.1:5173",
-        "http://localhost:4173",
-        "http://127.0.0.1:4173",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(news.router, prefix="/api/news", tags=["news"])
-app.include_router(favorites.router, prefix="/api/favorites", tags=["favorites"])
-app.include_router(watchlater.router, prefix="/api/watchlater", tags=["watchlater"])
-app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
-
-@app.get("/")
-def read_root():
-    return {"message": "NewsBuzz API is running"}
+
+# app.config loads .env
+from app.config import Settings, settings as default_settings
+
+
+def build_lifespan(settings: Settings):
+    """Startup/shutdown of the process-wide resources: database engines, NewsAPI client, workers"""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        from app import database
+        database.init_engines(settings)
+        # The caches and clients are shared by every app in the process and sized from
+        # app.config.settings; attached here for code that only holds the app
+        from app.cache import newsapi_cache
+        from app.hot import hot_content
+        from app.http_cache import http_cache
+        from app.ratelimit import rate_limiter
+        from app.retention import archiver
+        from app.security import auth_cache
+        from app.stream import broker
+        from app.upstream import newsapi_client
+        app.state.newsapi_cache = newsapi_cache
+        app.state.http_cache = http_cache
+        app.state.auth_cache = auth_cache
+        app.state.rate_limiter = rate_limiter
+        app.state.newsapi_client = newsapi_client
+        app.state.hot_content = hot_content
+        app.state.broker = broker
+        app.state.archiver = archiver
+        # Optionally poll NewsAPI from inside the API process instead of running ingest.py
+        app.state.ingest_worker = None
+        if settings.INGEST_IN_APP:
+            from app.ingest import build_worker
+            app.state.ingest_worker = build_worker(settings)
+            app.state.ingest_worker.start()
+        if settings.ASYNC_MODE:
+            from app import newsapi
+            await database.init_async_engine(settings)
+            newsapi.open_async_client(settings.NEWSAPI_MAX_CONNECTIONS, settings.NEWSAPI_MAX_KEEPALIVE)
+        # Serve the last persisted featured/feed snapshots until the first refresh lands
+        if settings.HOT_CONTENT_ENABLED:
+            hot_content.load()
+            hot_content.start()
+        await broker.start()
+        # Optionally archive old articles from inside the API process instead of running archive.py
+        if settings.RETENTION_IN_APP:
+            archiver.start()
+        yield
+        if settings.RETENTION_IN_APP:
+            archiver.stop()
+        await broker.stop()
+        if settings.HOT_CONTENT_ENABLED:
+            hot_content.stop()
+        if app.state.ingest_worker is not None:
+            app.state.ingest_worker.stop()
+        from app.security import password_hasher
+        password_hasher.shutdown()
+        if settings.ASYNC_MODE:
+            from app import newsapi
+            await newsapi.close_async_client()
+            await database.dispose_async_engine()
+        database.dispose_engines()
+
+    return lifespan
+
+
+def create_app(settings: Settings = default_settings) -> FastAPI:
+    """Build the API; nothing connects or starts until the lifespan runs.
+
+    ``settings`` chooses the routers, middleware, database and workers; the shared caches and
+    clients on ``app.state`` are built once per process from ``app.config.settings``.
+    """
+    # Import routers (ASYNC_MODE swaps in the async variants; auth stays sync)
+    from app.routes import auth
+    if settings.ASYNC_MODE:
+        from app.routes.aio import news, favorites, watchlater, admin
+    else:
+        from app.routes import news, favorites, watchlater, admin
+
+    app = FastAPI(
+        title="NewsBuzz API",
+        version="1.0.0",
+        lifespan=build_lifespan(settings),
+        default_response_class=ORJSONResponse,
+    )
+    app.state.settings = settings
+
+    # Added before CORS so that 304s and cached responses still get CORS headers
+    from app.http_cache import HTTPCacheMiddleware
+    app.add_middleware(HTTPCacheMiddleware)
+
+    # Outside the HTTP cache, so that cached responses spend budget too; 429s still get CORS headers
+    if settings.RATE_LIMIT_ENABLED:
+        from app.ratelimit import RateLimitMiddleware, rate_limiter
+        app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",
+            "http://127.0.0.1:3000",
+            "http://localhost:5173",
+            "http://127.0.0.1:5173",
+            "http://localhost:4173",
+            "http://127.0.0.1:4173",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated",
+            "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After",
+        ],
+    )
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+    app.include_router(news.router, prefix="/api/news", tags=["news"])
+    app.include_router(favorites.router, prefix="/api/favorites", tags=["favorites"])
+    app.include_router(watchlater.router, prefix="/api/watchlater", tags=["watchlater"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+
+    @app.get("/")
+    def read_root():
+        return {"message": "NewsBuzz API is running"}
+
+    # Outermost, so that it times everything above, HTTP cache hits included
+    if settings.METRICS_ENABLED:
+        from app.metrics import MetricsMiddleware, request_metrics
+        from app.routes import metrics
+        request_metrics.install()
+        app.include_router(metrics.router, tags=["metrics"])
+        app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Bounded, so open article streams are cut at shutdown instead of waited on
+    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_graceful_shutdown=10)
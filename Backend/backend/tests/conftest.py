@@ -0,0 +1,16 @@
+"""Tests run against a throwaway SQLite database with the background workers off.
+
+The environment is set here, before any test imports ``app``, because the
+settings are read when ``app.config`` is first imported.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.update(
+    HOT_CONTENT_ENABLED="false",
+    RATE_LIMIT_ENABLED="false",
+    STREAM_POLL_INTERVAL="0",
+    PASSWORD_HASH_WORKERS="0",
+    BCRYPT_ROUNDS="4",
+)
@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app import database
+from app.config import Settings, settings
+from app.migrations import migrate
+from main import create_app
+
+
+@pytest.fixture
+def other_database():
+    path = os.path.join(tempfile.mkdtemp(), "other.db")
+    url = "sqlite:///" + path
+    engine = create_engine(url)
+    migrate(engine)
+    engine.dispose()
+    database.init_engines()  # Engines for the default database already exist, as after other tests
+    yield url, path
+    database.init_engines(settings)
+
+
+@pytest.mark.parametrize("async_mode", [False, True], ids=["sync", "async"])
+def test_create_app_uses_its_database(other_database, async_mode):
+    url, path = other_database
+    app = create_app(Settings(DATABASE_URL=url, ASYNC_MODE=async_mode))
+    with TestClient(app) as client:
+        response = client.post("/api/auth/signup", json={"email": "other@example.com", "username": "other", "password": "secret"})
+        assert response.status_code == 200, response.text
+        if async_mode:
+            assert database.get_async_sessionmaker().kw["bind"].url.database == path
+        assert app.state.http_cache is not None and app.state.broker is not None
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT username FROM users").fetchall() == [("other",)]
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.config import Settings
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article, User
+from app.security import create_access_token
+from main import create_app
+
+USERS = 20
+ARTICLES = 50
+
+
+@pytest.fixture(scope="module")
+def tokens():
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add_all(User(id=f"saver-{i}", email=f"saver{i}@example.com", username=f"saver{i}", hashed_password="x") for i in range(USERS))
+        db.add_all(
+            Article(id=f"saved-{i}", title=f"Article {i}", url=f"https://example.com/saved/{i}", published_at=datetime(2024, 1, 1))
+            for i in range(ARTICLES)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return [create_access_token({"sub": f"saver-{i}"}) for i in range(USERS)]
+
+
+@pytest.mark.parametrize("path", ["/api/favorites/", "/api/watchlater/"])
+def test_concurrent_async_saves_return_their_own_items(tokens, path):
+    """Concurrent adds, first and repeated, each return the item for the article they saved"""
+    app = create_app(Settings(ASYNC_MODE=True))
+
+    async def save(client, user, article):
+        response = await client.post(path, json={"article_id": f"saved-{article}"},
+                                     headers={"Authorization": f"Bearer {tokens[user]}"})
+        return article, response
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            results = []
+            for round_ in range(3):  # The later rounds save the same articles again
+                results += await asyncio.gather(*(save(client, user, (user + round_ % 2) % ARTICLES) for user in range(USERS)))
+            return results
+
+    for article, response in asyncio.run(run()):
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["article_id"] == f"saved-{article}"
+        assert body["article"]["id"] == f"saved-{article}"
+        assert body["id"] and body["created_at"]
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.bulk_import import ImportAborted, import_stream, json_array_values, ndjson_values
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article, User
+from app.security import create_access_token
+from main import create_app
+
+ARRAY = json.dumps([
+    {"title": "Crème brûlée ☕ 日本語 😀", "url": "https://example.com/a", "tags": ["x", "]", ","]},
+    12345,
+    -1.5e3,
+    True,
+    None,
+    "a \"quoted\" ] string, with commas",
+    [[], {}, [1, [2, [3]]]],
+], ensure_ascii=False, indent=1).encode()
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def parse(parser, data: bytes, size: int, max_row_bytes: int = 1 << 20):
+    async def collect():
+        return [value async for value in parser(chunked(data, size), max_row_bytes)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 10_000])
+def test_json_array_values_across_chunk_boundaries(size):
+    # Size 1 splits every multi-byte character, number and literal
+    assert parse(json_array_values, ARRAY, size) == list(enumerate(json.loads(ARRAY), 1))
+
+
+def test_json_array_number_at_the_end_of_a_chunk():
+    async def chunks():
+        for chunk in (b"[1", b"23, 4", b"5e1", b"]"):
+            yield chunk
+
+    async def collect():
+        return [value async for value in json_array_values(chunks(), 100)]
+
+    assert asyncio.run(collect()) == [(1, 123), (2, 450.0)]
+
+
+@pytest.mark.parametrize("body, error", [
+    (b'[1, 2] 3', "after the closing bracket"),
+    (b'{"title": "x"}', "Expected a JSON array"),
+    (b'[1, 2', "Unexpected end of body"),
+    (b'[1 2]', "Expected ',' or ']' after row 1"),
+    (b'[1, {"title": }]', "Malformed JSON in row 2"),
+])
+@pytest.mark.parametrize("size", [1, 1000])
+def test_json_array_values_abort_on_bad_bodies(body, error, size):
+    with pytest.raises(ImportAborted, match=error):
+        parse(json_array_values, body, size)
+
+
+def test_json_array_values_accept_trailing_whitespace():
+    assert parse(json_array_values, b" [ 1 ]\n\n", 1) == [(1, 1)]
+
+
+@pytest.mark.parametrize("size", [1, 16, 1000])
+def test_oversized_rows_abort_however_they_arrive(size):
+    big = {"title": "é" * 40}  # 80 bytes of title, 40 characters
+    with pytest.raises(ImportAborted, match="Row 2 is longer than 64 bytes"):
+        parse(json_array_values, orjson.dumps([{"title": "ok"}, big]), size, max_row_bytes=64)
+    with pytest.raises(ImportAborted, match="Line 2 is longer than 64 bytes"):
+        parse(ndjson_values, orjson.dumps({"title": "ok"}) + b"\n" + orjson.dumps(big) + b"\n", size, max_row_bytes=64)
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_ndjson_values(size):
+    body = '{"title": "ü"}\n\n  \nnot json\n{"title": "日本"}'.encode()
+    values = parse(ndjson_values, body, size)
+    assert [(line, value) for line, value in values if not isinstance(value, Exception)] == [
+        (1, {"title": "ü"}), (5, {"title": "日本"}),
+    ]
+    assert [line for line, value in values if isinstance(value, Exception)] == [4]
+
+
+def run_import(body: bytes, max_errors: int = 100, batch_size: int = 2):
+    batches = []
+
+    async def write(batch):
+        batches.append(list(batch))
+        return len(batch), []
+
+    report = asyncio.run(import_stream(
+        chunked(body, 5), ndjson=True, author_id="admin", write=write, batch_size=batch_size,
+        max_row_bytes=1 << 20, max_errors=max_errors,
+    ))
+    return report.as_dict(), batches
+
+
+def test_import_stream_skips_duplicate_urls_within_a_batch():
+    rows = [{"title": f"t{i}", "url": f"https://example.com/{i % 2}"} for i in range(3)]
+    report, batches = run_import(b"\n".join(orjson.dumps(row) for row in rows), batch_size=10)
+    assert (report["inserted"], report["duplicates"]) == (2, 1)
+    assert report["errors"] == [{"row": 3, "error": "Duplicate url"}]
+    assert [[row for row, _ in batch] for batch in batches] == [[1, 2]]
+
+
+def test_import_stream_truncates_the_error_list():
+    body = b"\n".join([b'{"title": "ok"}', b"{}", b"oops", b'{"title": 1.5}'])
+    report, _ = run_import(body, max_errors=1)
+    assert (report["rows"], report["inserted"], report["invalid"]) == (4, 1, 3)
+    assert len(report["errors"]) == 1 and report["errors"][0]["row"] == 2
+    assert report["errors_truncated"] is True
+
+
+def test_import_endpoint():
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id="importer", email="importer@example.com", username="importer", hashed_password="x", is_admin=True))
+        db.add(Article(id="import-stored", title="Stored", url="https://example.com/import/stored", source="admin",
+                       published_at=datetime(2024, 1, 1)))
+        db.commit()
+    finally:
+        db.close()
+    rows = [
+        {"title": "One", "url": "https://example.com/import/1", "published_at": "2024-03-01T12:00:00+02:00"},
+        {"title": "Two", "url": "https://example.com/import/2"},
+        {"url": "https://example.com/import/no-title"},
+        {"title": "Stored again", "url": "https://example.com/import/stored"},
+        {"title": "One again", "url": "https://example.com/import/1"},
+    ]
+    client = TestClient(create_app())
+    response = client.post(
+        "/api/admin/articles/import",
+        content=orjson.dumps(rows),
+        headers={"Authorization": f"Bearer {create_access_token({'sub': 'importer'})}", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["duplicates"], report["invalid"]) == (5, 2, 2, 1)
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors_truncated"] is False and report["aborted"] is None
+
+    db = SessionLocal()
+    try:
+        one = db.query(Article).filter(Article.url == "https://example.com/import/1").one()
+        assert (one.source, one.author_id, one.published_at.hour) == ("admin", "importer", 10)
+    finally:
+        # Admin articles are part of every feed
+        db.query(Article).filter(Article.url.like("https://example.com/import/%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from app.cache import CacheBackend, CacheEntry, FakeSharedClient, MemoryCache, ResponseCache, SharedCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_incomplete_backend_fails_when_created():
+    class NoClear(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, entry):
+            pass
+
+        def delete(self, key):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClear()
+
+
+@pytest.mark.parametrize("backend", [MemoryCache(), SharedCache(FakeSharedClient())], ids=["memory", "shared"])
+def test_backend_round_trip(backend):
+    entry = CacheEntry(value={"articles": [1, 2]}, stored_at=5.0, ttl=60, stale_ttl=30)
+    backend.set("k", entry)
+    assert backend.get("k") == entry
+    backend.delete("k")
+    assert backend.get("k") is None
+
+
+def test_fresh_then_stale_then_expired():
+    clock = Clock()
+    cache = ResponseCache(MemoryCache(), stale_ttl=30, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(clock.now)
+        return len(calls)
+
+    assert cache.get_or_fetch("k", fetch, ttl=60) == 1
+    assert cache.get_or_fetch("k", fetch, ttl=60) == 1  # Fresh
+    clock.now += 70
+    assert cache.get_or_fetch("k", fetch, ttl=60) == 1  # Stale, refreshed in the background
+    deadline = time.monotonic() + 5
+    while cache.get_or_fetch("k", fetch, ttl=60) != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2
+    clock.now += 200
+    assert cache.get_or_fetch("k", fetch, ttl=60) == 3  # Expired: fetched inline
+    assert cache.counters["hits"] >= 1 and cache.counters["stale_hits"] >= 1 and cache.counters["misses"] == 2
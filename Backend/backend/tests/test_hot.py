@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal, engine
+from app.hot import HotContent, Snapshot
+from app.migrations import migrate
+from app.models import HotSnapshot
+
+
+def hot(build=None, persist=None):
+    content = HotContent(["technology"], feed_size=30, interval=60)
+    content.build = build or (lambda: {"featured": Snapshot((b"{}",), datetime.utcnow())})
+    content._persist = persist or (lambda snapshots: None)
+    return content
+
+
+def test_refresh_swaps_in_new_snapshots():
+    content = hot()
+    content.refresh()
+    assert set(content._snapshots) == {"featured"}
+    assert content.counters["refreshes"] == 1
+
+
+def test_refresh_drops_snapshots_invalidated_while_building():
+    persisted = []
+
+    def build():
+        content.invalidate()
+        return {"featured": Snapshot((b"{}",), datetime.utcnow())}
+
+    content = hot(build=build, persist=persisted.append)
+    content.refresh()
+    assert content._snapshots == {}
+    assert persisted == []
+    assert content.counters["refreshes"] == 0
+    assert content._wake.is_set()
+
+
+def test_failed_persist_keeps_the_new_snapshots():
+    def persist(snapshots):
+        raise IntegrityError("INSERT INTO hot_snapshots", {}, Exception("duplicate key"))
+
+    content = hot(persist=persist)
+    content.refresh()
+    assert set(content._snapshots) == {"featured"}
+    assert content.counters["refreshes"] == 1
+    assert content.counters["persist_errors"] == 1
+
+
+@pytest.fixture
+def persisted():
+    migrate(engine)
+
+    def rows():
+        db = SessionLocal()
+        try:
+            return {key: (body, built_at) for key, body, built_at in db.execute(select(HotSnapshot.key, HotSnapshot.body, HotSnapshot.built_at))}
+        finally:
+            db.close()
+
+    return rows
+
+
+def test_persist_upserts_each_snapshot(persisted):
+    now = datetime(2024, 1, 1)
+    first, second = HotContent([], 30, 60), HotContent([], 30, 60)
+    first._persist({"featured": Snapshot((b"1",), now), "feed:old": Snapshot((b"1",), now)})
+    # Another worker's newer build replaces the rows and drops keys it no longer builds
+    second._persist({"featured": Snapshot((b"2",), now + timedelta(seconds=10))})
+    assert persisted() == {"featured": (b"[2]", now + timedelta(seconds=10))}
+    # A slower worker's older build does not overwrite it
+    first._persist({"featured": Snapshot((b"1",), now + timedelta(seconds=5))})
+    assert persisted() == {"featured": (b"[2]", now + timedelta(seconds=10))}
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article, User
+from app.security import create_access_token
+from main import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id="cache-reader", email="cache-reader@example.com", username="cache-reader", hashed_password="x"))
+        db.add(Article(id="cache-article", title="Cached", url="https://example.com/cache/1", source="newsapi",
+                       published_at=datetime(2024, 1, 1)))
+        db.commit()
+    finally:
+        db.close()
+    return TestClient(create_app(), headers={"Authorization": f"Bearer {create_access_token({'sub': 'cache-reader'})}"})
+
+
+@pytest.mark.parametrize("path", ["/api/favorites/", "/api/watchlater/"])
+def test_saved_list_etag_follows_adds_and_removals(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    empty = response.headers["ETag"]
+    assert client.get(path, headers={"If-None-Match": empty}).status_code == 304
+
+    saved = client.post(path, json={"article_id": "cache-article"}).json()
+    response = client.get(path, headers={"If-None-Match": empty})
+    assert response.status_code == 200
+    assert [item["article_id"] for item in response.json()] == ["cache-article"]
+    added = response.headers["ETag"]
+    assert added != empty
+    assert client.get(path, headers={"If-None-Match": added}).status_code == 304
+
+    assert client.delete(path + saved["id"]).status_code == 200
+    response = client.get(path, headers={"If-None-Match": added})
+    assert response.status_code == 200 and response.json() == []
+
+
+def test_no_304_for_a_deleted_user():
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id="cache-gone", email="cache-gone@example.com", username="cache-gone", hashed_password="x"))
+        db.commit()
+    finally:
+        db.close()
+    client = TestClient(create_app(), headers={"Authorization": f"Bearer {create_access_token({'sub': 'cache-gone'})}"})
+    etag = client.get("/api/favorites/").headers["ETag"]
+
+    db = SessionLocal()
+    try:
+        db.delete(db.get(User, "cache-gone"))
+        db.commit()
+    finally:
+        db.close()
+    # The token is still well-formed and unexpired, but its user no longer exists
+    assert client.get("/api/favorites/", headers={"If-None-Match": etag}).status_code == 401
+
+
+def test_combined_is_private(client, monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_SOURCE", "database")
+    response = client.get("/api/news/combined", params={"query": "cache-feed"})
+    assert response.status_code == 200, response.text
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["Vary"] == "Authorization"
+    # No version query here, so the ETag is of the body
+    assert client.get("/api/news/combined", params={"query": "cache-feed"},
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
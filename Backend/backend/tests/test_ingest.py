@@ -0,0 +1,138 @@
+from datetime import datetime
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import ingest
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.ingest import IngestQuery, IngestWorker
+from app.migrations import migrate
+from app.models import User
+from app.security import create_access_token
+from main import create_app
+
+
+class FakeResponse:
+    def __init__(self, articles):
+        self.articles = articles
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"status": "ok", "articles": self.articles}
+
+
+class FakeNewsAPI:
+    """A requests-style ``get`` answering each query with its articles, or raising its exception"""
+
+    def __init__(self, articles_by_query):
+        self.articles_by_query = articles_by_query
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params["q"])
+        outcome = self.articles_by_query[params["q"]]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def payload(name: str, published_at: str) -> dict:
+    return {"url": f"https://example.com/ingest/{name}", "title": f"Ingested {name}", "publishedAt": published_at,
+            "source": {"name": "Example"}, "content": f"Body of {name}"}
+
+
+@pytest.fixture(scope="module")
+def token():
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id="ingest-reader", email="ingest@example.com", username="ingest-reader", hashed_password="x"))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "ingest-reader"})
+
+
+def test_ingested_articles_are_served_in_database_mode(token, monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_SOURCE", "database")
+    http = FakeNewsAPI({
+        "ingest-feed": [payload(f"feed-{i}", f"2030-01-0{i + 1}T00:00:00Z") for i in range(3)],
+        # Older than every feed article, so only the breaking feed can make it the featured one
+        "breaking": [payload("breaking", "2000-01-01T00:00:00Z")],
+    })
+    worker = IngestWorker([IngestQuery("ingest-feed", 60), IngestQuery("breaking", 60)], http=http)
+    assert worker.run_once() == 2
+
+    client = TestClient(create_app())
+    response = client.get("/api/news/combined", params={"query": "ingest-feed"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [article["title"] for article in response.json()] == ["Ingested feed-2", "Ingested feed-1", "Ingested feed-0"]
+
+    response = client.get("/api/news/", params={"query": "ingest-feed", "limit": 2})
+    assert [article["title"] for article in response.json()] == ["Ingested feed-2", "Ingested feed-1"]
+
+    response = client.get("/api/news/featured")
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Ingested breaking"
+    assert datetime.fromisoformat(response.json()["published_at"]).year == 2000
+
+
+def test_run_once_runs_only_due_queries():
+    clock = Clock()
+    http = FakeNewsAPI({"often": [], "rarely": []})
+    worker = IngestWorker([IngestQuery("often", 60), IngestQuery("rarely", 300)], http=http, jitter=0, clock=clock)
+    assert worker.run_once() == 2
+    assert worker.seconds_until_next_run() == 60
+    clock.now += 59
+    assert worker.run_once() == 0
+    clock.now += 1
+    assert worker.run_once() == 1
+    assert http.calls == ["often", "rarely", "often"]
+    assert worker.run_once(force=True) == 2
+    assert worker.metrics()["rarely"]["runs"] == 2
+
+
+def test_failures_back_off_exponentially_up_to_the_cap():
+    clock = Clock()
+    http = FakeNewsAPI({"flaky": requests.ConnectionError("down")})
+    worker = IngestWorker([IngestQuery("flaky", 60)], http=http, jitter=0, max_backoff=400, clock=clock)
+    delays = []
+    for _ in range(5):
+        worker.run_once(force=True)
+        delays.append(worker.state["flaky"].next_run - clock.now)
+    assert delays == [120, 240, 400, 400, 400]
+    metrics = worker.metrics()["flaky"]
+    assert (metrics["consecutive_failures"], metrics["errors"], metrics["lag_seconds"]) == (5, 5, None)
+    assert metrics["last_error"]
+
+    http.articles_by_query["flaky"] = []
+    clock.now += 400
+    assert worker.run_once() == 1
+    assert worker.state["flaky"].next_run - clock.now == 60
+    metrics = worker.metrics()["flaky"]
+    assert (metrics["consecutive_failures"], metrics["last_error"], metrics["lag_seconds"]) == (0, None, 0)
+
+
+def test_backoff_cap_never_shortens_the_interval():
+    worker = IngestWorker([IngestQuery("slow", 7200)], jitter=0, max_backoff=3600)
+    assert worker._delay(worker.queries[0], 3) == 7200
+
+
+@pytest.mark.parametrize("pick, expected", [(min, 54), (max, 66)])
+def test_jitter_spreads_runs_around_the_interval(monkeypatch, pick, expected):
+    monkeypatch.setattr(ingest.random, "uniform", lambda low, high: pick(low, high))
+    worker = IngestWorker([IngestQuery("spread", 60)], jitter=0.1)
+    assert worker._delay(worker.queries[0], 0) == pytest.approx(expected)
+    assert worker._delay(worker.queries[0], 1) == pytest.approx(expected * 2)
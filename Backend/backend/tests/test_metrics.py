@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import RequestTimings, _current, request_metrics
+
+
+def test_failed_statements_leave_nothing_on_the_connection():
+    request_metrics.install()
+    engine = create_engine("sqlite://")
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        with engine.connect() as conn:
+            info = dict(conn.info)
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing"))
+            conn.execute(text("SELECT 1"))
+            assert dict(conn.info) == info
+    finally:
+        _current.reset(token)
+    assert timings.db_queries == 1
+    assert timings.db_seconds > 0
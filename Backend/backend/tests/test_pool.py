@@ -0,0 +1,63 @@
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.config import settings
+from app.database import engine_options
+from app.pool import InstrumentedQueuePool, pool_stats
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A file-backed SQLite engine built from the configured pool options: 2 + 1 overflow, 0.2 s timeout"""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.2)
+    url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "pool.db")
+    engine = create_engine(url, **engine_options(url))
+    yield engine
+    engine.dispose()
+
+
+def test_saturated_pool_times_out_and_reports_it(engine):
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    held = [engine.connect() for _ in range(3)]  # pool_size + max_overflow
+
+    started = time.perf_counter()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    assert time.perf_counter() - started >= 0.2
+
+    stats = pool_stats(engine.pool)
+    assert stats["checked_out"] == 3
+    assert stats["overflow"] == 1
+    assert stats["timeouts"] == 1
+    waits = stats["wait_seconds"]
+    assert waits["count"] == 4
+    assert waits["sum"] >= 0.2
+    # Only the timed-out checkout waited longer than 0.1 s
+    assert waits["buckets"]["0.1"] == 3 and waits["buckets"]["0.5"] == 4 and waits["buckets"]["+Inf"] == 4
+
+    for conn in held:
+        conn.close()
+    assert pool_stats(engine.pool)["checked_out"] == 0
+
+
+def test_waiter_gets_a_released_connection(engine):
+    held = [engine.connect() for _ in range(3)]
+    releaser = threading.Timer(0.05, held.pop().close)
+    releaser.start()
+    with engine.connect():
+        pass
+    releaser.join()
+
+    stats = pool_stats(engine.pool)
+    assert stats["timeouts"] == 0
+    assert stats["wait_seconds"]["sum"] >= 0.05
+    for conn in held:
+        conn.close()
@@ -0,0 +1,112 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.cache import FakeSharedClient
+from app.config import Settings
+from app.database import engine
+from app.migrations import migrate
+from app.ratelimit import MemoryRateLimitStore, RateLimiter, RatePolicy, SharedRateLimitStore, parse_policies, rate_limiter
+from main import create_app
+
+
+class Clock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_memory_store_spends_a_token_per_interval():
+    clock = Clock()
+    store = MemoryRateLimitStore(clock=clock)
+    # 3 per 60 s: one token every 20 s
+    assert [(d.allowed, d.remaining, d.reset) for d in (store.acquire("k", 3, 60) for _ in range(3))] == [
+        (True, 2, 20), (True, 1, 40), (True, 0, 60),
+    ]
+    refused = store.acquire("k", 3, 60)
+    assert (refused.allowed, refused.remaining, refused.retry_after) == (False, 0, 20)
+    # A refused request spends nothing, so the next token still comes 20 s later
+    clock.now = 19.9
+    assert not store.acquire("k", 3, 60).allowed
+    clock.now = 20
+    assert store.acquire("k", 3, 60).allowed
+    assert store.acquire("other", 3, 60).remaining == 2
+
+
+def test_memory_store_evicts_the_least_recently_used_key():
+    store = MemoryRateLimitStore(max_keys=2, clock=Clock())
+    for key in ("a", "b", "c"):
+        store.acquire(key, 1, 60)
+    assert len(store) == 2
+    assert store.acquire("c", 1, 60).allowed is False
+    assert store.acquire("a", 1, 60).allowed is True  # Evicted, so its budget starts whole
+
+
+def test_shared_store_retry_after_within_the_current_window():
+    clock = Clock(600)  # The start of a window
+    store = SharedRateLimitStore(FakeSharedClient(), clock=clock)
+    assert [store.acquire("k", 10, 60).remaining for _ in range(10)] == list(range(9, -1, -1))
+    refused = store.acquire("k", 10, 60)
+    assert not refused.allowed
+    # The 10 requests of this window must slide out to 9 during the next one: 60 s, then 6 s into it
+    assert refused.retry_after == pytest.approx(66)
+    clock.now = 665.9
+    assert not store.acquire("k", 10, 60).allowed
+    clock.now = 666
+    assert store.acquire("k", 10, 60).allowed
+
+
+def test_shared_store_retry_after_as_the_previous_window_slides_out():
+    clock = Clock(600)
+    store = SharedRateLimitStore(FakeSharedClient(), clock=clock)
+    for _ in range(10):
+        store.acquire("k", 10, 60)
+    clock.now = 690  # Half of the previous window's 10 still counts
+    assert all(store.acquire("k", 10, 60).allowed for _ in range(5))
+    refused = store.acquire("k", 10, 60)
+    assert not refused.allowed
+    # Refused requests are taken back: 5 here, and 4 of the previous window's 10 left at 36 s
+    assert refused.retry_after == pytest.approx(6)
+    clock.now = 696
+    assert store.acquire("k", 10, 60).allowed
+
+
+def test_policy_prefers_exact_paths_then_the_longest_prefix():
+    limiter = RateLimiter(
+        parse_policies("/api/news/*=100/60,/api/news/combined*=30/60/user,/api/news/combined/x=5/60/ip"), MemoryRateLimitStore()
+    )
+    assert limiter.policy("/api/news/combined/x") == RatePolicy("/api/news/combined/x", 5, 60, "ip")
+    assert limiter.policy("/api/news/combined").limit == 30
+    assert limiter.policy("/api/news/featured").limit == 100
+    assert limiter.policy("/api/auth/login") is None
+
+
+@pytest.mark.parametrize("hops, expected", [(0, "10.0.0.9"), (1, "10.0.0.1"), (2, "198.51.100.7"), (4, "10.0.0.9")])
+def test_client_ip_trusts_only_the_configured_proxies(hops, expected):
+    limiter = RateLimiter([], MemoryRateLimitStore(), forwarded_hops=hops)
+    headers = Headers({"x-forwarded-for": "203.0.113.5, 198.51.100.7, 10.0.0.1"})
+    assert limiter.client_ip({"client": ("10.0.0.9", 1234)}, headers) == expected
+
+
+def test_middleware_refuses_logins_over_budget():
+    migrate(engine)
+    rate_limiter.store.clear()
+    client = TestClient(create_app(Settings(RATE_LIMIT_ENABLED=True)))
+    login = {"email": "nobody@example.com", "password": "wrong"}
+    policy = rate_limiter.policy("/api/auth/login")
+    try:
+        for remaining in range(policy.limit - 1, -1, -1):
+            response = client.post("/api/auth/login", json=login)
+            assert response.status_code == 401
+            assert response.headers["RateLimit-Remaining"] == str(remaining)
+        response = client.post("/api/auth/login", json=login)
+        assert response.status_code == 429
+        assert response.headers["RateLimit-Limit"] == str(policy.limit)
+        assert response.headers["RateLimit-Policy"] == policy.name
+        assert int(response.headers["Retry-After"]) >= 1
+        # Other routes are not limited
+        assert "RateLimit-Limit" not in client.get("/").headers
+    finally:
+        rate_limiter.store.clear()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.migrations import migrate
+from app.models import Article, Favorite, FeedEntry, User, WatchLater
+from app.retention import Archiver, RetentionRun, articles_archive
+
+NOW = datetime(2024, 6, 15)
+OLD = datetime(2023, 1, 1)
+
+
+@pytest.fixture
+def session_factory():
+    """A database of its own, since a retention run considers every article"""
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "retention.db"))
+    migrate(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(User(id="keeper", email="keeper@example.com", username="keeper", hashed_password="x"))
+
+    def article(article_id, published_at=OLD, source="newsapi"):
+        db.add(Article(id=article_id, title=article_id, url=f"https://example.com/{article_id}", source=source, published_at=published_at))
+        db.add(FeedEntry(query="technology", article_id=article_id, published_at=published_at))
+
+    for i in range(5):
+        article(f"old-{i}")
+    article("old-favorite")
+    article("old-watch-later")
+    article("old-admin", source="admin")
+    article("new", published_at=NOW)
+    db.flush()
+    db.add(Favorite(user_id="keeper", article_id="old-favorite"))
+    db.add(WatchLater(user_id="keeper", article_id="old-watch-later"))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+def archiver(session_factory, **options):
+    return Archiver(max_age_days=30, batch_size=2, batch_pause=0, session_factory=session_factory, clock=lambda: NOW, **options)
+
+
+def article_ids(session_factory):
+    db = session_factory()
+    try:
+        return set(db.scalars(select(Article.id))), set(db.scalars(select(FeedEntry.article_id))), set(db.scalars(select(articles_archive.c.id)))
+    finally:
+        db.close()
+
+
+KEPT = {"old-favorite", "old-watch-later", "old-admin", "new"}
+
+
+def test_run_archives_only_unsaved_articles(session_factory):
+    run = archiver(session_factory).run_once()
+    assert (run.archived, run.batches, run.complete) == (5, 3, True)
+    articles, entries, archived = article_ids(session_factory)
+    assert articles == KEPT
+    assert entries == KEPT
+    assert archived == {f"old-{i}" for i in range(5)}
+
+
+def test_batch_keeps_articles_saved_after_they_were_picked(session_factory):
+    retention = archiver(session_factory)
+    db = session_factory()
+    candidates = retention._candidates(db, retention._cutoffs(db, RetentionRun(started_at=NOW)), None)
+    assert [article_id for _, article_id in candidates] == ["old-0", "old-1"]
+    # Saved between the candidate query and the batch's delete
+    db.add(Favorite(user_id="keeper", article_id="old-1"))
+    db.commit()
+    db.close()
+    assert retention.archive_batch([article_id for _, article_id in candidates], RetentionRun(started_at=NOW)) == 1
+    articles, _, archived = article_ids(session_factory)
+    assert "old-1" in articles
+    assert archived == {"old-0"}
+
+
+def test_expire_archive_drops_only_archived_rows(session_factory):
+    archiver(session_factory).run_once()
+    # Archived rows are of articles published in January 2023, a month kept by 17 months but not by 12
+    assert archiver(session_factory, keep_months=17).expire_archive() == 0
+    assert archiver(session_factory, keep_months=12).expire_archive() == 5
+    articles, entries, archived = article_ids(session_factory)
+    assert articles == KEPT and entries == KEPT
+    assert archived == set()
@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.articles import upsert_articles
+from app.config import Settings, settings
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article, Favorite, User, WatchLater
+from app.saved import apply_batch
+from app.security import create_access_token
+from main import create_app
+
+
+@pytest.fixture(scope="module")
+def article_ids():
+    """Three articles of the "batch-feed" feed, newest first"""
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id="batcher", email="batcher@example.com", username="batcher", hashed_password="x"))
+        upsert_articles(db, [
+            {"url": f"https://example.com/batch/{i}", "title": f"Batch {i}", "publishedAt": f"2024-02-0{i + 1}T00:00:00Z"}
+            for i in range(3)
+        ], query="batch-feed")
+        db.commit()
+        urls = [f"https://example.com/batch/{i}" for i in (2, 1, 0)]
+        ids = dict(db.query(Article.url, Article.id).filter(Article.url.in_(urls)).all())
+        return [ids[url] for url in urls]
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.query(Favorite).filter(Favorite.user_id == "batcher").delete()
+    session.query(WatchLater).filter(WatchLater.user_id == "batcher").delete()
+    session.commit()
+    session.close()
+
+
+@pytest.mark.parametrize("model", [Favorite, WatchLater])
+def test_apply_batch_reports_only_changes(db, article_ids, model):
+    a, b, c = article_ids
+    assert apply_batch(db, model, "batcher", [a, b, a, "no-such-article"], []) == {
+        "added": [a, b], "removed": [], "missing": ["no-such-article"],
+    }
+    # Already in the wanted state: nothing to report
+    assert apply_batch(db, model, "batcher", [a, c], [b]) == {"added": [c], "removed": [b], "missing": []}
+    assert apply_batch(db, model, "batcher", [a], [b]) == {"added": [], "removed": [], "missing": []}
+    saved = {article_id for article_id, in db.query(model.article_id).filter(model.user_id == "batcher")}
+    assert saved == {a, c}
+
+
+def test_apply_batch_refuses_an_article_in_both_lists(db, article_ids):
+    with pytest.raises(ValueError):
+        apply_batch(db, Favorite, "batcher", [article_ids[0]], [article_ids[0]])
+
+
+def client(async_mode: bool = False) -> TestClient:
+    app = create_app(Settings(ASYNC_MODE=True)) if async_mode else create_app()
+    return TestClient(app, headers={"Authorization": f"Bearer {create_access_token({'sub': 'batcher'})}"})
+
+
+@pytest.mark.parametrize("async_mode", [False, True])
+@pytest.mark.parametrize("path", ["/api/favorites/batch", "/api/watchlater/batch"])
+def test_batch_endpoint(db, article_ids, path, async_mode):
+    app = client(async_mode)
+    response = app.post(path, json={"add": article_ids[:2]})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"added": article_ids[:2], "removed": [], "missing": []}
+    response = app.post(path, json={"add": article_ids[:1], "remove": article_ids[1:]})
+    assert response.json() == {"added": [], "removed": article_ids[1:2], "missing": []}
+
+    assert app.post(path, json={"add": article_ids[:1], "remove": article_ids[:1]}).status_code == 422
+    assert app.post(path, json={"add": ["x"] * 200}).status_code == 200
+    assert app.post(path, json={"add": ["x"] * 201}).status_code == 422
+
+
+def test_combined_flags_saved_articles(db, article_ids, monkeypatch):
+    monkeypatch.setattr(settings, "NEWS_SOURCE", "database")
+    app = client()
+    app.post("/api/favorites/batch", json={"add": article_ids[:2]})
+    app.post("/api/watchlater/batch", json={"add": article_ids[1:]})
+    response = app.get("/api/news/combined", params={"query": "batch-feed", "saved_state": "true"})
+    assert response.status_code == 200, response.text
+    assert [(article["id"], article["is_favorite"], article["in_watch_later"]) for article in response.json()] == [
+        (article_ids[0], True, False), (article_ids[1], True, True), (article_ids[2], False, True),
+    ]
+    assert "is_favorite" not in app.get("/api/news/combined", params={"query": "batch-feed"}).json()[0]
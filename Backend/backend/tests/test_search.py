@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article
+from app.search import _search_like, search_articles
+
+MARKUP = '<img src=x onerror="alert(1)"> Zeppelin & <b>friends</b>'
+
+
+@pytest.fixture(scope="module")
+def db():
+    migrate(engine)
+    session = SessionLocal()
+    session.add(Article(
+        id="search-markup", title="<script>alert(1)</script> Zeppelin", description=MARKUP, content=MARKUP,
+        url="https://example.com/search/markup", published_at=datetime(2024, 1, 1),
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("searcher", [search_articles, _search_like], ids=["fts", "like"])
+def test_highlight_escapes_article_markup(db, searcher):
+    [hit] = searcher(db, "zeppelin", 10)
+    assert hit.article.id == "search-markup"
+    assert "<mark>Zeppelin</mark>" in hit.highlight
+    assert "&lt;" in hit.highlight
+    assert hit.highlight.replace("<mark>", "").replace("</mark>", "").count("<") == 0
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.models import Article
+from app.stream import StreamBroker, StreamFull, Subscriber, broker, event_id, parse_event_id
+from main import create_app
+
+# Later than anything the other tests store, so resuming and polling see only these
+BASE = datetime(2099, 1, 1)
+
+
+def article(n: int) -> Article:
+    return Article(id=f"stream-{n}", title=f"Stream {n}", url=f"https://example.com/stream/{n}", source="newsapi",
+                   published_at=BASE, created_at=BASE + timedelta(seconds=n))
+
+
+@pytest.fixture
+def stored():
+    """Articles 1 to 3 in the database"""
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        db.add_all(article(n) for n in range(1, 4))
+        db.commit()
+    finally:
+        db.close()
+    yield
+    db = SessionLocal()
+    try:
+        db.query(Article).filter(Article.id.like("stream-%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(test, **options):
+    async def main():
+        stream_broker = StreamBroker(**{"buffer": 4, "heartbeat": 3600, "poll_interval": 0, **options})
+        await stream_broker.start()
+        try:
+            return await test(stream_broker)
+        finally:
+            await stream_broker.stop()
+    return asyncio.run(main())
+
+
+async def subscribe(stream_broker, resume=None):
+    stream = stream_broker.events(resume, retry_ms=1000)
+    assert await stream.__anext__() == b"retry: 1000\n\n"
+    return stream
+
+
+async def read(stream):
+    return await asyncio.wait_for(stream.__anext__(), 1)
+
+
+def ids(events):
+    return [parse_event_id(event.split(b"\n")[0][4:].decode())[1] for event in events]
+
+
+def test_publish_fans_out_to_every_subscriber():
+    async def test(stream_broker):
+        first, second = await subscribe(stream_broker), await subscribe(stream_broker)
+        stream_broker.publish([article(1), article(2)])
+        stream_broker.publish([article(1)])  # Already published
+        stream_broker.publish([article(3)])
+        for stream in (first, second):
+            assert ids([await read(stream) for _ in range(3)]) == ["stream-1", "stream-2", "stream-3"]
+        assert stream_broker.counters["published"] == 3
+        await first.aclose()
+        assert len(stream_broker.subscribers) == 1
+
+    run(test)
+
+
+def test_slow_subscriber_is_dropped_and_its_stream_ends():
+    async def test(stream_broker):
+        slow, fast = await subscribe(stream_broker), await subscribe(stream_broker)
+        stream_broker.publish([article(1), article(2)])
+        assert ids([await read(fast), await read(fast)]) == ["stream-1", "stream-2"]
+        stream_broker.publish([article(3)])
+        assert ids([await read(fast)]) == ["stream-3"]
+        # The slow one gets what fitted in its queue, then its stream ends for it to resume
+        assert ids([await read(slow), await read(slow)]) == ["stream-1", "stream-2"]
+        with pytest.raises(StopAsyncIteration):
+            await read(slow)
+        assert stream_broker.counters["dropped"] == 1
+        assert len(stream_broker.subscribers) == 1
+
+    run(test, buffer=2)
+
+
+def test_resume_replays_missed_articles_then_goes_live(stored):
+    async def test(stream_broker):
+        stream = await subscribe(stream_broker, resume=(BASE + timedelta(seconds=1), "stream-1"))
+        assert ids([await read(stream), await read(stream)]) == ["stream-2", "stream-3"]
+        # Published while the backlog was read: not sent twice
+        stream_broker.publish([article(3), article(4)])
+        assert ids([await read(stream)]) == ["stream-4"]
+        assert stream_broker.counters["resumed"] == 1
+
+    run(test)
+
+
+def test_resume_ends_the_stream_when_the_backlog_is_cut_off(stored):
+    async def test(stream_broker):
+        stream = await subscribe(stream_broker, resume=(BASE, ""))
+        events = [await read(stream), await read(stream)]
+        assert ids(events) == ["stream-1", "stream-2"]
+        with pytest.raises(StopAsyncIteration):
+            await read(stream)
+        # The client reconnects from the last event it got
+        last = events[-1].split(b"\n")[0][4:].decode()
+        assert last == event_id(BASE + timedelta(seconds=2), "stream-2")
+        stream = await subscribe(stream_broker, resume=parse_event_id(last))
+        assert ids([await read(stream)]) == ["stream-3"]
+
+    run(test, resume_limit=2)
+
+
+def test_poller_skips_articles_already_published(stored):
+    async def test(stream_broker):
+        stream_broker.subscribers.add(Subscriber(4))
+        stream_broker._high_water = BASE
+        stream_broker.publish([article(2)])
+        assert [article_id for article_id, _ in stream_broker._poll_once()] == ["stream-1", "stream-3"]
+        # Polled articles are remembered too, so overlapping polls send nothing again
+        assert stream_broker._poll_once() == []
+        assert stream_broker._high_water == BASE + timedelta(seconds=3)
+
+    run(test, poll_overlap=0)
+
+
+def test_admit_refuses_past_max_subscribers():
+    async def test(stream_broker):
+        stream_broker.admit()
+        await subscribe(stream_broker)
+        with pytest.raises(StreamFull):
+            stream_broker.admit()
+        assert stream_broker.counters["rejected"] == 1
+
+    run(test, max_subscribers=1)
+
+
+def test_stream_route_answers_503_when_full(monkeypatch):
+    monkeypatch.setattr(broker, "max_subscribers", 0)
+    response = TestClient(create_app()).get("/api/news/stream")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
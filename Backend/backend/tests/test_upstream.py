@@ -0,0 +1,196 @@
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import upstream
+from app.articles import upsert_articles
+from app.database import SessionLocal, engine
+from app.http_cache import http_cache
+from app.migrations import migrate
+from app.routes import news
+from app.upstream import STALE_HEADER, CircuitBreaker, RateLimiter, UpstreamClient, UpstreamUnavailable
+from main import create_app
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status: int, headers=None, articles=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self.articles = articles or []
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return {"status": "ok", "articles": self.articles}
+
+
+class FakeNewsAPI:
+    """Answers each call with the next outcome: a FakeResponse, or an exception to raise"""
+
+    def __init__(self, clock: Clock, outcomes, seconds_per_call: float = 0.0):
+        self.clock = clock
+        self.outcomes = list(outcomes)
+        self.seconds_per_call = seconds_per_call
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        self.clock.advance(self.seconds_per_call)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+OK = FakeResponse(200, articles=[{"url": "https://example.com/up", "title": "Up"}])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.advance(seconds)
+
+    monkeypatch.setattr(upstream.time, "sleep", sleep)
+    clock.sleeps = sleeps
+    return clock
+
+
+def client(clock, outcomes, threshold=3, seconds_per_call=0.0, **options):
+    http = FakeNewsAPI(clock, outcomes, seconds_per_call)
+    options.setdefault("max_retries", 2)
+    return UpstreamClient(
+        CircuitBreaker(threshold, 30, clock=clock), RateLimiter(100, 60, clock=clock), deadline=3, attempt_timeout=2,
+        backoff_base=0.01, backoff_max=0.05, http=http, clock=clock, **options,
+    ), http
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(2, 30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.advance(30)
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # One probe at a time
+    breaker.record_failure()  # A failed probe opens it again at once
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.advance(29)
+    assert not breaker.allow()
+
+    clock.advance(1)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    assert breaker.stats() == {"opened": 2, "rejected": 3, "probes": 2, "state": "closed", "consecutive_failures": 0}
+
+
+def test_rate_limiter_refills_over_its_window():
+    clock = Clock()
+    limiter = RateLimiter(2, 60, clock=clock)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    clock.advance(30)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+
+def test_retry_waits_for_retry_after(clock):
+    newsapi_client, http = client(clock, [FakeResponse(503, {"Retry-After": "1"}), OK])
+    assert newsapi_client.fetch({"q": "x"}) == OK.articles
+    assert clock.sleeps == [1.0]
+    assert (newsapi_client.counters["attempts"], newsapi_client.counters["retries"]) == (2, 1)
+
+
+def test_retry_after_past_the_deadline_gives_up(clock):
+    newsapi_client, http = client(clock, [FakeResponse(429, {"Retry-After": "5"})])
+    with pytest.raises(UpstreamUnavailable) as raised:
+        newsapi_client.fetch({"q": "x"})
+    assert raised.value.reason == "rate-limited"
+    assert clock.sleeps == []
+    assert newsapi_client.breaker.failures == 1
+
+
+def test_deadline_cuts_off_retries(clock):
+    newsapi_client, http = client(clock, [requests.Timeout()] * 5, seconds_per_call=1.5, max_retries=5)
+    with pytest.raises(UpstreamUnavailable) as raised:
+        newsapi_client.fetch({"q": "x"})
+    assert raised.value.reason == "unavailable"
+    # The second attempt only gets what is left of the 3 s deadline, and there is no time for a third
+    assert len(http.timeouts) == 2
+    assert http.timeouts[0] == 2 and http.timeouts[1] < 1.5
+
+
+def test_rejected_request_is_not_retried_or_held_against_upstream(clock):
+    newsapi_client, http = client(clock, [FakeResponse(401)])
+    with pytest.raises(UpstreamUnavailable):
+        newsapi_client.fetch({"q": "x"})
+    assert newsapi_client.counters["attempts"] == 1
+    assert newsapi_client.breaker.failures == 0
+
+
+def test_open_breaker_fails_fast_then_probes_once(clock):
+    newsapi_client, http = client(clock, [FakeResponse(503)] * 3 + [FakeResponse(503), OK], threshold=3, max_retries=0)
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailable):
+            newsapi_client.fetch({"q": "x"})
+    with pytest.raises(UpstreamUnavailable) as raised:
+        newsapi_client.fetch({"q": "x"})
+    assert raised.value.reason == "circuit-open"
+    assert len(http.timeouts) == 3
+
+    clock.advance(30)
+    newsapi_client.max_retries = 2
+    with pytest.raises(UpstreamUnavailable):
+        newsapi_client.fetch({"q": "x"})  # The probe gets a single attempt
+    assert len(http.timeouts) == 4
+    assert newsapi_client.breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(30)
+    assert newsapi_client.fetch({"q": "x"}) == OK.articles
+    assert newsapi_client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_routes_serve_stored_articles_while_upstream_is_down(clock, monkeypatch):
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        upsert_articles(db, [{"url": "https://example.com/stored-degraded", "title": "Stored", "publishedAt": "2024-01-01T00:00:00Z"}],
+                        query="degraded-feed")
+        db.commit()
+    finally:
+        db.close()
+    down, _ = client(clock, [], threshold=1)
+    down.breaker.record_failure()
+    monkeypatch.setattr(news, "newsapi_client", down)
+    http_cache.invalidate()
+
+    app = TestClient(create_app())
+    response = app.get("/api/news/", params={"query": "degraded-feed"})
+    assert response.status_code == 200
+    assert response.headers[STALE_HEADER] == "circuit-open"
+    assert [article["title"] for article in response.json()] == ["Stored"]
+
+    response = app.get("/api/news/featured")
+    assert response.status_code == 200
+    assert response.headers[STALE_HEADER] == "circuit-open"
@@ -50,19 +50,28 @@ const Favorites = () => {
         setLoading(true)
         setError(null)
 
-       const response = await fetch(`${API_BASE_URL}/api/favorites/`, { 
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      })
+        // The list comes a page at a time; full includes the content shown when a card expands
+        const items = []
+        let cursor = null
+        do {
+          const params = new URLSearchParams({ limit: "200", fields: "full" })
+          if (cursor) params.set("cursor", cursor)
+          const response = await fetch(`${API_BASE_URL}/api/favorites/?${params}`, {
+            headers: {
+              Authorization: `Bearer ${token}`,
+            },
+          })
 
-        if (!response.ok) {
-          throw new Error(`Failed to fetch favorites: ${response.statusText}`)
-        }
+          if (!response.ok) {
+            throw new Error(`Failed to fetch favorites: ${response.statusText}`)
+          }
+
+          const data = await response.json()
+          if (Array.isArray(data)) items.push(...data)
+          cursor = response.headers.get("X-Next-Cursor")
+        } while (cursor)
 
-        const data = await response.json()
-        
-        setFavorites(Array.isArray(data) ? data : [])
+        setFavorites(items)
 
       } catch (err) {
         setError("Failed to load favorites.")
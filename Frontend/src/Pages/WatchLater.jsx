@@ -50,19 +50,28 @@ const WatchLater = () => {
         setLoading(true)
         setError(null)
 
-        const response = await fetch(`${API_BASE_URL}/api/watchlater/`, { 
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        })
+        // The list comes a page at a time; full includes the content shown when a card expands
+        const items = []
+        let cursor = null
+        do {
+          const params = new URLSearchParams({ limit: "200", fields: "full" })
+          if (cursor) params.set("cursor", cursor)
+          const response = await fetch(`${API_BASE_URL}/api/watchlater/?${params}`, {
+            headers: {
+              Authorization: `Bearer ${token}`,
+            },
+          })
 
-        if (!response.ok) {
-          throw new Error(`Failed to fetch watch later items: ${response.statusText}`)
-        }
+          if (!response.ok) {
+            throw new Error(`Failed to fetch watch later items: ${response.statusText}`)
+          }
+
+          const data = await response.json()
+          if (Array.isArray(data)) items.push(...data)
+          cursor = response.headers.get("X-Next-Cursor")
+        } while (cursor)
 
-        const data = await response.json()
-        
-        setWatchLaterItems(Array.isArray(data) ? data : [])
+        setWatchLaterItems(items)
 
       } catch (err) {
         setError("Failed to load watch later items.")